@@ -1,10 +1,27 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Dict, Any, List, Optional
+from datetime import date, datetime, timezone
+import time
 
-from app.models.schemas import PlantaData, KPIsEjecutivos, RealtimeDataPoint, Ticket
+from app.models.schemas import (
+    PlantaData, KPIsEjecutivos, RealtimeDataPoint, Ticket,
+    HistoricoPerformance, HistoricoSeriesPoint, HistoricoAppendResponse,
+    EquiposPerformanceResponse, AlertEvent, ThresholdAlert, LossWaterfallResponse,
+    ExpectedEnergyResponse, ForecastResponse
+)
+from app.core.http_cache import conditional
+from app.core.responses import (
+    COLUMNAR_BINARY, COLUMNAR_JSON, columnar_response, fast_json, negotiate_series
+)
 from app.services.data_loader import data_loader
+from app.services.downsampling import downsample_points
+from app.services.expected_energy import expected_energy
+from app.services.forecasting import forecaster
+from app.services.equipment_performance import equipment_performance
+from app.services.anomaly_detector import anomaly_detector
 from app.services.kpi_calculator import kpi_calculator
-from app.services.realtime_simulator import realtime_simulator
+from app.services.realtime_simulator import STEP_SECONDS, realtime_simulator
+from app.services.timezones import plant_timezone
 
 router = APIRouter()
 
@@ -21,8 +38,22 @@ async def reload_data() -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error inesperado: {str(e)}")
 
+@router.post("/data/historico", response_model=HistoricoAppendResponse)
+async def append_historico(rows: List[HistoricoPerformance]) -> HistoricoAppendResponse:
+    """Agrega filas al histórico (reemplaza las de igual planta y fecha)"""
+    if not rows:
+        raise HTTPException(status_code=400, detail="No se enviaron filas")
+    
+    try:
+        result = data_loader.append_historico(rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Evaluar anomalías sobre los días nuevos a medida que llegan
+    anomaly_detector.process_new()
+    return result
+
 @router.get("/plant", response_model=PlantaData)
-async def get_plant_data() -> PlantaData:
+async def get_plant_data(request: Request, response: Response) -> PlantaData:
     """Obtiene parámetros de planta, equipos y umbrales"""
     if not data_loader.planta_data:
         raise HTTPException(
@@ -30,10 +61,16 @@ async def get_plant_data() -> PlantaData:
             detail="Datos no cargados. Usar POST /api/data/reload primero."
         )
     
+    not_modified = conditional(request, response, data_loader.version, last_modified=data_loader.last_modified)
+    if not_modified:
+        return not_modified
+    
     return data_loader.planta_data
 
 @router.get("/kpis/exec", response_model=KPIsEjecutivos)
 async def get_executive_kpis(
+    request: Request,
+    response: Response,
     range: str = Query("30d", description="Rango: 30d, 90d, YTD, 12m")
 ) -> KPIsEjecutivos:
     """Obtiene KPIs consolidados para CEO/CFO/COO"""
@@ -43,6 +80,17 @@ async def get_executive_kpis(
             detail="Datos no cargados. Usar POST /api/data/reload primero."
         )
     
+    # Cambia con los datos, el día local de la planta (ventanas) y cada paso
+    # de la simulación (potencia actual)
+    slot = int(time.time()) // STEP_SECONDS
+    not_modified = conditional(
+        request, response,
+        data_loader.version, kpi_calculator.today(), slot,
+        last_modified=max(data_loader.last_modified, datetime.fromtimestamp(slot * STEP_SECONDS, timezone.utc))
+    )
+    if not_modified:
+        return not_modified
+    
     try:
         kpis = kpi_calculator.calculate_executive_kpis(range)
         return kpis
@@ -51,25 +99,202 @@ async def get_executive_kpis(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculando KPIs: {str(e)}")
 
-@router.get("/series/realtime", response_model=List[RealtimeDataPoint])
+@router.get("/kpis/perdidas", response_model=LossWaterfallResponse)
+async def get_loss_waterfall(
+    range: Optional[str] = Query("12m", description="Rango: 30d, 90d, YTD, 12m (ignorado si se envía desde)"),
+    desde: Optional[date] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Fecha final inclusive (YYYY-MM-DD, por defecto hoy)"),
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta (omitir para el total)"),
+    granularity: str = Query("month", description="Granularidad de los períodos: day, week, month, year")
+) -> LossWaterfallResponse:
+    """Cascada de pérdidas (esperada → curtailment → soiling → otros → real) con desglose por período"""
+    if not data_loader.planta_data or not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    if desde is None:
+        desde = kpi_calculator.range_start(range).date()
+    if hasta is None:
+        hasta = kpi_calculator.today()
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    
+    try:
+        return kpi_calculator.loss_waterfall(desde, hasta, planta_id=planta_id, granularity=granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/kpis/desviacion", response_model=ExpectedEnergyResponse)
+async def get_expected_energy_deviation(
+    range: Optional[str] = Query("12m", description="Rango: 30d, 90d, YTD, 12m (ignorado si se envía desde)"),
+    desde: Optional[date] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Fecha final inclusive (YYYY-MM-DD, por defecto hoy)"),
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta"),
+    granularity: str = Query("month", description="Granularidad de los períodos: day, week, month, year")
+) -> ExpectedEnergyResponse:
+    """Energía real vs esperada del CSV vs modelada con los parámetros de la planta"""
+    if not data_loader.planta_data or not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    if desde is None:
+        desde = kpi_calculator.range_start(range).date()
+    if hasta is None:
+        hasta = kpi_calculator.today()
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    
+    try:
+        return expected_energy.deviation(desde, hasta, planta_id=planta_id, granularity=granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/kpis/pronostico", response_model=ForecastResponse)
+async def get_forecast(
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta")
+) -> ForecastResponse:
+    """Pronóstico de energía, ingresos y margen (próximos 7 días y cierre de mes) con ROI/payback"""
+    if not data_loader.planta_data or not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    try:
+        return forecaster.forecast(planta_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/kpis/equipos", response_model=EquiposPerformanceResponse)
+async def get_equipment_kpis(
+    range: str = Query("30d", description="Rango: 30d, 90d, YTD, 12m"),
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta"),
+    tipo: str = Query("Inversor", description="Tipo de equipo (hoja Equipos)"),
+    umbral_pct: float = Query(5.0, ge=0, le=100, description="Desviación bajo la mediana que marca bajo rendimiento")
+) -> EquiposPerformanceResponse:
+    """Ranking de equipos por specific yield vs la mediana de la flota (peores primero)"""
+    if not data_loader.planta_data or not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    try:
+        return equipment_performance.ranking(range, planta_id=planta_id, tipo=tipo, threshold_pct=umbral_pct)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculando KPIs por equipo: {str(e)}")
+
+@router.get("/alertas/eventos", response_model=List[AlertEvent])
+async def get_alert_events(
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta"),
+    kpi: Optional[str] = Query(None, description="Filtrar por KPI (PR, Availability, Soiling)"),
+    since: Optional[str] = Query(None, description="Desde fecha (YYYY-MM-DD)"),
+    severidad: str = Query("info", description="Severidad mínima: info, amarillo, rojo"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Límite de resultados"),
+    fuente: Optional[str] = Query(None, description="historico (días) o tiempo_real (omitir para ambas)")
+) -> List[AlertEvent]:
+    """Eventos de anomalía (z-score, EWMA, CUSUM) de los KPIs con umbrales, más recientes primero"""
+    if not data_loader.planta_data or not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    try:
+        return anomaly_detector.get_events(
+            planta_id=planta_id, kpi=kpi, since=since, min_severity=severidad, limit=limit, fuente=fuente
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/alertas/umbrales", response_model=List[ThresholdAlert])
+async def get_threshold_alerts(
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta (omitir para todas)")
+) -> List[ThresholdAlert]:
+    """Reglas de Umbrales disparadas por planta en los rangos 30d, 90d, YTD y 12m"""
+    if not data_loader.planta_data or not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    try:
+        return kpi_calculator.evaluate_thresholds(planta_id=planta_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get(
+    "/series/realtime",
+    response_model=List[RealtimeDataPoint],
+    responses={200: {"content": {COLUMNAR_JSON: {}, COLUMNAR_BINARY: {}}}}
+)
 async def get_realtime_series(
-    hours: int = Query(24, ge=1, le=168, description="Horas de histórico (1-168)")
+    request: Request,
+    response: Response,
+    hours: int = Query(24, ge=1, le=168, description="Horas de histórico (1-168)"),
+    max_points: Optional[int] = Query(None, ge=10, le=5000, description="Máximo de puntos (downsampling)"),
+    downsample: str = Query("lttb", description="Método de downsampling: lttb, minmax")
 ) -> List[RealtimeDataPoint]:
-    """Obtiene serie temporal simulada en tiempo real"""
+    """
+    Obtiene serie temporal simulada en tiempo real
+
+    Con `Accept: application/vnd.solar.columnar+json` responde arrays
+    paralelos con timestamps en ms epoch; con
+    `Accept: application/vnd.solar.columnar`, el binario float32.
+    """
     if not data_loader.planta_data:
         raise HTTPException(
             status_code=400,
             detail="Datos no cargados. Usar POST /api/data/reload primero."
         )
     
+    fmt = negotiate_series(request)
     try:
-        series = realtime_simulator.generate_series(hours)
-        return series
+        if fmt != 'json':
+            ts, columns = realtime_simulator.series_arrays(hours, max_points, downsample)
+            meta = {'timezone': str(plant_timezone(data_loader.planta_data.planta)), 'step_seconds': STEP_SECONDS}
+            return columnar_response(fmt, ts, columns, meta)
+        series = realtime_simulator.generate_series(hours, max_points, downsample)
+        response.headers['Vary'] = 'Accept'
+        return fast_json(series, List[RealtimeDataPoint], response)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando serie: {str(e)}")
 
+@router.get("/series/historico", response_model=List[HistoricoSeriesPoint])
+async def get_historico_series(
+    granularity: str = Query("day", description="Granularidad: 15min, 30min, hour, day, week, month, year"),
+    range: Optional[str] = Query(None, description="Rango: 30d, 90d, YTD, 12m (omitir para todo)"),
+    planta_id: Optional[str] = Query(None, description="Filtrar por planta (omitir para el total)"),
+    max_points: Optional[int] = Query(None, ge=10, le=5000, description="Máximo de puntos (downsampling)"),
+    downsample: str = Query("lttb", description="Método de downsampling: lttb, minmax")
+) -> List[HistoricoSeriesPoint]:
+    """Serie histórica agregada por período (rollups o, si es sub-diaria, el store columnar)"""
+    if not data_loader.historico:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    start = kpi_calculator.range_start(range) if range else None
+    
+    try:
+        points = data_loader.historico_series(granularity, planta_id=planta_id, start=start)
+        return downsample_points(points, 'energia_real_kwh', max_points, downsample)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/tickets", response_model=List[Ticket])
 async def get_tickets(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None, description="Filtrar por estado"),
     sort: str = Query("costo_desc", description="Ordenamiento: costo_desc, costo_asc, fecha"),
     limit: Optional[int] = Query(None, ge=1, le=1000, description="Límite de resultados")
@@ -81,29 +306,11 @@ async def get_tickets(
             detail="Datos no cargados. Usar POST /api/data/reload primero."
         )
     
-    # Filtrar por estado
-    tickets = data_loader.tickets
-    
-    if status:
-        status_lower = status.lower()
-        if status_lower == "pendiente":
-            tickets = [
-                t for t in tickets
-                if t.estado.lower() in ['pendiente', 'en progreso', 'bloqueado']
-            ]
-        else:
-            tickets = [t for t in tickets if t.estado.lower() == status_lower]
-    
-    # Ordenar
-    if sort == "costo_desc":
-        tickets = sorted(tickets, key=lambda x: x.costo_estimado_usd, reverse=True)
-    elif sort == "costo_asc":
-        tickets = sorted(tickets, key=lambda x: x.costo_estimado_usd)
-    elif sort == "fecha":
-        tickets = sorted(tickets, key=lambda x: x.fecha_creacion, reverse=True)
-    
-    # Limitar
-    if limit:
-        tickets = tickets[:limit]
-    
-    return tickets
+    not_modified = conditional(request, response, data_loader.version, last_modified=data_loader.last_modified)
+    if not_modified:
+        return not_modified
+    
+    tickets = data_loader.query_tickets(status, sort, limit)
+    
+    # Los tickets se validaron al cargar el CSV
+    return fast_json(tickets, List[Ticket], response)
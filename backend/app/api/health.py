@@ -11,3 +11,17 @@ async def health_check() -> Dict[str, Any]:
         "service": "Solar PV Analytics API",
         "version": "1.0.0"
     }
+
+@router.get("/health/providers")
+async def provider_connections() -> Dict[str, Any]:
+    """Métricas de reutilización de conexiones hacia proveedores externos"""
+    from app.services.lazy import provider_http
+    
+    return {
+        "providers": provider_http.stats(),
+        "limits": {
+            "max_connections": provider_http.limits.max_connections,
+            "max_keepalive_connections": provider_http.limits.max_keepalive_connections,
+            "keepalive_expiry_seconds": provider_http.limits.keepalive_expiry
+        }
+    }
@@ -0,0 +1,55 @@
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import APIRouter, Response
+
+from app.core.metrics import Sample, cache_hit_ratios, registry
+from app.services.data_loader import data_loader
+
+router = APIRouter()
+
+def _resident_bytes() -> Optional[int]:
+    """Memoria residente del proceso (Linux: /proc; otros: pico vía getrusage)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+def _dataset_metrics() -> Iterable[Tuple[str, str, str, List[Sample]]]:
+    yield ("dataset_rows", "gauge", "Registros cargados por conjunto de datos", [
+        ("dataset_rows", {"dataset": "historico_store"}, len(data_loader.store)),
+        ("dataset_rows", {"dataset": "historico_diario"}, len(data_loader.historico)),
+        ("dataset_rows", {"dataset": "tickets"}, len(data_loader.tickets)),
+    ])
+    yield ("dataset_store_bytes", "gauge", "Memoria de las columnas del store del histórico", [
+        ("dataset_store_bytes", {}, data_loader.store.nbytes),
+    ])
+    yield ("dataset_version", "gauge", "Versión de datos (recargas + appends)", [
+        ("dataset_version", {}, data_loader.version),
+    ])
+    ratios = cache_hit_ratios()
+    yield ("cache_hit_ratio", "gauge", "Aciertos / consultas por cache interno", [
+        ("cache_hit_ratio", {"cache": cache}, ratio)
+        for cache, ratio in sorted(ratios.items()) if ratio is not None
+    ])
+    resident = _resident_bytes()
+    if resident is not None:
+        yield ("process_resident_memory_bytes", "gauge", "Memoria residente del proceso", [
+            ("process_resident_memory_bytes", {}, resident),
+        ])
+
+registry.add_collector(_dataset_metrics)
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics() -> Response:
+    """Métricas en formato de texto de Prometheus"""
+    return Response(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
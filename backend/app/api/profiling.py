@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any
+
+from app.core.config import settings
+from app.core.profiling import request_profiler
+
+router = APIRouter()
+
+def _get_profile(profile_id: int) -> Dict[str, Any]:
+    entry = request_profiler.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Perfil no encontrado: {profile_id}")
+    return entry
+
+@router.get("/admin/profiles")
+async def list_profiles() -> Dict[str, Any]:
+    """Perfiles de requests guardados (más reciente primero, sin detalle)"""
+    return {
+        "sample_rate": settings.profile_sample_rate,
+        "mode": settings.profile_mode,
+        "header_enabled": settings.profile_allow_header,
+        "max_entries": settings.profile_max_entries,
+        "profiles": request_profiler.list()
+    }
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: int) -> Dict[str, Any]:
+    """Perfil completo: top-N funciones y, en modo sample, stacks colapsados"""
+    return _get_profile(profile_id)
+
+@router.get("/admin/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def get_profile_collapsed(profile_id: int) -> str:
+    """Stacks colapsados para flamegraph.pl o speedscope (solo perfiles en modo sample)"""
+    entry = _get_profile(profile_id)
+    if entry["mode"] != "sample":
+        raise HTTPException(
+            status_code=400,
+            detail="El perfil no tiene stacks. Usar X-Profile: sample o PROFILE_MODE=sample."
+        )
+    return request_profiler.collapsed(entry)
+
+@router.delete("/admin/profiles")
+async def clear_profiles() -> Dict[str, Any]:
+    """Descarta los perfiles guardados"""
+    return {"deleted": request_profiler.clear()}
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import Dict, Any
 
-from app.models.schemas import ReportRequest, TTSRequest, WhatsAppRequest
-from app.services.pdf_generator import pdf_generator
-from app.services.tts_service import tts_service
-from app.services.whatsapp_service import whatsapp_service
+from app.models.schemas import (
+    ReportRequest, TTSRequest, WhatsAppRequest, WhatsAppBroadcastRequest,
+    WhatsAppBroadcastResponse, OutboundMessageStatus, WhatsAppBatchStatus
+)
+from app.services.lazy import pdf_generator, tts_service, whatsapp_service, outbound_queue
 from app.services.data_loader import data_loader
 
 router = APIRouter()
@@ -42,7 +43,7 @@ async def generate_tts_audio(request: TTSRequest = None) -> Dict[str, Any]:
     
     try:
         custom_text = request.text if request else None
-        filepath = tts_service.generate_audio_summary(
+        filepath = await tts_service.generate_audio_summary_async(
             date_range="30d",
             custom_text=custom_text
         )
@@ -56,12 +57,44 @@ async def generate_tts_audio(request: TTSRequest = None) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando audio: {str(e)}")
 
+@router.post("/report/tts/stream")
+async def stream_tts_audio(
+    request: TTSRequest = None,
+    range: str = Query("30d", description="Rango: 30d, 90d, YTD, 12m")
+) -> StreamingResponse:
+    """Genera el resumen ejecutivo en audio y lo transmite a medida que se sintetiza"""
+    if not data_loader.planta_data:
+        raise HTTPException(
+            status_code=400,
+            detail="Datos no cargados. Usar POST /api/data/reload primero."
+        )
+    
+    try:
+        custom_text = request.text if request else None
+        audio_stream, source = tts_service.stream_audio_summary(
+            date_range=range,
+            custom_text=custom_text
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generando audio: {str(e)}")
+    
+    return StreamingResponse(
+        audio_stream,
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "inline; filename=resumen_ejecutivo.mp3",
+            "X-TTS-Source": source
+        }
+    )
+
 @router.post("/whatsapp/send-audio")
 async def send_whatsapp_audio(request: WhatsAppRequest) -> Dict[str, Any]:
     """Envía audio por WhatsApp"""
     
     try:
-        result = whatsapp_service.send_audio(
+        result = await whatsapp_service.send_audio_async(
             to_phone=request.to_phone,
             audio_path=request.audio_path
         )
@@ -81,7 +114,7 @@ async def send_whatsapp_text(
     """Envía mensaje de texto por WhatsApp"""
     
     try:
-        result = whatsapp_service.send_text(
+        result = await whatsapp_service.send_text_async(
             to_phone=to_phone,
             message=message
         )
@@ -90,3 +123,53 @@ async def send_whatsapp_text(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error enviando WhatsApp: {str(e)}")
+
+@router.post("/whatsapp/queue/text", response_model=OutboundMessageStatus)
+async def queue_whatsapp_text(
+    to_phone: str = Query(..., description="Número en formato E.164 (ej: +5491112345678)"),
+    message: str = Query(..., description="Mensaje de texto")
+) -> OutboundMessageStatus:
+    """Encola un mensaje de texto para envío asíncrono con reintentos"""
+    
+    try:
+        message_id = outbound_queue.enqueue_text(to_phone=to_phone, message=message)
+        return outbound_queue.get_message(message_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error encolando WhatsApp: {str(e)}")
+
+@router.post("/whatsapp/broadcast", response_model=WhatsAppBroadcastResponse)
+async def broadcast_whatsapp(request: WhatsAppBroadcastRequest) -> WhatsAppBroadcastResponse:
+    """Encola un mensaje o audio para una lista de distribución"""
+    
+    try:
+        return outbound_queue.broadcast(
+            recipients=request.recipients,
+            message=request.message,
+            audio_path=request.audio_path
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error encolando WhatsApp: {str(e)}")
+
+@router.get("/whatsapp/messages/{message_id}", response_model=OutboundMessageStatus)
+async def get_whatsapp_message_status(message_id: str) -> OutboundMessageStatus:
+    """Obtiene el estado de un mensaje encolado"""
+    
+    message = outbound_queue.get_message(message_id)
+    if not message:
+        raise HTTPException(status_code=404, detail=f"Mensaje no encontrado: {message_id}")
+    return message
+
+@router.get("/whatsapp/batches/{batch_id}", response_model=WhatsAppBatchStatus)
+async def get_whatsapp_batch_status(batch_id: str) -> WhatsAppBatchStatus:
+    """Obtiene el estado agregado de un envío masivo"""
+    
+    batch = outbound_queue.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail=f"Envío masivo no encontrado: {batch_id}")
+    return batch
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 from pathlib import Path
 
+from app.core.http_cache import conditional
 from app.models.schemas import SettingsRequest, SettingsResponse
 from app.services.data_loader import data_loader
 
@@ -12,9 +13,19 @@ router = APIRouter()
 SETTINGS_FILE = Path("settings.json")
 
 @router.get("/settings", response_model=SettingsResponse)
-async def get_settings() -> SettingsResponse:
+async def get_settings(request: Request, response: Response) -> SettingsResponse:
     """Obtiene configuración actual"""
     
+    # El contenido depende solo de settings.json
+    stat = SETTINGS_FILE.stat() if SETTINGS_FILE.exists() else None
+    not_modified = conditional(
+        request, response,
+        (stat.st_mtime_ns, stat.st_size) if stat else None,
+        last_modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc) if stat else None
+    )
+    if not_modified:
+        return not_modified
+    
     # Leer desde archivo si existe
     if SETTINGS_FILE.exists():
         with open(SETTINGS_FILE, 'r') as f:
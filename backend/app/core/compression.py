@@ -0,0 +1,190 @@
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin el paquete `brotli` se usa solo gzip
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Formatos ya comprimidos: recomprimirlos gasta CPU sin achicar el cuerpo
+INCOMPRESSIBLE_PREFIXES = ("audio/", "video/", "image/")
+INCOMPRESSIBLE_TYPES = ("application/pdf", "application/zip", "application/gzip")
+COMPRESSIBLE_EXCEPTIONS = ("image/svg+xml",)
+
+def _accepts(header: str, coding: str) -> bool:
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip() == coding:
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+    return False
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type in COMPRESSIBLE_EXCEPTIONS:
+        return True
+    return not (media_type.startswith(INCOMPRESSIBLE_PREFIXES) or media_type in INCOMPRESSIBLE_TYPES)
+
+def coded_etag(etag: str, coding: str) -> str:
+    """ETag de la representación comprimida: `"abc"` → `"abc-gzip"` (conserva W/)"""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{coding}"'
+    return etag
+
+def _strip_coding(etag: str, coding: Optional[str]) -> str:
+    suffix = f'-{coding}"'
+    if coding and etag.endswith(suffix):
+        return etag[:-len(suffix)] + '"'
+    return etag
+
+class _GzipCompressor:
+    """Misma interfaz que brotli.Compressor (process/flush/finish) sobre zlib en formato gzip"""
+
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data: bytes) -> bytes:
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._zlib.flush(zlib.Z_FINISH)
+
+class CompressionMiddleware:
+    """
+    Comprime respuestas grandes con brotli (si está instalado y el
+    cliente lo acepta) o gzip
+
+    Las respuestas menores a `minimum_size`, las que ya traen
+    Content-Encoding y los formatos ya comprimidos (audio, imágenes,
+    PDF) pasan sin tocar. Las comprimidas llevan un ETag propio por
+    codificación (`"…-gzip"`, `"…-br"`); el If-None-Match del cliente se
+    traduce al ETag sin codificación para que los endpoints respondan 304.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        accept_encoding = headers.get("Accept-Encoding", "")
+        if brotli is not None and _accepts(accept_encoding, "br"):
+            coding = "br"
+        elif _accepts(accept_encoding, "gzip"):
+            coding = "gzip"
+        else:
+            coding = None
+
+        if_none_match = headers.get("If-None-Match")
+        candidates: List[str] = []
+        if if_none_match and coding:
+            candidates = [c.strip() for c in if_none_match.split(',')]
+            stripped = ", ".join(_strip_coding(c, coding) for c in candidates)
+            raw = [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]
+            raw.append((b"if-none-match", stripped.encode("latin-1")))
+            scope = {**scope, "headers": raw}
+
+        responder = CompressionResponder(self.app, self.minimum_size, coding, candidates)
+        await responder(scope, receive, send)
+
+class CompressionResponder:
+    """
+    Comprime el cuerpo de una respuesta con la codificación elegida
+
+    Retiene el inicio de la respuesta hasta ver el primer bloque del cuerpo
+    para decidir si comprime (tamaño, tipo y Content-Encoding).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, coding: Optional[str], candidates: List[str]):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.coding = coding
+        self.candidates = candidates
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _new_compressor(self):
+        if self.coding == "br":
+            return brotli.Compressor(quality=BROTLI_QUALITY)
+        return _GzipCompressor(GZIP_LEVEL)
+
+    def _not_modified_etag(self, headers: MutableHeaders) -> None:
+        """En un 304 devuelve el ETag con la codificación que envió el cliente"""
+        etag = headers.get("ETag")
+        if etag is None:
+            return
+        base = etag[2:] if etag.startswith("W/") else etag
+        for candidate in self.candidates:
+            value = candidate[2:] if candidate.startswith("W/") else candidate
+            if value != base and _strip_coding(value, self.coding) == base:
+                headers["ETag"] = etag[:-len(base)] + value
+                return
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Se retiene hasta saber si el cuerpo se comprime
+            self.initial_message = message
+            headers = MutableHeaders(raw=message["headers"])
+            if message["status"] == 304:
+                self._not_modified_etag(headers)
+            compressible = _compressible(headers.get("Content-Type", ""))
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            self.passthrough = (
+                self.coding is None or not compressible or "content-encoding" in headers
+            )
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.passthrough or (len(body) < self.minimum_size and not more_body):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.compressor = self._new_compressor()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.coding
+            if "etag" in headers:
+                headers["ETag"] = coded_etag(headers["ETag"], self.coding)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                compressed = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.initial_message)
+                await self.send({**message, "body": compressed})
+                return
+            await self.send(self.initial_message)
+        elif self.passthrough:
+            await self.send(message)
+            return
+
+        chunk = self.compressor.process(body)
+        chunk += self.compressor.finish() if not more_body else self.compressor.flush()
+        await self.send({**message, "body": chunk})
@@ -11,10 +11,24 @@ class Settings(BaseSettings):
     # Data
     data_folder: str = "./data/input"
     
+    # Clientes HTTP de proveedores externos (pool compartido keep-alive)
+    provider_http_timeout_seconds: float = 30.0
+    provider_http_connect_timeout_seconds: float = 5.0
+    provider_http_max_connections: int = 20
+    provider_http_max_keepalive: int = 10
+    provider_http_keepalive_expiry_seconds: float = 30.0
+    
     # OpenAI TTS
     openai_api_key: Optional[str] = None
+    openai_base_url: Optional[str] = None  # Servidor sustituto local para pruebas
     openai_tts_model: str = "tts-1"
     openai_tts_voice: str = "alloy"
+    tts_cache_enabled: bool = True
+    tts_cache_max_mb: int = 200
+    tts_stub_client: bool = False  # Cliente TTS local sin red (pruebas offline)
+    tts_stub_latency_ms: int = 0
+    tts_stream_chunk_chars: int = 300
+    tts_stream_max_workers: int = 4
     
     # ElevenLabs TTS (alternativa)
     elevenlabs_api_key: Optional[str] = None
@@ -24,6 +38,20 @@ class Settings(BaseSettings):
     twilio_account_sid: Optional[str] = None
     twilio_auth_token: Optional[str] = None
     twilio_whatsapp_from: Optional[str] = None
+    twilio_base_url: Optional[str] = None  # Servidor sustituto local para pruebas
+    
+    # Cola de mensajes salientes de WhatsApp
+    whatsapp_queue_db: str = "./data/output/whatsapp_queue.db"
+    whatsapp_queue_provider: str = "twilio"  # "twilio" o "fake" (pruebas de carga)
+    whatsapp_queue_workers: int = 4
+    whatsapp_queue_batch_size: int = 10
+    whatsapp_queue_max_attempts: int = 5
+    whatsapp_queue_backoff_seconds: float = 2.0
+    whatsapp_queue_lease_seconds: float = 300.0  # "sending" sin resultado tras esto se reintenta
+    whatsapp_rate_per_second: float = 1.0
+    whatsapp_rate_burst: int = 5
+    whatsapp_fake_latency_ms: int = 50
+    whatsapp_fake_failure_rate: float = 0.0
     
     # WhatsApp Cloud API (alternativa)
     meta_access_token: Optional[str] = None
@@ -34,6 +62,47 @@ class Settings(BaseSettings):
     co2_factor_kg_per_kwh: float = 0.5
     timezone: str = "America/Argentina/Buenos_Aires"
     
+    # Detección de anomalías sobre las series diarias de KPIs (Umbrales)
+    anomaly_window_days: int = 14
+    anomaly_min_history_days: int = 7
+    anomaly_zscore_threshold: float = 3.0
+    anomaly_ewma_alpha: float = 0.3
+    anomaly_ewma_threshold: float = 3.0
+    anomaly_cusum_k: float = 0.5
+    anomaly_cusum_h: float = 4.0
+    # Serie en tiempo real: ventana y mínimo de historia en puntos de 5 minutos
+    anomaly_realtime_window_points: int = 48
+    anomaly_realtime_min_history_points: int = 12
+    
+    # Pronóstico (ajuste sobre los últimos N días) y CAPEX para ROI/payback
+    forecast_fit_days: int = 120
+    capex_usd_per_wp: float = 0.8
+    
+    # Cache HTTP de endpoints de lectura (ETag siempre; max-age 0 = revalidar en cada request)
+    http_cache_max_age: int = 0
+    
+    # Compresión gzip/brotli de respuestas desde este tamaño en bytes (0 = desactivada)
+    compression_minimum_size: int = 1024
+    
+    # Base SQLite con la copia persistente de los datos de entrada ("" = solo en memoria)
+    dataset_db: str = ""
+    
+    # Carpeta del dataset memory-mapped compartido entre workers de uvicorn ("" = cada worker carga el suyo)
+    shared_dataset_dir: str = ""
+    
+    # Profiling de requests: fracción muestreada (0 = desactivado salvo header X-Profile)
+    profile_sample_rate: float = 0.0
+    # Perfilar los requests con header X-Profile (solo en entornos de desarrollo)
+    profile_allow_header: bool = False
+    profile_mode: str = "cprofile"  # "cprofile" (top-N funciones) o "sample" (stacks para flame graph)
+    profile_max_entries: int = 50
+    profile_top_n: int = 30
+    profile_sample_interval_ms: float = 5.0
+    
+    # Servicios pesados (PDF, TTS, WhatsApp) se cargan al primer uso.
+    # "all" o lista separada por comas para precargarlos al iniciar.
+    warmup_services: str = ""
+    
     # Simulación
     simulation_interval_minutes: int = 5
     debug: bool = True
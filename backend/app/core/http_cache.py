@@ -0,0 +1,67 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+def make_etag(request: Request, *parts: Any) -> str:
+    """ETag a partir de la ruta, los query params y las partes que determinan el contenido"""
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(repr((request.url.path, query, parts)).encode('utf-8')).hexdigest()
+    return f'"{digest[:20]}"'
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [c.strip() for c in header.split(',')]
+    # Comparación débil (RFC 9110 §13.1.2): se ignora el prefijo W/
+    return '*' in candidates or etag in [c[2:] if c.startswith('W/') else c for c in candidates]
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+def conditional(
+    request: Request,
+    response: Response,
+    *parts: Any,
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Validadores HTTP para respuestas GET
+
+    Agrega ETag, Last-Modified y Cache-Control a `response`. Si el cliente
+    ya tiene esa versión (If-None-Match, o If-Modified-Since cuando no
+    envía ETag) devuelve una respuesta 304 sin cuerpo para retornar
+    directamente desde el endpoint; si no, None.
+    """
+    etag = make_etag(request, *parts)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': (
+            f"max-age={settings.http_cache_max_age}, must-revalidate"
+            if settings.http_cache_max_age > 0 else "no-cache"
+        ),
+    }
+    if last_modified is not None:
+        last_modified = last_modified.astimezone(timezone.utc)
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif last_modified is not None and request.headers.get('if-modified-since'):
+        fresh = _not_modified_since(request.headers['if-modified-since'], last_modified)
+    else:
+        fresh = False
+
+    record_cache("http_conditional", hits=int(fresh), misses=int(not fresh))
+    return Response(status_code=304, headers=headers) if fresh else None
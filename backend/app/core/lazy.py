@@ -0,0 +1,53 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyService:
+    """
+    Proxy de una instancia global de servicio que se importa al primer uso
+
+    `LazyService("app.services.pdf_generator", "pdf_generator")` no importa
+    el módulo (ni sus dependencias pesadas) hasta que se accede a un atributo.
+    """
+
+    def __init__(self, module_path: str, attribute: str):
+        self._module_path = module_path
+        self._attribute = attribute
+        self._instance: Optional[Any] = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def module_imported(self) -> bool:
+        """True si el módulo ya fue importado (directa o indirectamente)"""
+        return self._module_path in sys.modules
+
+    def resolve(self) -> Any:
+        """Importa el módulo e inicializa la instancia si todavía no se hizo"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._module_path)
+                    self._instance = getattr(module, self._attribute)
+                    self.load_seconds = time.perf_counter() - start
+                    logger.info(
+                        f"Servicio {self._attribute} inicializado en {self.load_seconds * 1000:.0f} ms"
+                    )
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        state = "cargado" if self.loaded else "sin cargar"
+        return f"<LazyService {self._module_path}.{self._attribute} ({state})>"
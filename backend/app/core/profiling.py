@@ -0,0 +1,243 @@
+import cProfile
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+MODES = ("cprofile", "sample")
+PROFILE_HEADER = b"x-profile"
+# Las consultas de perfiles no se perfilan a sí mismas
+EXCLUDED_PREFIX = "/api/admin/profiles"
+
+def _function_label(filename: str, lineno: int, name: str) -> str:
+    if filename == "~":  # builtins de C
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+def _cprofile_top(profile: cProfile.Profile, top_n: int) -> List[Dict[str, Any]]:
+    """Top-N funciones por tiempo acumulado"""
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+    return [
+        {
+            "function": _function_label(*func),
+            "ncalls": nc,
+            "tottime_ms": round(tt * 1000, 3),
+            "cumtime_ms": round(ct * 1000, 3),
+        }
+        for func, (cc, nc, tt, ct, callers) in rows
+    ]
+
+class _StackSampler(threading.Thread):
+    """
+    Muestreo estadístico del stack de un thread
+
+    Cada `interval` segundos lee el frame actual del thread objetivo con
+    `sys._current_frames()` y cuenta el stack colapsado (raíz;...;hoja),
+    el formato que consumen flamegraph.pl y speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_function_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+class RequestProfiler:
+    """
+    Perfiles de requests individuales con almacenamiento acotado
+
+    Guarda los últimos `max_entries` perfiles. Se perfila un request a la
+    vez: los handlers corren en el event loop, así que mientras uno está
+    perfilado las corrutinas de otros requests también aparecerían en el
+    perfil; los requests que llegan en ese momento no se perfilan.
+    """
+
+    def __init__(self, max_entries: int = 50, top_n: int = 30, sample_interval_ms: float = 5.0):
+        self.top_n = top_n
+        self.sample_interval = sample_interval_ms / 1000.0
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self._ids = itertools.count(1)
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        return self._busy.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._busy.release()
+
+    def store(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            entry = {"id": next(self._ids), **entry}
+            self._entries.append(entry)
+        return entry
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Resumen de los perfiles guardados (más reciente primero)"""
+        with self._lock:
+            entries = list(self._entries)
+        return [
+            {k: v for k, v in entry.items() if k not in ("functions", "stacks")}
+            for entry in reversed(entries)
+        ]
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((e for e in self._entries if e["id"] == profile_id), None)
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        return count
+
+    def collapsed(self, entry: Dict[str, Any]) -> str:
+        """Stacks colapsados ("raíz;...;hoja conteo"), entrada de flamegraph.pl/speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in entry.get("stacks", {}).items())
+
+class ProfilingMiddleware:
+    """
+    Perfila una fracción muestreada de requests o, con `allow_header`, los
+    que envían el header `X-Profile` (`1`/`cprofile` o `sample`)
+
+    `cprofile` guarda el top-N de funciones por tiempo acumulado;
+    `sample` guarda además los stacks colapsados para un flame graph.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: RequestProfiler,
+        sample_rate: float = 0.0,
+        mode: str = "cprofile",
+        allow_header: bool = False
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Modo de profiling inválido: {mode}. Usar: {', '.join(MODES)}")
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.allow_header = allow_header
+
+    def _trigger(self, scope: Scope) -> Optional[tuple]:
+        """(modo, motivo) si el request debe perfilarse"""
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PREFIX):
+            return None
+        if self.allow_header:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    value = value.decode("latin-1").strip().lower()
+                    if value in ("sample", "cprofile"):
+                        return value, "header"
+                    if value in ("1", "true", "yes"):
+                        return self.mode, "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.mode, "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope)
+        if trigger is None or not self.profiler.try_acquire():
+            await self.app(scope, receive, send)
+            return
+
+        mode, reason = trigger
+        status = {"code": 500}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profile = cProfile.Profile() if mode == "cprofile" else None
+        sampler = None
+        if mode == "sample":
+            sampler = _StackSampler(threading.get_ident(), self.profiler.sample_interval)
+            sampler.start()
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            if profile is not None:
+                profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                if sampler is not None:
+                    sampler.stop()
+        finally:
+            self.profiler.release()
+
+        entry: Dict[str, Any] = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "route": getattr(scope.get("route"), "path", None),
+            "status": status["code"],
+            "mode": mode,
+            "trigger": reason,
+            "started_at": started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        if profile is not None:
+            entry["functions"] = _cprofile_top(profile, self.profiler.top_n)
+        else:
+            entry.update(self._sample_summary(sampler))
+        self.profiler.store(entry)
+
+    def _sample_summary(self, sampler: _StackSampler) -> Dict[str, Any]:
+        # Funciones por muestras propias (hoja del stack) y totales (en cualquier nivel)
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in sampler.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for function in set(frames):
+                total[function] += count
+        samples = sum(sampler.stacks.values())
+        return {
+            "samples": samples,
+            "interval_ms": round(sampler.interval * 1000, 3),
+            "functions": [
+                {"function": function, "total_samples": count, "own_samples": own.get(function, 0)}
+                for function, count in total.most_common(self.profiler.top_n)
+            ],
+            # Acotado como el top-N: los stacks más frecuentes
+            "stacks": dict(sampler.stacks.most_common(self.profiler.top_n * 10)),
+        }
+
+# Instancia global
+request_profiler = RequestProfiler(
+    max_entries=settings.profile_max_entries,
+    top_n=settings.profile_top_n,
+    sample_interval_ms=settings.profile_sample_interval_ms
+)
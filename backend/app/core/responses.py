@@ -0,0 +1,94 @@
+import json
+import struct
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+# Formatos columnares de series (opt-in por header Accept)
+COLUMNAR_JSON = "application/vnd.solar.columnar+json"
+COLUMNAR_BINARY = "application/vnd.solar.columnar"
+COLUMNAR_MAGIC = b"SOLC"
+
+@lru_cache(maxsize=64)
+def adapter(type_: Any) -> TypeAdapter:
+    """TypeAdapter cacheado por tipo (armarlo cuesta más que serializar listas chicas)"""
+    return TypeAdapter(type_)
+
+def fast_json(
+    content: Any,
+    type_: Any,
+    response: Optional[Response] = None,
+    status_code: int = 200
+) -> Response:
+    """
+    Serializa datos ya validados directo a JSON con pydantic-core
+
+    FastAPI vuelve a validar contra `response_model` todo lo que retorna
+    un endpoint y después lo pasa por `jsonable_encoder` + `json.dumps`.
+    Para listas grandes de modelos que ya se validaron al cargarse (o se
+    construyeron internamente), retornar esta Response evita ese camino.
+    El `response_model` del endpoint se mantiene para la documentación.
+
+    Args:
+        content: modelos (o lista de modelos) a serializar
+        type_: tipo de `content`, p.ej. List[Ticket]
+        response: Response inyectada al endpoint, para conservar sus headers
+    """
+    headers = dict(response.headers) if response is not None else None
+    return Response(
+        content=adapter(type_).dump_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+def negotiate_series(request: Request) -> str:
+    """Formato pedido en Accept: 'binary', 'columnar' o 'json' (filas, por defecto)"""
+    accept = [part.split(';')[0].strip() for part in request.headers.get('accept', '').split(',')]
+    if COLUMNAR_BINARY in accept:
+        return 'binary'
+    if COLUMNAR_JSON in accept:
+        return 'columnar'
+    return 'json'
+
+def columnar_response(
+    fmt: str,
+    ts: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    meta: Optional[Dict[str, Any]] = None
+) -> Response:
+    """
+    Serie en arrays paralelos con timestamps en milisegundos epoch (UTC)
+
+    - 'columnar': JSON {"timestamp_ms": [...], "<columna>": [...], ...meta}
+    - 'binary': magic "SOLC", uint32 largo del header, header JSON
+      ({"n", "columns", ...meta}) con padding a 8 bytes, int64
+      timestamp_ms[n] y luego cada columna como float32[n], todo
+      little-endian. Se decodifica con DataView/Float32Array sin parsear.
+    """
+    timestamp_ms = np.asarray(ts, dtype=np.int64) * 1000
+    meta = meta or {}
+    headers = {'Vary': 'Accept'}
+
+    if fmt == 'binary':
+        header = json.dumps({'n': len(timestamp_ms), 'columns': list(columns), **meta}).encode('utf-8')
+        header += b" " * (-(len(COLUMNAR_MAGIC) + 4 + len(header)) % 8)
+        body = b"".join([
+            COLUMNAR_MAGIC,
+            struct.pack('<I', len(header)),
+            header,
+            timestamp_ms.astype('<i8').tobytes(),
+            *(np.asarray(v).astype('<f4').tobytes() for v in columns.values()),
+        ])
+        return Response(content=body, headers=headers, media_type=COLUMNAR_BINARY)
+
+    content = {**meta, 'timestamp_ms': timestamp_ms, **columns}
+    return Response(
+        content=to_json({k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in content.items()}),
+        headers=headers,
+        media_type=COLUMNAR_JSON
+    )
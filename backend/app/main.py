@@ -2,9 +2,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import json
+import threading
+from pathlib import Path
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.api import health, settings as settings_api, data, reports
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware, request_profiler
+from app.services.shared_dataset import SharedDatasetMiddleware
+from app.api import health, settings as settings_api, data, reports, metrics, profiling
 
 # Configurar logging
 logging.basicConfig(
@@ -40,11 +46,35 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Perfiles de requests: fracción muestreada o header X-Profile si está habilitado
+if settings.profile_sample_rate > 0 or settings.profile_allow_header:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=request_profiler,
+        sample_rate=settings.profile_sample_rate,
+        mode=settings.profile_mode,
+        allow_header=settings.profile_allow_header
+    )
+
+# Comprimir respuestas grandes (series, tickets, reportes)
+if settings.compression_minimum_size > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
+# Workers de uvicorn: adjuntar el dataset que publicó otro worker (recarga o append)
+if settings.shared_dataset_dir:
+    from app.services.data_loader import data_loader
+    app.add_middleware(SharedDatasetMiddleware, sync=data_loader.sync_shared)
+
+# Latencia por ruta para /api/metrics (último agregado = más externo: incluye compresión)
+app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(health.router, prefix="/api", tags=["Health"])
 app.include_router(settings_api.router, prefix="/api", tags=["Settings"])
 app.include_router(data.router, prefix="/api", tags=["Data"])
 app.include_router(reports.router, prefix="/api", tags=["Reports"])
+app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
+app.include_router(profiling.router, prefix="/api", tags=["Admin"])
 
 @app.on_event("startup")
 async def startup_event():
@@ -59,7 +89,6 @@ async def startup_event():
     
     # Autoconfigurar data folder al inicio
     from app.services.data_loader import data_loader
-    from pathlib import Path
     
     # Intentar cargar configuración guardada
     settings_file = Path("settings.json")
@@ -79,7 +108,7 @@ async def startup_event():
     # Configurar y cargar datos automáticamente
     try:
         data_loader.set_data_folder(data_folder)
-        result = data_loader.reload_data()
+        result = data_loader.attach_or_reload()
         
         if result.get('success'):
             logger.info(f"✅ Data folder autoconfigurado: {data_folder}")
@@ -90,11 +119,30 @@ async def startup_event():
         logger.warning(f"⚠️ No se pudieron cargar datos automáticamente: {e}")
         logger.warning(f"   Usar POST /api/settings para configurar manualmente")
     
+    # Reanudar envíos de WhatsApp que quedaron pendientes
+    from app.services.lazy import outbound_queue, warmup
+    if Path(settings.whatsapp_queue_db).exists():
+        outbound_queue.resume_pending()
+    
+    # Precargar servicios pesados en segundo plano (opcional)
+    if settings.warmup_services:
+        names = None if settings.warmup_services == "all" else [
+            name.strip() for name in settings.warmup_services.split(',') if name.strip()
+        ]
+        threading.Thread(target=warmup, args=(names,), name="warmup", daemon=True).start()
+        logger.info(f"Warmup de servicios iniciado: {settings.warmup_services}")
+    
     logger.info("=" * 60)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento de cierre de la aplicación"""
+    from app.services.lazy import outbound_queue, provider_http
+    if outbound_queue.module_imported:
+        outbound_queue.stop()
+    if provider_http.module_imported:
+        provider_http.close()
+        await provider_http.aclose()
     logger.info("Solar PV Analytics API - Cerrando")
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime, date
 
 # ========== Planta ==========
@@ -46,7 +46,7 @@ class PlantaData(BaseModel):
 
 # ========== Performance ==========
 class HistoricoPerformance(BaseModel):
-    fecha: str
+    fecha: str  # YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS para registros sub-diarios
     planta_id: str
     energia_real_kwh: float
     energia_esperada_kwh: float
@@ -58,6 +58,36 @@ class HistoricoPerformance(BaseModel):
     perdida_otros_kwh: float
     ingresos_estimados_usd: float
     opex_estimado_usd: float
+    intervalo_minutos: int = Field(1440, ge=1, le=1440)
+    equipo_id: Optional[str] = None
+    
+    @field_validator('fecha')
+    @classmethod
+    def _fecha_iso(cls, value: str) -> str:
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError("fecha debe ser ISO 8601 (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS)")
+        return value
+
+class HistoricoSeriesPoint(BaseModel):
+    periodo: str  # Inicio del período (YYYY-MM-DD, o con hora si es sub-diario)
+    registros: int
+    energia_real_kwh: float
+    energia_esperada_kwh: float
+    irradiancia_poa_kwh_m2: float
+    curtailment_kwh: float
+    perdida_soiling_kwh: float
+    perdida_otros_kwh: float
+    ingresos_estimados_usd: float
+    opex_estimado_usd: float
+    pr_promedio: float
+    availability_promedio_pct: float
+
+class HistoricoAppendResponse(BaseModel):
+    added: int
+    replaced: int
+    total: int
 
 # ========== Tickets ==========
 class Ticket(BaseModel):
@@ -104,6 +134,127 @@ class KPIsEjecutivos(BaseModel):
     tickets_pendientes: int
     top_tickets: List[Ticket]
 
+# ========== Cascada de Pérdidas ==========
+class LossWaterfallStep(BaseModel):
+    concepto: str  # energia_esperada, curtailment, soiling, otros, no_explicada, energia_real
+    kwh: float
+    pct_esperada: float
+
+class LossWaterfallPeriod(BaseModel):
+    periodo: str  # Inicio del período (YYYY-MM-DD)
+    energia_esperada_kwh: float
+    curtailment_kwh: float
+    perdida_soiling_kwh: float
+    perdida_otros_kwh: float
+    no_explicada_kwh: float  # esperada - pérdidas - real (negativa si se superó lo esperado)
+    energia_real_kwh: float
+
+class LossWaterfallResponse(BaseModel):
+    desde: str
+    hasta: str
+    planta_id: Optional[str] = None
+    granularity: str
+    pasos: List[LossWaterfallStep]
+    periodos: List[LossWaterfallPeriod]
+
+# ========== Energía Esperada (modelo) ==========
+class ExpectedEnergyPeriod(BaseModel):
+    periodo: str  # Inicio del período (YYYY-MM-DD)
+    energia_real_kwh: float
+    energia_esperada_kwh: float  # Informada en el CSV
+    energia_modelo_kwh: float  # Irradiancia × potencia DC × PR × degradación × soiling
+    desviacion_modelo_pct: float  # real vs modelo
+
+class ExpectedEnergyResponse(BaseModel):
+    desde: str
+    hasta: str
+    planta_id: Optional[str] = None
+    granularity: str
+    target_pr: float
+    soiling_pct: float
+    factor_degradacion: float  # Al final del rango
+    energia_real_kwh: float
+    energia_esperada_kwh: float
+    energia_modelo_kwh: float
+    desviacion_modelo_pct: float
+    periodos: List[ExpectedEnergyPeriod]
+
+# ========== Pronóstico ==========
+class ForecastDay(BaseModel):
+    fecha: str
+    energia_kwh: float
+    ingresos_usd: float
+    margen_usd: float
+
+class ForecastPeriod(BaseModel):
+    periodo: str  # "YYYY-MM-DD/YYYY-MM-DD" o "YYYY-MM"
+    dias_reales: int
+    dias_pronosticados: int
+    energia_kwh: float
+    energia_kwh_p10: float
+    energia_kwh_p90: float
+    ingresos_usd: float
+    margen_usd: float
+
+class ForecastResponse(BaseModel):
+    planta_id: Optional[str] = None
+    datos_hasta: str  # Último día completo del histórico
+    dias_sin_datos: int = 0  # Entre datos_hasta y hoy
+    datos_desactualizados: bool = False  # Más de 30 días sin datos: el cierre de mes solo pronostica desde hoy
+    dias_ajuste: int
+    tendencia_anual_pct: float  # Del rendimiento normalizado por cielo despejado
+    proximos_dias: List[ForecastDay]
+    total_7_dias: ForecastPeriod
+    cierre_mes: ForecastPeriod
+    capex_estimado_usd: float
+    margen_anual_estimado_usd: float
+    roi_estimado_pct: Optional[float] = None
+    payback_years: Optional[float] = None
+
+# ========== Performance por Equipo ==========
+class EquipoPerformance(BaseModel):
+    equipo_id: str
+    tipo: str
+    capacidad_kw: float
+    estado_base: str
+    energia_kwh: float
+    energia_esperada_kwh: float
+    availability_pct: float
+    specific_yield_kwh_kwp: float
+    desviacion_vs_mediana_pct: float
+    dias_bajo_rendimiento: int
+    bajo_rendimiento: bool
+
+class EquiposPerformanceResponse(BaseModel):
+    range: str
+    planta_id: Optional[str] = None
+    dias: int
+    mediana_specific_yield_kwh_kwp: float
+    umbral_desviacion_pct: float
+    equipos: List[EquipoPerformance]  # De peor a mejor desviación
+
+# ========== Anomalías ==========
+class AlertEvent(BaseModel):
+    timestamp: str  # Inicio del episodio anómalo
+    planta_id: str
+    kpi: str
+    valor: float
+    linea_base: float
+    zscore: float
+    metodos: List[str]  # zscore, ewma, cusum
+    severidad: str  # "info", "amarillo", "rojo"
+    fuente: str = "historico"  # "historico" (días) o "tiempo_real" (puntos de 5 min)
+
+class ThresholdAlert(BaseModel):
+    planta_id: str
+    range: str
+    kpi: str
+    valor: float
+    valor_formateado: str
+    severidad: str  # "amarillo", "rojo"
+    umbral: float
+    descripcion: str
+
 # ========== Real-time Series ==========
 class RealtimeDataPoint(BaseModel):
     timestamp: datetime
@@ -112,6 +263,7 @@ class RealtimeDataPoint(BaseModel):
     irradiancia: float
     temp_modulo: float
     estado_inversores_pct: float
+    energia_esperada_kwh_intervalo: Optional[float] = None  # Modelo sobre la irradiancia del punto
 
 # ========== Settings ==========
 class SettingsRequest(BaseModel):
@@ -132,3 +284,32 @@ class TTSRequest(BaseModel):
 class WhatsAppRequest(BaseModel):
     to_phone: str
     audio_path: str
+
+class WhatsAppBroadcastRequest(BaseModel):
+    recipients: List[str]
+    message: Optional[str] = None
+    audio_path: Optional[str] = None
+
+class WhatsAppBroadcastResponse(BaseModel):
+    batch_id: str
+    queued: int
+    message_ids: List[str]
+
+class OutboundMessageStatus(BaseModel):
+    message_id: str
+    batch_id: Optional[str] = None
+    provider: str
+    to_phone: str
+    kind: str  # "text", "audio"
+    status: str  # "queued", "sending", "retrying", "sent", "failed"
+    attempts: int
+    last_error: Optional[str] = None
+    sid: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+class WhatsAppBatchStatus(BaseModel):
+    batch_id: str
+    total: int
+    status_counts: Dict[str, int]
+    messages: List[OutboundMessageStatus]
@@ -0,0 +1,454 @@
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.schemas import PlantaBase
+from app.services.data_loader import data_loader
+from app.services.realtime_simulator import STEP_SECONDS, realtime_simulator
+from app.services.rollups import FIELDS
+from app.services.thresholds import SEVERITIES
+from app.services.timeseries_store import rollup_vectors
+from app.services.timezones import plant_timezone
+
+# ---------- Estadísticos vectorizados ----------
+
+def ewma(values: np.ndarray, alpha: float, initial: Optional[float] = None) -> np.ndarray:
+    """
+    Media móvil exponencial y_t = (1-a)·y_{t-1} + a·x_t sin bucle por punto
+
+    Usa la forma cerrada y_t = (1-a)^t · (y_0 + a·Σ (1-a)^-i · x_i) por
+    bloques, para que (1-a)^-i no desborde.
+    """
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    prev = float(values[0]) if initial is None else float(initial)
+    if decay <= 0.0:
+        return values.astype(np.float64).copy()
+
+    block = int(np.clip(200.0 / -np.log10(decay), 1, 1024))
+    powers = decay ** np.arange(1, block + 1)
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        m = len(chunk)
+        scaled = np.cumsum(chunk / powers[:m])
+        out[start:start + m] = powers[:m] * (prev + alpha * scaled)
+        prev = out[start + m - 1]
+    return out
+
+def rolling_baseline(
+    history: np.ndarray,
+    values: np.ndarray,
+    window: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Media, desvío y cantidad de los `window` puntos previos a cada valor
+
+    `history` son los últimos puntos ya procesados (pueden ser menos que window).
+    """
+    combined = np.concatenate([history, values]).astype(np.float64)
+    # Centrar antes de acumular: evita perder precisión en la varianza con sumas grandes
+    shift = float(np.median(combined)) if len(combined) else 0.0
+    combined -= shift
+    offset = len(history)
+    csum = np.concatenate([[0.0], np.cumsum(combined)])
+    csq = np.concatenate([[0.0], np.cumsum(combined * combined)])
+
+    end = np.arange(offset, offset + len(values))
+    start = np.maximum(0, end - window)
+    count = (end - start).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (csum[end] - csum[start]) / count
+        var = (csq[end] - csq[start]) / count - mean * mean
+    return mean + shift, np.sqrt(np.maximum(var, 0.0)), count
+
+def cusum(increments: np.ndarray, initial: float = 0.0) -> np.ndarray:
+    """
+    CUSUM unilateral S_t = max(0, S_{t-1} + z_t) sin bucle por punto
+
+    Por la recursión de Lindley: S_t = C_t - min(-S_0, min_{j<=t} C_j),
+    con C_t la suma acumulada de los incrementos.
+    """
+    if len(increments) == 0:
+        return np.empty(0)
+    c = np.cumsum(increments)
+    return c - np.minimum(np.minimum.accumulate(c), -initial)
+
+# ---------- Estado incremental por serie ----------
+
+class SeriesDetector:
+    """
+    Detector incremental para una serie (planta, KPI)
+
+    Guarda la cola de historia para la línea base móvil y el último valor
+    de EWMA y CUSUM, de modo que cada lote nuevo se procesa solo con
+    operaciones vectorizadas sobre sus puntos.
+    """
+
+    def __init__(
+        self,
+        lower_is_worse: bool,
+        window: int,
+        min_history: int,
+        z_threshold: float,
+        ewma_alpha: float,
+        ewma_threshold: float,
+        cusum_k: float,
+        cusum_h: float
+    ):
+        self.sign = -1.0 if lower_is_worse else 1.0
+        self.window = window
+        self.min_history = min_history
+        self.z_threshold = z_threshold
+        self.ewma_alpha = ewma_alpha
+        self.ewma_threshold = ewma_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.history = np.empty(0)
+        self.ewma_last: Optional[float] = None
+        self.cusum_last = 0.0
+        self.flagged_last = False
+
+    def update(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Procesa un lote de valores (sin NaN)
+
+        Returns:
+            dict con 'flagged' (máscara), 'starts' (inicio de anomalía),
+            'zscore', 'baseline' y máscaras por método
+        """
+        mean, std, count = rolling_baseline(self.history, values, self.window)
+        # Piso del desvío: 1% de la media, para series casi constantes
+        sigma = np.maximum(std, 0.01 * np.abs(mean) + 1e-9)
+        ready = count >= self.min_history
+
+        residual = np.where(ready, (values - mean) / sigma, 0.0)
+        # Orientado para que positivo = peor
+        oriented = residual * self.sign
+
+        z_flag = ready & (oriented > self.z_threshold)
+
+        smoothed = ewma(residual, self.ewma_alpha, initial=self.ewma_last)
+        ewma_sigma = np.sqrt(self.ewma_alpha / (2.0 - self.ewma_alpha))
+        ewma_flag = ready & (smoothed * self.sign / ewma_sigma > self.ewma_threshold)
+
+        s = cusum(np.where(ready, oriented - self.cusum_k, 0.0), initial=self.cusum_last)
+        cusum_flag = ready & (s > self.cusum_h)
+
+        flagged = z_flag | ewma_flag | cusum_flag
+        previous = np.concatenate([[self.flagged_last], flagged[:-1]])
+        starts = flagged & ~previous
+
+        self.history = np.concatenate([self.history, values])[-self.window:]
+        if len(values):
+            self.ewma_last = float(smoothed[-1])
+            self.cusum_last = float(s[-1])
+            self.flagged_last = bool(flagged[-1])
+
+        return {
+            'flagged': flagged,
+            'starts': starts,
+            'zscore': residual,
+            'baseline': mean,
+            'zscore_flag': z_flag,
+            'ewma_flag': ewma_flag,
+            'cusum_flag': cusum_flag,
+        }
+
+def realtime_vectors(planta: PlantaBase, values: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Acumulables (n, ROLLUP_WIDTH) de los puntos del simulador en tiempo real
+
+    PR = potencia / (potencia DC · irradiancia); PR y disponibilidad
+    quedan sin peso cuando los inversores no producen (noche).
+    """
+    n = len(values['potencia_kw'])
+    producing = values['estado_inversores_pct'] > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pr = values['potencia_kw'] / (planta.potencia_dc_mwp * values['irradiancia'])
+    fields = {f: np.zeros(n) for f in FIELDS}
+    fields['energia_real_kwh'] = values['energia_kwh_intervalo']
+    fields['energia_esperada_kwh'] = values['energia_esperada_kwh_intervalo']
+    fields['irradiancia_poa_kwh_m2'] = values['irradiancia'] * STEP_SECONDS / 3600 / 1000
+    fields['pr_real'] = np.where(producing, pr, np.nan)
+    fields['availability_real_pct'] = np.where(producing, values['estado_inversores_pct'], np.nan)
+    return rollup_vectors(np.full(n, STEP_SECONDS), fields)
+
+# ---------- Servicio ----------
+
+SEVERITY_ORDER = {'info': 0, 'amarillo': 1, 'rojo': 2}
+SEVERITY_LABELS = ('info',) + SEVERITIES[1:]
+
+# KPIs que el simulador modela punto a punto (el resto no varía en tiempo real)
+REALTIME_KPIS = ('pr', 'availability', 'desviacion_energia')
+
+class AnomalyDetector:
+    """
+    Detección de anomalías en las series diarias de los KPIs de Umbrales
+
+    Procesa de forma incremental los días nuevos de cada planta (z-score
+    móvil, EWMA y CUSUM) y emite un evento con timestamp al inicio de cada
+    episodio anómalo, con severidad según los umbrales configurados. Si un
+    append modifica días ya evaluados, la serie de esa planta se recalcula
+    y sus eventos se reemplazan desde el primer día modificado.
+
+    La serie en tiempo real (puntos de 5 minutos del simulador) pasa por
+    los mismos métodos con estado propio: detectores por KPI, último punto
+    procesado y generación del buffer del simulador. Si el buffer se
+    regenera (recarga de datos), se descartan sus eventos y se reprocesa.
+    """
+
+    def __init__(self, max_events: int = 5000):
+        self.max_events = max_events
+        self.events: List[Dict[str, Any]] = []
+        self._detectors: Dict[Tuple[str, str], SeriesDetector] = {}
+        self._last_day: Dict[str, np.datetime64] = {}
+        # Cantidad de entradas de data_loader.historico_edits ya aplicadas
+        self._edits_seen = 0
+        self._loaded_at: Optional[datetime] = None
+        self._version = -1
+        # Serie en tiempo real
+        self.realtime_events: List[Dict[str, Any]] = []
+        self._rt_detectors: Dict[str, SeriesDetector] = {}
+        self._rt_last_ts: Optional[int] = None
+        self._rt_generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def process_new(self) -> int:
+        """
+        Procesa los días completos que aún no se evaluaron
+
+        Una recarga de datos reinicia el estado y reprocesa todo el histórico;
+        un append sobre días ya evaluados reprocesa la planta desde ese día.
+
+        Returns:
+            cantidad de eventos nuevos
+        """
+        if not data_loader.planta_data:
+            return 0
+
+        with self._lock:
+            if data_loader.version == self._version:
+                return 0
+            if data_loader.last_reload != self._loaded_at:
+                self.events = []
+                self._detectors = {}
+                self._last_day = {}
+                self._edits_seen = 0
+                self._loaded_at = data_loader.last_reload
+            rewind = self._rewind_edited()
+
+            rules = data_loader.threshold_rules
+            # Con datos sub-diarios el último día puede estar incompleto
+            resolution = data_loader.store.resolution_seconds or 86400
+            new_events = []
+
+            for planta_id in data_loader.rollups.plants():
+                keys, sums = data_loader.rollups.table("day", planta_id)
+                last = self._last_day.get(planta_id)
+                lo = int(np.searchsorted(keys, last, side='right')) if last is not None else 0
+                hi = len(keys) if resolution >= 86400 else max(lo, len(keys) - 1)
+                if hi <= lo:
+                    continue
+                days, batch = keys[lo:hi], sums[lo:hi]
+                self._last_day[planta_id] = days[-1]
+                # Al recalcular, los eventos previos al día modificado ya están guardados
+                emit_from = rewind.get(planta_id)
+
+                # Valores y severidad de todos los KPIs del lote en una pasada
+                evaluated = rules.evaluate(batch)
+
+                for k, kpi in enumerate(rules.kpis):
+                    values = evaluated['values'][k]
+                    valid = np.isfinite(values)
+                    if not valid.any():
+                        continue
+                    detector = self._detectors.get((planta_id, kpi))
+                    if detector is None:
+                        detector = self._detectors[(planta_id, kpi)] = _series_detector(
+                            rules.lower_is_worse(kpi),
+                            settings.anomaly_window_days,
+                            settings.anomaly_min_history_days
+                        )
+
+                    kpi_days, kpi_values = days[valid], values[valid]
+                    result = detector.update(kpi_values)
+                    severity = evaluated['severity'][k][valid]
+
+                    starts = result['starts']
+                    if emit_from is not None:
+                        starts = starts & (kpi_days >= emit_from)
+                    new_events.extend(_episode_events(
+                        result, starts, kpi_values, severity,
+                        lambda i: f"{kpi_days[i]}T00:00:00",
+                        planta_id=planta_id, kpi=rules.names[kpi], fuente='historico'
+                    ))
+
+            new_events.sort(key=lambda e: e['timestamp'])
+            events = self.events + new_events
+            if rewind:
+                # Los eventos recalculados pueden ser anteriores a los de otras plantas
+                events.sort(key=lambda e: e['timestamp'])
+            self.events = events[-self.max_events:]
+            self._version = data_loader.version
+            return len(new_events)
+
+    def process_realtime(self, now: Optional[int] = None) -> int:
+        """
+        Procesa los puntos nuevos de la serie en tiempo real
+
+        Args:
+            now: segundos epoch hasta donde avanzar el simulador (por defecto, ahora)
+
+        Returns:
+            cantidad de eventos nuevos
+        """
+        if not data_loader.planta_data:
+            return 0
+
+        with self._lock:
+            generation, ts, values = realtime_simulator.points_since(self._rt_last_ts, now)
+            if generation != self._rt_generation:
+                # Buffer regenerado: la serie ya evaluada no existe más
+                self.realtime_events = []
+                self._rt_detectors = {}
+                generation, ts, values = realtime_simulator.points_since(None, now)
+                self._rt_generation = generation
+            if not len(ts):
+                return 0
+            self._rt_last_ts = int(ts[-1])
+
+            planta = data_loader.planta_data.planta
+            tz = plant_timezone(planta)
+            rules = data_loader.threshold_rules
+            evaluated = rules.evaluate(realtime_vectors(planta, values))
+            new_events = []
+
+            for k, kpi in enumerate(rules.kpis):
+                if kpi not in REALTIME_KPIS:
+                    continue
+                kpi_values = evaluated['values'][k]
+                valid = np.isfinite(kpi_values)
+                if not valid.any():
+                    continue
+                detector = self._rt_detectors.get(kpi)
+                if detector is None:
+                    detector = self._rt_detectors[kpi] = _series_detector(
+                        rules.lower_is_worse(kpi),
+                        settings.anomaly_realtime_window_points,
+                        settings.anomaly_realtime_min_history_points
+                    )
+
+                kpi_ts = ts[valid]
+                result = detector.update(kpi_values[valid])
+                new_events.extend(_episode_events(
+                    result, result['starts'], kpi_values[valid], evaluated['severity'][k][valid],
+                    lambda i: datetime.fromtimestamp(int(kpi_ts[i]), tz).strftime('%Y-%m-%dT%H:%M:%S'),
+                    planta_id=planta.planta_id, kpi=rules.names[kpi], fuente='tiempo_real'
+                ))
+
+            new_events.sort(key=lambda e: e['timestamp'])
+            self.realtime_events = (self.realtime_events + new_events)[-self.max_events:]
+            return len(new_events)
+
+    def _rewind_edited(self) -> Dict[str, np.datetime64]:
+        """
+        Plantas con días ya evaluados modificados por appends, y el primer día
+
+        Descarta sus detectores y los eventos desde ese día para que el
+        lote siguiente recalcule la serie completa de la planta.
+        """
+        edits = data_loader.historico_edits[self._edits_seen:]
+        self._edits_seen = len(data_loader.historico_edits)
+        rewind: Dict[str, np.datetime64] = {}
+        for planta_id, fecha in edits:
+            day = np.datetime64(fecha, 'D')
+            last = self._last_day.get(planta_id)
+            if last is not None and day <= last:
+                rewind[planta_id] = min(day, rewind.get(planta_id, day))
+
+        for planta_id, day in rewind.items():
+            self._last_day.pop(planta_id, None)
+            for key in [k for k in self._detectors if k[0] == planta_id]:
+                del self._detectors[key]
+            since = f"{day}T00:00:00"
+            self.events = [
+                e for e in self.events
+                if e['planta_id'] != planta_id or e['timestamp'] < since
+            ]
+        return rewind
+
+    def get_events(
+        self,
+        planta_id: Optional[str] = None,
+        kpi: Optional[str] = None,
+        since: Optional[str] = None,
+        min_severity: str = "info",
+        limit: Optional[int] = None,
+        fuente: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Eventos (más recientes primero) filtrados"""
+        if min_severity not in SEVERITY_ORDER:
+            raise ValueError(f"Severidad inválida: {min_severity}. Usar: {', '.join(SEVERITY_ORDER)}")
+        if fuente not in (None, 'historico', 'tiempo_real'):
+            raise ValueError(f"Fuente inválida: {fuente}. Usar: historico, tiempo_real")
+        merged = []
+        if fuente != 'tiempo_real':
+            self.process_new()
+            merged += self.events
+        if fuente != 'historico':
+            self.process_realtime()
+            merged += self.realtime_events
+
+        threshold = SEVERITY_ORDER[min_severity]
+        merged.sort(key=lambda e: e['timestamp'])
+        events = [
+            e for e in reversed(merged)
+            if (planta_id is None or e['planta_id'] == planta_id)
+            and (kpi is None or e['kpi'].lower() == kpi.lower())
+            and (since is None or e['timestamp'] >= since)
+            and SEVERITY_ORDER[e['severidad']] >= threshold
+        ]
+        return events[:limit] if limit else events
+
+def _series_detector(lower_is_worse: bool, window: int, min_history: int) -> SeriesDetector:
+    return SeriesDetector(
+        lower_is_worse=lower_is_worse,
+        window=window,
+        min_history=min_history,
+        z_threshold=settings.anomaly_zscore_threshold,
+        ewma_alpha=settings.anomaly_ewma_alpha,
+        ewma_threshold=settings.anomaly_ewma_threshold,
+        cusum_k=settings.anomaly_cusum_k,
+        cusum_h=settings.anomaly_cusum_h
+    )
+
+def _episode_events(
+    result: Dict[str, np.ndarray],
+    starts: np.ndarray,
+    values: np.ndarray,
+    severity: np.ndarray,
+    timestamp: Callable[[int], str],
+    **fields: str
+) -> List[Dict[str, Any]]:
+    """Un evento por inicio de episodio anómalo, con los métodos que lo marcaron"""
+    events = []
+    for i in np.flatnonzero(starts).tolist():
+        events.append({
+            'timestamp': timestamp(i),
+            **fields,
+            'valor': round(float(values[i]), 4),
+            'linea_base': round(float(result['baseline'][i]), 4),
+            'zscore': round(float(result['zscore'][i]), 2),
+            'metodos': [name for name in ('zscore', 'ewma', 'cusum') if result[f'{name}_flag'][i]],
+            'severidad': SEVERITY_LABELS[int(severity[i])],
+        })
+    return events
+
+# Instancia global
+anomaly_detector = AnomalyDetector()
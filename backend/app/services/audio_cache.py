@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AudioCache:
+    """Caché de audio direccionado por contenido (hash de proveedor + texto + modelo + voz)"""
+
+    def __init__(self, folder: Path, max_bytes: int, extension: str = ".mp3"):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, model: str, voice: str, provider: str = "openai") -> str:
+        """
+        Clave estable para un mismo texto sintetizado con el mismo proveedor, modelo y voz
+
+        El proveedor separa el audio del cliente stub (silencio) del real, así
+        que al configurar OPENAI_API_KEY no se sirve silencio cacheado.
+        """
+        digest = hashlib.sha256()
+        for part in (provider, model, voice, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.folder / f"{key}{self.extension}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Devuelve el archivo cacheado (y lo marca como usado) o None"""
+        path = self.path_for(key)
+        with self._lock:
+            if path.exists() and path.stat().st_size > 0:
+                # Actualizar mtime para que la evicción sea LRU
+                os.utime(path, None)
+                self.hits += 1
+                return path
+            self.misses += 1
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        """Guarda bytes de audio en la caché de forma atómica"""
+        path = self.path_for(key)
+        tmp_path = path.with_suffix(f"{self.extension}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        return self._commit(tmp_path, path)
+
+    def put_file(self, key: str, writer) -> Path:
+        """Guarda en la caché el archivo producido por `writer(ruta_temporal)`"""
+        path = self.path_for(key)
+        tmp_path = path.with_suffix(f"{self.extension}.{threading.get_ident()}.tmp")
+        try:
+            writer(str(tmp_path))
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return self._commit(tmp_path, path)
+
+    def _commit(self, tmp_path: Path, path: Path) -> Path:
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Elimina los archivos menos usados hasta quedar bajo el límite de tamaño"""
+        entries = []
+        total = 0
+        for entry in self.folder.glob(f"*{self.extension}"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort(key=lambda e: e[0])
+        # Nunca eliminar el archivo más reciente (el que se acaba de escribir)
+        for _, size, entry in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"Audio eliminado de caché: {entry.name}")
+
+    def stats(self) -> dict:
+        files = list(self.folder.glob(f"*{self.extension}"))
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "files": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,255 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.schemas import HistoricoPerformance, Ticket
+from app.services.dataset_db import PENDING_STATES
+from app.services.rollups import FIELDS
+
+CRITICAL_LEVELS = ('alta', 'crítica', 'critica')
+
+# ---------- Codificación de strings en arrays planos (aptos para np.save/mmap) ----------
+
+def encode_categories(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Códigos int32 (-1 = None) y categorías ordenadas, para columnas de pocos valores distintos"""
+    strings = np.array(["" if v is None else str(v) for v in values], dtype=str)
+    categories, codes = np.unique(strings, return_inverse=True)
+    codes = codes.astype(np.int32)
+    missing = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    codes[missing] = -1
+    return codes, categories
+
+def encode_text(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Bytes UTF-8 concatenados y offsets (n + 1), para texto libre sin padding"""
+    encoded = [str(v).encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _category_mask(codes: np.ndarray, categories: np.ndarray, wanted: Sequence[str]) -> np.ndarray:
+    """Filas cuya categoría (sin distinguir mayúsculas) está en `wanted`"""
+    hits = np.flatnonzero(np.isin(np.char.lower(categories.astype(str)), list(wanted)))
+    return np.isin(codes, hits)
+
+# ---------- Tickets ----------
+
+class TicketTable:
+    """
+    Tickets en columnas numpy
+
+    Los campos categóricos (estado, tipo, planta, ...) se guardan como
+    códigos + categorías y el texto libre como bytes UTF-8 + offsets, así
+    que las columnas se pueden publicar en .npy y adjuntar memory-mapped.
+    Los filtros y el orden se resuelven sobre las columnas; solo las filas
+    devueltas se convierten en `Ticket`.
+    """
+
+    TEXT_FIELDS = ('ticket_id', 'descripcion')
+    NUMERIC_FIELDS = {
+        'costo_estimado_usd': np.float64,
+        'impacto_estimado_kwh': np.float64,
+        'sla_objetivo_horas': np.int64,
+    }
+    CATEGORY_FIELDS = (
+        'planta_id', 'fecha_creacion', 'estado', 'tipo', 'criticidad', 'equipo_id',
+        'responsable', 'fecha_estimada_resolucion',
+    )
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        self._columns = columns if columns is not None else self.from_tickets([])._columns
+
+    @classmethod
+    def from_tickets(cls, tickets: List[Ticket]) -> "TicketTable":
+        columns: Dict[str, np.ndarray] = {}
+        for field in cls.CATEGORY_FIELDS:
+            columns[f"{field}.codes"], columns[f"{field}.categories"] = encode_categories(
+                [getattr(t, field) for t in tickets]
+            )
+        for field in cls.TEXT_FIELDS:
+            columns[f"{field}.data"], columns[f"{field}.offsets"] = encode_text(
+                [getattr(t, field) for t in tickets]
+            )
+        for field, dtype in cls.NUMERIC_FIELDS.items():
+            columns[field] = np.array([getattr(t, field) for t in tickets], dtype=dtype)
+        return cls(columns)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return dict(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns['costo_estimado_usd'])
+
+    def __iter__(self) -> Iterator[Ticket]:
+        return iter(self.tickets(np.arange(len(self))))
+
+    def column(self, field: str) -> np.ndarray:
+        return self._columns[field]
+
+    def tickets(self, rows: np.ndarray) -> List[Ticket]:
+        """Tickets de las filas indicadas (ya validados al cargar: sin revalidar)"""
+        c = self._columns
+        decoded = {}
+        for field in self.CATEGORY_FIELDS:
+            codes, categories = c[f"{field}.codes"][rows], c[f"{field}.categories"]
+            decoded[field] = [str(categories[k]) if k >= 0 else None for k in codes.tolist()]
+        for field in self.TEXT_FIELDS:
+            data, offsets = c[f"{field}.data"], c[f"{field}.offsets"]
+            decoded[field] = [
+                data[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8') for i in rows.tolist()
+            ]
+        for field in self.NUMERIC_FIELDS:
+            decoded[field] = c[field][rows].tolist()
+        return [
+            Ticket.model_construct(**{field: values[i] for field, values in decoded.items()})
+            for i in range(len(rows))
+        ]
+
+    def state_mask(self, states: Sequence[str]) -> np.ndarray:
+        return _category_mask(self._columns['estado.codes'], self._columns['estado.categories'], states)
+
+    def pending_mask(self) -> np.ndarray:
+        return self.state_mask(PENDING_STATES)
+
+    def critical_pending_mask(self) -> np.ndarray:
+        critical = _category_mask(
+            self._columns['criticidad.codes'], self._columns['criticidad.categories'], CRITICAL_LEVELS
+        )
+        return critical & self.pending_mask()
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        sort: Optional[str] = "costo_desc",
+        limit: Optional[int] = None
+    ) -> List[Ticket]:
+        """
+        Tickets filtrados por estado, ordenados y limitados
+
+        "pendiente" incluye en progreso y bloqueado; el orden es estable
+        (empates por posición en el CSV) y un `sort` desconocido deja el
+        orden original.
+        """
+        rows = np.arange(len(self))
+        if status:
+            states = PENDING_STATES if status.lower() == "pendiente" else (status.lower(),)
+            rows = rows[self.state_mask(states)]
+
+        costo = self._columns['costo_estimado_usd'][rows]
+        if sort == "costo_desc":
+            rows = rows[np.argsort(-costo, kind='stable')]
+        elif sort == "costo_asc":
+            rows = rows[np.argsort(costo, kind='stable')]
+        elif sort == "fecha":
+            # Rango de cada fecha ISO entre las categorías: orden descendente estable
+            categories = self._columns['fecha_creacion.categories']
+            rank = np.empty(len(categories), dtype=np.int64)
+            rank[np.argsort(categories, kind='stable')] = np.arange(len(categories))
+            rows = rows[np.argsort(-rank[self._columns['fecha_creacion.codes'][rows]], kind='stable')]
+
+        if limit:
+            rows = rows[:limit]
+        return self.tickets(rows)
+
+# ---------- Histórico diario ----------
+
+class DailyHistorico:
+    """
+    Vista diaria por planta del histórico en columnas numpy
+
+    Filas ordenadas por (fecha, planta), una por planta y día: las del CSV
+    cuando es diario por planta o derivadas de los rollups si no. Los
+    appends arman arrays nuevos, así que las columnas pueden venir
+    memory-mapped de solo lectura.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        if columns is None:
+            columns = self._build(
+                np.array([], dtype='datetime64[D]'), np.array([], dtype=str),
+                {f: np.array([]) for f in FIELDS}
+            )
+        self._columns = columns
+
+    @classmethod
+    def from_arrays(
+        cls,
+        fechas: np.ndarray,
+        plantas: np.ndarray,
+        values: Dict[str, np.ndarray]
+    ) -> "DailyHistorico":
+        return cls(cls._build(fechas, plantas, values))
+
+    @classmethod
+    def from_rows(cls, rows: List[HistoricoPerformance]) -> "DailyHistorico":
+        table = cls()
+        table.upsert(rows)
+        return table
+
+    @staticmethod
+    def _build(fechas: np.ndarray, plantas: np.ndarray, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Ordena por (fecha, planta) y descarta duplicados (gana la última fila)"""
+        fechas = np.asarray(fechas, dtype='datetime64[D]')
+        plantas = np.asarray(plantas, dtype=str)
+        order = np.lexsort((np.arange(len(fechas)), plantas, fechas))
+        fechas, plantas = fechas[order], plantas[order]
+        last = np.ones(len(fechas), dtype=bool)
+        if len(fechas) > 1:
+            last[:-1] = (fechas[:-1] != fechas[1:]) | (plantas[:-1] != plantas[1:])
+        order = order[last]
+
+        codes, categories = encode_categories(plantas[last].tolist())
+        columns = {'fecha': fechas[last], 'planta.codes': codes, 'planta.categories': categories}
+        for f in FIELDS:
+            columns[f] = np.asarray(values[f], dtype=np.float64)[order]
+        return columns
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return dict(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns['fecha'])
+
+    def __getitem__(self, i: int) -> HistoricoPerformance:
+        c = self._columns
+        i = range(len(self))[i]
+        return HistoricoPerformance.model_construct(
+            fecha=str(c['fecha'][i]),
+            planta_id=str(c['planta.categories'][c['planta.codes'][i]]),
+            **{f: float(c[f][i]) for f in FIELDS}
+        )
+
+    def __iter__(self) -> Iterator[HistoricoPerformance]:
+        return (self[i] for i in range(len(self)))
+
+    def plantas(self) -> np.ndarray:
+        return self._columns['planta.categories'][self._columns['planta.codes']]
+
+    def row(self, planta_id: str, fecha: str) -> Optional[HistoricoPerformance]:
+        c = self._columns
+        code = int(np.searchsorted(c['planta.categories'], planta_id))
+        if code >= len(c['planta.categories']) or c['planta.categories'][code] != planta_id:
+            return None
+        day = np.datetime64(fecha, 'D')
+        lo = int(np.searchsorted(c['fecha'], day))
+        hi = int(np.searchsorted(c['fecha'], day, side='right'))
+        hits = np.flatnonzero(c['planta.codes'][lo:hi] == code)
+        return self[lo + int(hits[0])] if len(hits) else None
+
+    def first_fecha(self, desde: str) -> Optional[str]:
+        """Primera fecha (ISO) con datos desde `desde` inclusive"""
+        fechas = self._columns['fecha']
+        idx = int(np.searchsorted(fechas, np.datetime64(desde, 'D')))
+        return str(fechas[idx]) if idx < len(fechas) else None
+
+    def upsert(self, rows: List[HistoricoPerformance]) -> None:
+        """Agrega o reemplaza filas diarias (misma planta y fecha)"""
+        if not rows:
+            return
+        c = self._columns
+        fechas = np.concatenate([c['fecha'], np.array([r.fecha[:10] for r in rows], dtype='datetime64[D]')])
+        plantas = np.concatenate([self.plantas().astype(str), np.array([r.planta_id for r in rows], dtype=str)])
+        values = {
+            f: np.concatenate([c[f], np.array([getattr(r, f) for r in rows], dtype=np.float64)])
+            for f in FIELDS
+        }
+        self._columns = self._build(fechas, plantas, values)
@@ -1,13 +1,28 @@
-import pandas as pd
 import json
+import logging
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timezone
+import numpy as np
 from app.models.schemas import (
     PlantaData, PlantaBase, EquipoBase, UmbralBase,
     HistoricoPerformance, Ticket
 )
 from app.core.config import settings
+from app.core.metrics import timed
+from app.services.columnar import DailyHistorico, TicketTable
+from app.services.dataset_db import DatasetDB, file_signature
+from app.services.rollups import GRANULARITIES, HistoricoRollups, FIELDS, regroup_days, series_points
+from app.services.shared_dataset import SharedDataset
+from app.services.thresholds import ThresholdRules
+from app.services.timeseries_store import (
+    HistoricoStore, SECONDS_PER_DAY, rollup_vectors, parse_step_seconds, to_epoch
+)
+from app.services.timezones import UTCOffsetTable, offset_table, plant_timezone
+
+logger = logging.getLogger(__name__)
+
+INPUT_FILES = ("Parametros_Planta.xlsx", "Historico_Performance.csv", "Tickets_Mantenimiento.csv")
 
 class DataLoader:
     """Servicio para cargar y cachear datos desde archivos"""
@@ -15,17 +30,40 @@ class DataLoader:
     def __init__(self):
         self.data_folder: Optional[Path] = None
         self.planta_data: Optional[PlantaData] = None
-        self.historico: List[HistoricoPerformance] = []
-        self.tickets: List[Ticket] = []
+        # Reglas de la hoja Umbrales compiladas al cargar
+        self.threshold_rules = ThresholdRules([])
+        # Vista diaria por planta y tickets, en columnas (publicables memory-mapped)
+        self.historico = DailyHistorico()
+        self.tickets = TicketTable()
         self.last_reload: Optional[datetime] = None
         self.files_loaded: Dict[str, int] = {}
+        # Registros a resolución nativa (diaria o sub-diaria, por planta o equipo)
+        self.store = HistoricoStore()
+        self.rollups = HistoricoRollups()
+        # Se incrementa con cada cambio de datos (recarga o append)
+        self.version: int = 0
+        self.last_modified: Optional[datetime] = None  # UTC, para Last-Modified
+        # (planta, primer día modificado) de cada append desde la última recarga
+        self.historico_edits: List[Tuple[str, str]] = []
+        # Copia persistente opcional de los datos de entrada (settings.dataset_db)
+        self.db: Optional[DatasetDB] = DatasetDB(settings.dataset_db) if settings.dataset_db else None
+        # Snapshot memory-mapped compartido entre workers (settings.shared_dataset_dir)
+        self.shared: Optional[SharedDataset] = (
+            SharedDataset(settings.shared_dataset_dir) if settings.shared_dataset_dir else None
+        )
         
+    @property
+    def clock(self) -> UTCOffsetTable:
+        """Tabla de offsets de la zona horaria de la planta (o la configurada si no hay datos)"""
+        return offset_table(plant_timezone(self.planta_data.planta if self.planta_data else None))
+    
     def set_data_folder(self, folder_path: str) -> None:
         """Configura el folder de datos"""
         self.data_folder = Path(folder_path)
         if not self.data_folder.exists():
             raise FileNotFoundError(f"El folder '{folder_path}' no existe")
     
+    @timed("reload.total")
     def reload_data(self) -> Dict[str, Any]:
         """Recarga todos los datos desde los archivos"""
         if not self.data_folder:
@@ -36,7 +74,11 @@ class DataLoader:
         
         # Cargar parámetros de planta
         try:
-            self.planta_data = self._load_planta_params()
+            self.planta_data = self._ingest(
+                "Parametros_Planta.xlsx", self._load_planta_params,
+                self.db and self.db.save_planta, self.db and self.db.load_planta
+            )
+            self.threshold_rules = ThresholdRules(self.planta_data.umbrales)
             results['planta'] = 'OK'
             self.files_loaded['Parametros_Planta.xlsx'] = (
                 1 + len(self.planta_data.equipos) + len(self.planta_data.umbrales)
@@ -47,16 +89,28 @@ class DataLoader:
         
         # Cargar histórico
         try:
-            self.historico = self._load_historico()
+            raw = self._ingest(
+                "Historico_Performance.csv", self._read_historico,
+                self.db and self.db.save_historico, self.db and self.db.load_historico
+            )
+            store, historico = self._build_historico(raw)
+            self.store = store
+            self._rebuild_rollups()
+            # Vista diaria por planta: las filas originales si el CSV es diario,
+            # si no se deriva de los rollups
+            self.historico = historico if historico is not None else self._daily_rows()
             results['historico'] = 'OK'
-            self.files_loaded['Historico_Performance.csv'] = len(self.historico)
+            self.files_loaded['Historico_Performance.csv'] = len(self.store)
         except Exception as e:
             errors.append(f"Error cargando Historico_Performance.csv: {str(e)}")
             results['historico'] = f'ERROR: {str(e)}'
         
         # Cargar tickets
         try:
-            self.tickets = self._load_tickets()
+            self.tickets = TicketTable.from_tickets(self._ingest(
+                "Tickets_Mantenimiento.csv", self._load_tickets,
+                self.db and self.db.save_tickets, self.db and self.db.load_tickets
+            ))
             results['tickets'] = 'OK'
             self.files_loaded['Tickets_Mantenimiento.csv'] = len(self.tickets)
         except Exception as e:
@@ -64,6 +118,11 @@ class DataLoader:
             results['tickets'] = f'ERROR: {str(e)}'
         
         self.last_reload = datetime.now()
+        self.historico_edits = []
+        self.last_modified = datetime.now(timezone.utc)
+        self.version += 1
+        if self.shared is not None:
+            self._publish_shared()
         
         return {
             'success': len(errors) == 0,
@@ -73,8 +132,322 @@ class DataLoader:
             'last_reload': self.last_reload.isoformat()
         }
     
+    def attach_or_reload(self) -> Dict[str, Any]:
+        """
+        Carga inicial de un worker
+        
+        Con dataset compartido, si el snapshot vigente corresponde a los
+        mismos archivos de entrada (lo publicó otro worker) se adjunta en
+        lugar de parsear; si no, se recarga y se publica. El lock hace que
+        con N workers solo el primero parsee.
+        """
+        if self.shared is None:
+            return self.reload_data()
+        
+        with self.shared.lock():
+            name, _ = self.shared.current()
+            if name is not None:
+                try:
+                    meta = self.shared.read_meta(name)
+                except (OSError, ValueError):
+                    meta = None
+                if meta and meta.get('data_folder') == self._folder_key() \
+                        and meta.get('sources') == self._source_signatures():
+                    self.sync_shared()
+                    return {
+                        'success': True,
+                        'results': {'shared': name},
+                        'errors': [],
+                        'files_loaded': self.files_loaded,
+                        'last_reload': self.last_reload.isoformat() if self.last_reload else None
+                    }
+            return self.reload_data()
+    
+    def sync_shared(self) -> bool:
+        """Adjunta el snapshot publicado por otro worker si cambió (True si adjuntó uno nuevo)"""
+        if self.shared is None or not self.shared.changed():
+            return False
+        
+        name, stat = self.shared.current()
+        if name is None or name == self.shared.attached:
+            self.shared.mark_attached(self.shared.attached, stat)
+            return False
+        
+        try:
+            with timed("shared.attach"):
+                meta, columns = self.shared.load(name)
+                planta_data = PlantaData.model_validate(meta['planta_data']) if meta['planta_data'] else None
+                store = HistoricoStore.from_columns(_prefixed(columns, 'store.'), meta['plantas'], meta['equipos'])
+                historico = DailyHistorico(_prefixed(columns, 'diario.'))
+                tickets = TicketTable(_prefixed(columns, 'tickets.'))
+                rollups = HistoricoRollups()
+                rollups.load(_prefixed(columns, 'rollups.'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"No se pudo adjuntar el dataset compartido {name}: {e}")
+            # Se reintenta con la próxima publicación
+            self.shared.mark_attached(self.shared.attached, stat)
+            return False
+        
+        self.planta_data = planta_data
+        self.threshold_rules = ThresholdRules(planta_data.umbrales if planta_data else [])
+        # Todo se adjunta de solo lectura: nada se parsea ni se reconstruye por worker
+        self.store = store
+        self.rollups = rollups
+        self.historico = historico
+        self.tickets = tickets
+        self.files_loaded = meta['files_loaded']
+        self.last_reload = datetime.fromisoformat(meta['last_reload']) if meta['last_reload'] else None
+        self.last_modified = datetime.fromisoformat(meta['last_modified']) if meta['last_modified'] else None
+        self.historico_edits = [tuple(e) for e in meta.get('historico_edits', [])]
+        self.version = meta['version']
+        self.shared.mark_attached(name, stat)
+        logger.info(f"Dataset compartido adjuntado: {name}")
+        return True
+    
+    def _publish_shared(self) -> None:
+        """Publica el estado actual como snapshot para los demás workers"""
+        with self.shared.lock():
+            meta = {
+                'version': self.version,
+                'data_folder': self._folder_key(),
+                'sources': self._source_signatures(),
+                'last_reload': self.last_reload.isoformat() if self.last_reload else None,
+                'last_modified': self.last_modified.isoformat() if self.last_modified else None,
+                'files_loaded': self.files_loaded,
+                'planta_data': self.planta_data.model_dump(mode='json') if self.planta_data else None,
+                'plantas': self.store.plantas,
+                'equipos': self.store.equipos,
+                'historico_edits': self.historico_edits,
+            }
+            columns = {
+                **_with_prefix('store.', self.store.columns()),
+                **_with_prefix('diario.', self.historico.columns()),
+                **_with_prefix('tickets.', self.tickets.columns()),
+                **_with_prefix('rollups.', self.rollups.columns()),
+            }
+            self.version = self.shared.publish(meta, columns)
+    
+    def _folder_key(self) -> Optional[str]:
+        return str(self.data_folder.resolve()) if self.data_folder else None
+    
+    def _source_signatures(self) -> Dict[str, List[int]]:
+        """(mtime_ns, tamaño) de los archivos de entrada presentes"""
+        if not self.data_folder:
+            return {}
+        return {
+            name: list(file_signature(self.data_folder / name))
+            for name in INPUT_FILES if (self.data_folder / name).exists()
+        }
+    
+    def _ingest(
+        self,
+        filename: str,
+        parse: Callable[[], Any],
+        save: Optional[Callable[[str, Tuple[int, int], Any], None]],
+        load: Optional[Callable[[], Any]]
+    ) -> Any:
+        """
+        Lee un archivo de entrada parseándolo o, con base configurada, desde la base
+        
+        El archivo se parsea solo si cambió (mtime/tamaño) desde su última
+        ingesta; en ese caso el resultado se guarda en la base.
+        """
+        path = self.data_folder / filename
+        if self.db is None or not path.exists():
+            return parse()
+        
+        name = str(path.resolve())
+        signature = file_signature(path)
+        if self.db.is_current(name, signature):
+            with timed("reload.db_load"):
+                return load()
+        
+        data = parse()
+        save(name, signature, data)
+        return data
+    
+    def query_tickets(
+        self,
+        status: Optional[str] = None,
+        sort: str = "costo_desc",
+        limit: Optional[int] = None
+    ) -> List[Ticket]:
+        """Tickets filtrados por estado, ordenados y limitados (en SQL si hay base)"""
+        if self.db is not None:
+            return self.db.query_tickets(status, sort, limit)
+        return self.tickets.query(status, sort, limit)
+    
+    def append_historico(self, rows: List[HistoricoPerformance]) -> Dict[str, Any]:
+        """
+        Agrega registros al histórico y actualiza los rollups de forma incremental
+        
+        Un registro con la misma (planta_id, equipo_id, fecha) que uno existente
+        lo reemplaza. Acepta registros diarios o sub-diarios (fecha con hora).
+        """
+        if not rows:
+            return {'added': 0, 'replaced': 0, 'total': len(self.store)}
+        
+        if self.shared is not None:
+            # Aplicar sobre el último snapshot publicado para no pisar appends de otro worker
+            with self.shared.lock():
+                self.sync_shared()
+                return self._append_historico(rows)
+        return self._append_historico(rows)
+    
+    def _append_historico(self, rows: List[HistoricoPerformance]) -> Dict[str, Any]:
+        tz = self.clock.tz
+        parsed = [datetime.fromisoformat(r.fecha) for r in rows]
+        # Fechas con zona horaria explícita se pasan a hora local de la planta
+        timestamps = np.array(
+            [to_epoch(d.astimezone(tz) if d.tzinfo else d) for d in parsed], dtype=np.int64
+        )
+        intervals = np.array([r.intervalo_minutos * 60 for r in rows], dtype=np.int32)
+        plantas = np.array([r.planta_id for r in rows])
+        equipos = np.array([r.equipo_id or "" for r in rows])
+        values = {f: np.array([getattr(r, f) for r in rows], dtype=np.float64) for f in FIELDS}
+        
+        result = self.store.upsert(timestamps, intervals, plantas, equipos, values)
+        if self.db is not None:
+            self.db.upsert_historico({
+                'ts': timestamps, 'interval': intervals, 'planta': plantas, 'equipo': equipos, **values
+            })
+        
+        # Recalcular solo los días tocados y aplicar la diferencia a los rollups
+        day_starts = timestamps - timestamps % SECONDS_PER_DAY
+        affected = sorted(set(zip(plantas.tolist(), day_starts.tolist())))
+        daily_inputs = {
+            (r.planta_id, r.fecha): r for r in rows
+            if r.intervalo_minutos == 1440 and not r.equipo_id
+        }
+        
+        daily_rows = []
+        first_changed: Dict[str, str] = {}
+        for planta_id, day_start in affected:
+            day = np.datetime64(day_start, 's').astype('datetime64[D]')
+            cols = self.store.columns(day_start, day_start + SECONDS_PER_DAY, planta_id, plant_level=True)
+            new_vector = rollup_vectors(cols['interval'], cols).sum(axis=0)
+            delta = new_vector - self.rollups.day_vector(day, planta_id)
+            fecha = str(day)
+            row = daily_inputs.get((planta_id, fecha))
+            if row is None and not delta.any():
+                # Registros de equipo en un día con registro de planta: el total no cambia
+                continue
+            self.rollups.apply_delta(day, planta_id, delta)
+            first_changed.setdefault(planta_id, fecha)
+            
+            daily_rows.append(row or self._daily_row(planta_id, fecha))
+        
+        self.historico.upsert(daily_rows)
+        
+        self.historico_edits.extend(sorted(first_changed.items()))
+        self.files_loaded['Historico_Performance.csv'] = len(self.store)
+        self.last_modified = datetime.now(timezone.utc)
+        self.version += 1
+        if self.shared is not None:
+            self._publish_shared()
+        
+        return {
+            'added': result['added'],
+            'replaced': result['replaced'],
+            'total': len(self.store),
+            'desde': min(first_changed.values()) if first_changed else None
+        }
+    
+    def historico_series(
+        self,
+        granularity: str,
+        planta_id: Optional[str] = None,
+        start: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Serie agregada por período
+        
+        Granularidades diarias o mayores salen de los rollups; las
+        sub-diarias ("hour", "15min", ...) se agregan desde el store.
+        """
+        step = parse_step_seconds(granularity)
+        if step is None:
+            return self.rollups.series(
+                granularity, planta_id=planta_id, start=start.date() if start else None
+            )
+        
+        resolution = self.store.resolution_seconds
+        if resolution and step < resolution:
+            raise ValueError(
+                f"Granularidad {granularity} menor a la resolución de los datos ({resolution // 60} min)"
+            )
+        
+        keys, sums = self.store.resample(
+            step, start_ts=to_epoch(start) if start else None, planta_id=planta_id
+        )
+        periods = keys.astype('datetime64[s]').astype(str).tolist()
+        return series_points(periods, sums)
+    
+    def period_sums(
+        self,
+        granularity: str,
+        planta_id: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sumas por período limitadas a [start, end]
+        
+        Con DATASET_DB se agregan en SQL (solo los días del rango); si no,
+        se reagrupa la tabla diaria de los rollups.
+        """
+        if self.db is None:
+            return self.rollups.period_sums(granularity, planta_id, start, end)
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad inválida: {granularity}. Usar: {', '.join(GRANULARITIES)}")
+        with timed("db.period_sums"):
+            keys, sums = self.db.day_sums(planta_id, start, end)
+        return regroup_days(keys, sums, granularity)
+    
+    def window_vector(self, start: datetime) -> np.ndarray:
+        """Vector de acumulables desde `start` (medianoche local) hasta el final, a nivel planta"""
+        if self.db is None:
+            return self.store.window_vector(start_ts=to_epoch(start))
+        with timed("db.window"):
+            _, sums = self.db.day_sums(start=start.date())
+        return sums.sum(axis=0)
+    
+    @timed("reload.rollups")
+    def _rebuild_rollups(self) -> None:
+        cols = self.store.columns(plant_level=True)
+        days = (cols['ts'] // SECONDS_PER_DAY).astype('datetime64[D]')
+        self.rollups.rebuild(
+            days, cols['planta'], list(self.store.plantas), rollup_vectors(cols['interval'], cols)
+        )
+    
+    def _daily_row(self, planta_id: str, fecha: str) -> HistoricoPerformance:
+        """Fila diaria de una planta derivada de los rollups"""
+        vector = self.rollups.day_vector(np.datetime64(fecha, 'D'), planta_id)
+        point = series_points([fecha], vector.reshape(1, -1))[0]
+        return self._point_to_row(planta_id, point)
+    
+    def _daily_rows(self) -> DailyHistorico:
+        return DailyHistorico.from_rows([
+            self._point_to_row(planta_id, point)
+            for planta_id in self.rollups.plants()
+            for point in self.rollups.series("day", planta_id=planta_id)
+        ])
+    
+    @staticmethod
+    def _point_to_row(planta_id: str, point: Dict[str, Any]) -> HistoricoPerformance:
+        return HistoricoPerformance(
+            fecha=point['periodo'],
+            planta_id=planta_id,
+            pr_real=point['pr_promedio'],
+            availability_real_pct=point['availability_promedio_pct'],
+            **{k: v for k, v in point.items() if k in FIELDS}
+        )
+    
+    @timed("reload.excel_parse")
     def _load_planta_params(self) -> PlantaData:
         """Carga parámetros de planta desde Excel"""
+        import pandas as pd
+        
         file_path = self.data_folder / "Parametros_Planta.xlsx"
         if not file_path.exists():
             raise FileNotFoundError(
@@ -114,8 +487,19 @@ class DataLoader:
         
         return PlantaData(planta=planta, equipos=equipos, umbrales=umbrales)
     
-    def _load_historico(self) -> List[HistoricoPerformance]:
-        """Carga histórico de performance desde CSV"""
+    @timed("reload.historico_csv_parse")
+    def _read_historico(self) -> Dict[str, Optional[np.ndarray]]:
+        """
+        Lee el histórico de performance desde CSV
+        
+        Acepta filas diarias por planta (formato original) o registros
+        sub-diarios: columna 'timestamp' (o 'fecha' con hora), opcionalmente
+        'intervalo_minutos' y 'equipo_id'. Devuelve columnas: 'ts' (hora
+        local de planta), 'interval' (segundos), 'planta', 'equipo' (None si
+        no hay columna) y los campos numéricos.
+        """
+        import pandas as pd
+        
         file_path = self.data_folder / "Historico_Performance.csv"
         if not file_path.exists():
             raise FileNotFoundError(
@@ -125,30 +509,87 @@ class DataLoader:
         df = pd.read_csv(file_path)
         
         # Validar columnas
-        required_cols = [
-            'fecha', 'planta_id', 'energia_real_kwh', 'energia_esperada_kwh',
-            'irradiancia_poa_kwh_m2', 'pr_real', 'availability_real_pct',
-            'curtailment_kwh', 'perdida_soiling_kwh', 'perdida_otros_kwh',
-            'ingresos_estimados_usd', 'opex_estimado_usd'
-        ]
+        time_col = 'timestamp' if 'timestamp' in df.columns else 'fecha'
+        required_cols = [time_col, 'planta_id'] + list(FIELDS)
         missing = set(required_cols) - set(df.columns)
         if missing:
             raise ValueError(f"Columnas faltantes en Historico_Performance.csv: {missing}")
         
-        # Parsear fechas
-        df['fecha'] = pd.to_datetime(df['fecha']).dt.strftime('%Y-%m-%d')
+        # Parsear fechas (con zona horaria explícita se pasan a hora local de la planta)
+        parsed = pd.to_datetime(df[time_col])
+        if parsed.dt.tz is not None:
+            utc = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
+            timestamps = self.clock.to_local(utc.to_numpy(dtype='datetime64[s]').astype(np.int64))
+        else:
+            timestamps = parsed.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        
+        if 'intervalo_minutos' in df.columns:
+            intervals = df['intervalo_minutos'].to_numpy(dtype=np.int64) * 60
+        else:
+            intervals = np.full(len(df), self._infer_interval(timestamps), dtype=np.int64)
+        
+        equipos = None
+        if 'equipo_id' in df.columns:
+            equipos = df['equipo_id'].fillna('').astype(str).to_numpy()
         
-        return [HistoricoPerformance(**row) for _, row in df.iterrows()]
+        values = {}
+        for field in FIELDS:
+            try:
+                values[field] = pd.to_numeric(df[field]).to_numpy(dtype=np.float64)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Columna '{field}' no numérica: {str(e)}")
+        
+        return {
+            'ts': timestamps,
+            'interval': intervals,
+            'planta': df['planta_id'].astype(str).to_numpy(),
+            'equipo': equipos,
+            **values
+        }
+    
+    def _build_historico(
+        self,
+        raw: Dict[str, Optional[np.ndarray]]
+    ) -> Tuple[HistoricoStore, Optional[DailyHistorico]]:
+        """Store columnar y, si los registros son diarios por planta, la vista diaria"""
+        with timed("reload.historico_store"):
+            store = HistoricoStore()
+            store.upsert(raw['ts'], raw['interval'], raw['planta'], raw['equipo'], raw)
+        
+        equipos = raw['equipo']
+        is_daily = bool((raw['interval'] == SECONDS_PER_DAY).all()) and (
+            equipos is None or not any(equipos)
+        )
+        if not is_daily:
+            return store, None
+        
+        with timed("reload.historico_daily"):
+            historico = DailyHistorico.from_arrays(
+                raw['ts'].astype('datetime64[s]').astype('datetime64[D]'),
+                raw['planta'], {f: raw[f] for f in FIELDS}
+            )
+        return store, historico
+    
+    @staticmethod
+    def _infer_interval(timestamps: np.ndarray) -> int:
+        """Intervalo (segundos) como el menor paso entre timestamps, máximo un día"""
+        steps = np.diff(np.unique(timestamps))
+        if not len(steps):
+            return SECONDS_PER_DAY
+        return int(min(steps.min(), SECONDS_PER_DAY))
     
     def _load_tickets(self) -> List[Ticket]:
         """Carga tickets de mantenimiento desde CSV"""
+        import pandas as pd
+        
         file_path = self.data_folder / "Tickets_Mantenimiento.csv"
         if not file_path.exists():
             raise FileNotFoundError(
                 f"Archivo 'Tickets_Mantenimiento.csv' no encontrado en {self.data_folder}"
             )
         
-        df = pd.read_csv(file_path)
+        with timed("reload.tickets_csv_parse"):
+            df = pd.read_csv(file_path)
         
         # Validar columnas
         required_cols = [
@@ -167,10 +608,19 @@ class DataLoader:
                 df['fecha_estimada_resolucion'], errors='coerce'
             ).dt.strftime('%Y-%m-%d')
         
-        # Reemplazar NaN con None para campos opcionales
-        df = df.where(pd.notna(df), None)
+        # Reemplazar NaN con None para campos opcionales (en columnas object:
+        # en columnas str/float pandas vuelve a convertir None en NaN)
+        df = df.astype(object).where(pd.notna(df), None)
         
-        return [Ticket(**row.to_dict()) for _, row in df.iterrows()]
+        with timed("reload.tickets_validation"):
+            return [Ticket(**row.to_dict()) for _, row in df.iterrows()]
+
+def _with_prefix(prefix: str, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {f"{prefix}{name}": array for name, array in columns.items()}
+
+def _prefixed(columns: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    """Columnas publicadas bajo `prefix`, con el nombre sin el prefijo"""
+    return {name[len(prefix):]: array for name, array in columns.items() if name.startswith(prefix)}
 
 # Instancia global
 data_loader = DataLoader()
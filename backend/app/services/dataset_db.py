@@ -0,0 +1,294 @@
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.schemas import PlantaData, Ticket
+from app.services.rollups import FIELDS, MEAN_FIELDS, ROLLUP_WIDTH, SUM_FIELDS
+
+# Columnas de tickets en el orden del modelo
+TICKET_FIELDS = tuple(Ticket.model_fields)
+
+SECONDS_PER_DAY = 86400
+
+# Acumulables por día en el orden de los rollups: sumas, sumas ponderadas por
+# duración y pesos de los promedios (NULL = NaN no suma ni pesa), conteo
+_DAY_SUMS = ", ".join([
+    *(f"SUM(h.{f})" for f in SUM_FIELDS),
+    *(f"SUM(h.{f} * h.intervalo)" for f in MEAN_FIELDS),
+    *(f"SUM(CASE WHEN h.{f} IS NOT NULL THEN h.intervalo END)" for f in MEAN_FIELDS),
+    "COUNT(*)",
+])
+
+# Estados que cuentan como backlog (mismo criterio que KPIs y /api/tickets)
+PENDING_STATES = ('pendiente', 'en progreso', 'bloqueado')
+
+TICKET_SORTS = {
+    "costo_desc": "costo_estimado_usd DESC, pos",
+    "costo_asc": "costo_estimado_usd, pos",
+    "fecha": "fecha_creacion DESC, pos",
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS source_files (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS planta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS historico (
+    planta_id TEXT NOT NULL,
+    equipo_id TEXT NOT NULL DEFAULT '',
+    ts INTEGER NOT NULL,
+    fecha TEXT NOT NULL,
+    intervalo INTEGER NOT NULL,
+    {", ".join(f"{f} REAL" for f in FIELDS)},
+    PRIMARY KEY (planta_id, equipo_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_historico_planta_fecha ON historico (planta_id, fecha);
+CREATE INDEX IF NOT EXISTS idx_historico_fecha ON historico (fecha);
+CREATE TABLE IF NOT EXISTS tickets (
+    pos INTEGER PRIMARY KEY,
+    ticket_id TEXT NOT NULL,
+    planta_id TEXT NOT NULL,
+    fecha_creacion TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    criticidad TEXT NOT NULL,
+    equipo_id TEXT,
+    descripcion TEXT NOT NULL,
+    costo_estimado_usd REAL NOT NULL,
+    impacto_estimado_kwh REAL NOT NULL,
+    sla_objetivo_horas INTEGER NOT NULL,
+    responsable TEXT NOT NULL,
+    fecha_estimada_resolucion TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_id ON tickets (ticket_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_estado_costo ON tickets (estado COLLATE NOCASE, costo_estimado_usd);
+CREATE INDEX IF NOT EXISTS idx_tickets_costo ON tickets (costo_estimado_usd);
+CREATE INDEX IF NOT EXISTS idx_tickets_fecha ON tickets (fecha_creacion);
+CREATE INDEX IF NOT EXISTS idx_tickets_planta_criticidad ON tickets (planta_id, criticidad COLLATE NOCASE);
+"""
+
+def file_signature(path: Path) -> Tuple[int, int]:
+    """(mtime_ns, tamaño) de un archivo de entrada"""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+class DatasetDB:
+    """
+    Copia persistente (SQLite) de los datos de entrada
+
+    Cada archivo de entrada se ingesta una sola vez: mientras su
+    mtime/tamaño coincidan con los registrados, la recarga lee las tablas
+    en lugar de parsear Excel/CSV. Los appends al histórico también se
+    escriben acá, así que sobreviven a reinicios. El histórico se indexa
+    por (planta_id, fecha) para las sumas por día de los KPIs y los
+    tickets por estado, costo, fecha y criticidad para /api/tickets.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- Archivos de entrada ----------
+
+    def is_current(self, name: str, signature: Tuple[int, int]) -> bool:
+        """True si el archivo ya se ingestó con ese mtime/tamaño"""
+        row = self._conn().execute(
+            "SELECT mtime_ns, size FROM source_files WHERE name = ?", (name,)
+        ).fetchone()
+        return row is not None and (row["mtime_ns"], row["size"]) == tuple(signature)
+
+    def _mark_current(self, conn: sqlite3.Connection, name: str, signature: Tuple[int, int]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO source_files (name, mtime_ns, size) VALUES (?, ?, ?)",
+            (name, *signature)
+        )
+
+    # ---------- Planta ----------
+
+    def save_planta(self, name: str, signature: Tuple[int, int], planta_data: PlantaData) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN")
+        conn.execute(
+            "INSERT OR REPLACE INTO planta (id, data) VALUES (1, ?)", (planta_data.model_dump_json(),)
+        )
+        self._mark_current(conn, name, signature)
+        conn.execute("COMMIT")
+
+    def load_planta(self) -> PlantaData:
+        row = self._conn().execute("SELECT data FROM planta WHERE id = 1").fetchone()
+        if row is None:
+            raise ValueError("Sin parámetros de planta en la base")
+        return PlantaData.model_validate_json(row["data"])
+
+    # ---------- Histórico ----------
+
+    def save_historico(self, name: str, signature: Tuple[int, int], raw: Dict[str, np.ndarray]) -> None:
+        """Reemplaza el histórico completo por el ingestado del archivo"""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM historico")
+        self._insert_historico(conn, raw)
+        self._mark_current(conn, name, signature)
+        conn.execute("COMMIT")
+
+    def upsert_historico(self, raw: Dict[str, np.ndarray]) -> None:
+        """Inserta registros; los de igual (planta, equipo, timestamp) se reemplazan"""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        self._insert_historico(conn, raw)
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _insert_historico(conn: sqlite3.Connection, raw: Dict[str, np.ndarray]) -> None:
+        n = len(raw['ts'])
+        equipos = raw['equipo'] if raw['equipo'] is not None else np.full(n, "")
+        fechas = raw['ts'].astype('datetime64[s]').astype('datetime64[D]').astype(str)
+        columns = [
+            raw['planta'].astype(str).tolist(),
+            equipos.astype(str).tolist(),
+            raw['ts'].tolist(),
+            fechas.tolist(),
+            raw['interval'].tolist(),
+            # NaN (p.ej. PR nocturno) se guarda como NULL
+            *[np.where(np.isnan(raw[f]), None, raw[f]).tolist() for f in FIELDS],
+        ]
+        placeholders = ", ".join("?" * len(columns))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO historico (planta_id, equipo_id, ts, fecha, intervalo, "
+            f"{', '.join(FIELDS)}) VALUES ({placeholders})",
+            zip(*columns)
+        )
+
+    def load_historico(self) -> Dict[str, np.ndarray]:
+        """Columnas del histórico en el formato de `DataLoader._read_historico`"""
+        rows = self._conn().execute(
+            f"SELECT planta_id, equipo_id, ts, intervalo, {', '.join(FIELDS)} FROM historico"
+        ).fetchall()
+        if not rows:
+            raise ValueError("Histórico vacío en la base")
+        planta, equipo, ts, interval, *values = zip(*rows)
+        equipo = np.array(equipo, dtype=str)
+        return {
+            'ts': np.array(ts, dtype=np.int64),
+            'interval': np.array(interval, dtype=np.int64),
+            'planta': np.array(planta, dtype=str),
+            'equipo': equipo if (equipo != "").any() else None,
+            **{f: np.array(v, dtype=np.float64) for f, v in zip(FIELDS, values)},
+        }
+
+    def day_sums(
+        self,
+        planta_id: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Acumulables por día de [start, end] agregados en SQL
+
+        Mismo formato que la tabla diaria de rollups (días ordenados y
+        matriz (n, ROLLUP_WIDTH)) y mismo criterio de nivel planta: los
+        registros por equipo solo suman los días sin registro de planta.
+        El rango se resuelve con los índices por (planta_id, fecha) y fecha.
+        """
+        where, params = [], []
+        if planta_id is not None:
+            where.append("h.planta_id = ?")
+            params.append(planta_id)
+        if start is not None:
+            where.append("h.fecha >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            where.append("h.fecha <= ?")
+            params.append(end.isoformat())
+        where.append(
+            "(h.equipo_id = '' OR NOT EXISTS (SELECT 1 FROM historico p "
+            "WHERE p.planta_id = h.planta_id AND p.fecha = h.fecha AND p.equipo_id = ''))"
+        )
+        rows = self._conn().execute(
+            f"SELECT h.fecha, {_DAY_SUMS} "
+            f"FROM historico h WHERE {' AND '.join(where)} GROUP BY h.fecha ORDER BY h.fecha",
+            params
+        ).fetchall()
+        if not rows:
+            return np.array([], dtype='datetime64[D]'), np.zeros((0, ROLLUP_WIDTH))
+
+        days = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        # SUM de solo NULL devuelve NULL: cuenta como 0
+        sums = np.nan_to_num(np.array([tuple(row)[1:] for row in rows], dtype=np.float64))
+        sums[:, len(SUM_FIELDS):-1] /= SECONDS_PER_DAY
+        return days, sums
+
+    # ---------- Tickets ----------
+
+    def save_tickets(self, name: str, signature: Tuple[int, int], tickets: List[Ticket]) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM tickets")
+        conn.executemany(
+            f"INSERT INTO tickets (pos, {', '.join(TICKET_FIELDS)}) "
+            f"VALUES (?, {', '.join('?' * len(TICKET_FIELDS))})",
+            [(i, *(getattr(t, f) for f in TICKET_FIELDS)) for i, t in enumerate(tickets)]
+        )
+        self._mark_current(conn, name, signature)
+        conn.execute("COMMIT")
+
+    def load_tickets(self) -> List[Ticket]:
+        return self.query_tickets(sort=None)
+
+    def query_tickets(
+        self,
+        status: Optional[str] = None,
+        sort: Optional[str] = "costo_desc",
+        limit: Optional[int] = None
+    ) -> List[Ticket]:
+        """
+        Tickets filtrados por estado, ordenados y limitados en SQL
+
+        Mismo criterio que el filtrado en memoria: "pendiente" incluye en
+        progreso y bloqueado, el orden es estable (empates por posición en
+        el CSV) y un `sort` desconocido deja el orden original.
+        """
+        where, params = "", []
+        if status:
+            states = PENDING_STATES if status.lower() == "pendiente" else (status.lower(),)
+            where = f"WHERE estado COLLATE NOCASE IN ({', '.join('?' * len(states))})"
+            params.extend(states)
+        sql = f"SELECT {', '.join(TICKET_FIELDS)} FROM tickets {where} ORDER BY {TICKET_SORTS.get(sort, 'pos')}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._conn().execute(sql, params).fetchall()
+        return [Ticket(**dict(row)) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        return {
+            'path': str(self.db_path),
+            'historico': conn.execute("SELECT COUNT(*) FROM historico").fetchone()[0],
+            'tickets': conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0],
+            'source_files': {
+                row["name"]: {'mtime_ns': row["mtime_ns"], 'size': row["size"]}
+                for row in conn.execute("SELECT * FROM source_files")
+            },
+        }
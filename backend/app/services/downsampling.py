@@ -0,0 +1,98 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Índices de mínimo y máximo de cada bucket (más el primer y último punto)
+
+    Los buckets son tramos contiguos de igual tamaño; todo se resuelve
+    con reduceat, sin loops por bucket. Conserva picos y valles exactos.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Buckets sobre los puntos interiores (el primero y el último se conservan)
+    buckets = max(max_points // 2 - 1, 1)
+    inner = y[1:n - 1]
+    offsets = np.linspace(0, len(inner), buckets + 1).astype(np.int64)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(offsets, len(inner))))
+
+    idx = [[0], [n - 1]]
+    for extreme in (np.minimum.reduceat(inner, offsets), np.maximum.reduceat(inner, offsets)):
+        # Primer índice de cada bucket que alcanza su extremo
+        hits = np.flatnonzero(inner == extreme[bucket_of])
+        _, first = np.unique(bucket_of[hits], return_index=True)
+        idx.append(hits[first] + 1)
+    return np.unique(np.concatenate(idx))
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson, 2013)
+
+    De cada bucket elige el punto que forma el triángulo de mayor área
+    con el punto elegido en el bucket anterior y el promedio del
+    siguiente. La selección es secuencial por bucket, pero el área de
+    todos los candidatos de un bucket y los promedios se calculan
+    vectorizados.
+    """
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+
+    # Promedio de cada bucket (el "siguiente" del último es el punto final)
+    sums_x = np.add.reduceat(x[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(y[:n - 1], edges[:-1])
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[prev], y[prev]
+        area = np.abs((ax - avg_x[b + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[b + 1] - ay))
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+def check_method(method: str) -> None:
+    if method not in METHODS:
+        raise ValueError(f"Método de downsampling inválido: {method}. Usar: {', '.join(METHODS)}")
+
+def downsample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: Optional[int],
+    method: str = "lttb"
+) -> np.ndarray:
+    """Índices de los puntos a conservar (todos si max_points es None o alcanza)"""
+    check_method(method)
+    if max_points is None or len(y) <= max_points:
+        return np.arange(len(y))
+    if method == "minmax":
+        return minmax_indices(np.asarray(y), max_points)
+    return lttb_indices(x, y, max_points)
+
+def downsample_points(
+    points: List[Dict[str, Any]],
+    field: str,
+    max_points: Optional[int],
+    method: str = "lttb"
+) -> List[Dict[str, Any]]:
+    """Reduce una serie de dicts eligiendo los puntos según la columna `field`"""
+    check_method(method)
+    if max_points is None or len(points) <= max_points:
+        return points
+    y = np.fromiter((p[field] for p in points), dtype=np.float64, count=len(points))
+    idx = downsample_indices(np.arange(len(points)), y, max_points, method)
+    return [points[i] for i in idx.tolist()]
@@ -0,0 +1,152 @@
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.data_loader import data_loader
+from app.services.kpi_calculator import kpi_calculator
+from app.services.timeseries_store import SECONDS_PER_DAY, to_epoch
+
+class EquipmentPerformance:
+    """
+    KPIs por equipo sobre matrices equipo × día
+
+    Usa los registros por equipo del store columnar y las capacidades de
+    `PlantaData.equipos` para calcular energía, disponibilidad, specific
+    yield (kWh/kWp) y desviación contra la mediana de la flota.
+    """
+
+    def matrices(
+        self,
+        start_ts: int,
+        planta_id: Optional[str] = None,
+        equipo_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Matrices (equipos × días) de energía real/esperada y disponibilidad
+
+        Returns:
+            dict con 'equipos', 'days' (datetime64[D]), 'energia', 'esperada',
+            'availability' (NaN donde no hay datos) y 'has_data'
+        """
+        store = data_loader.store
+        cols = store.columns(start_ts=start_ts, planta_id=planta_id)
+        with_equipo = cols['equipo'] > 0
+        cols = {k: v[with_equipo] for k, v in cols.items()}
+
+        names = np.array(store.equipos, dtype=object)
+        present = np.unique(cols['equipo'])
+        if equipo_ids is not None:
+            wanted = [store.equipos.index(e) for e in equipo_ids if e in store.equipos]
+            present = present[np.isin(present, wanted)]
+
+        # Reindexar códigos de equipo a filas 0..E-1
+        row_of = np.full(len(names), -1, dtype=np.int64)
+        row_of[present] = np.arange(len(present))
+        rows = row_of[cols['equipo']]
+        keep = rows >= 0
+        rows = rows[keep]
+        ts = cols['ts'][keep]
+
+        first_day = start_ts - start_ts % SECONDS_PER_DAY
+        day_idx = (ts - first_day) // SECONDS_PER_DAY
+        n_days = int(day_idx.max()) + 1 if len(day_idx) else 0
+        shape = (len(present), n_days)
+        flat = rows * n_days + day_idx
+        size = shape[0] * shape[1]
+
+        def accumulate(weights: np.ndarray) -> np.ndarray:
+            return np.bincount(flat, weights=weights, minlength=size).reshape(shape)
+
+        weight = cols['interval'][keep] / SECONDS_PER_DAY
+        availability = cols['availability_real_pct'][keep].astype(np.float64)
+        valid = np.isfinite(availability)
+        avail_weight = accumulate(np.where(valid, weight, 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avail = accumulate(np.where(valid, availability * weight, 0.0)) / avail_weight
+
+        return {
+            'equipos': names[present].tolist(),
+            'days': np.datetime64(first_day, 's').astype('datetime64[D]') + np.arange(n_days),
+            'energia': accumulate(np.nan_to_num(cols['energia_real_kwh'][keep].astype(np.float64))),
+            'esperada': accumulate(np.nan_to_num(cols['energia_esperada_kwh'][keep].astype(np.float64))),
+            'availability': avail,
+            'has_data': accumulate(np.ones(len(rows))) > 0,
+        }
+
+    def ranking(
+        self,
+        date_range: str = "30d",
+        planta_id: Optional[str] = None,
+        tipo: str = "Inversor",
+        threshold_pct: float = 5.0
+    ) -> Dict[str, Any]:
+        """Equipos ordenados de peor a mejor desviación de specific yield vs la mediana de la flota"""
+        if not data_loader.planta_data:
+            raise ValueError("Datos no cargados")
+
+        equipos = [
+            e for e in data_loader.planta_data.equipos
+            if e.tipo.lower() == tipo.lower() and e.capacidad_kw > 0
+        ]
+        if not equipos:
+            raise ValueError(f"No hay equipos de tipo '{tipo}' en Parametros_Planta.xlsx")
+
+        start_ts = to_epoch(kpi_calculator.range_start(date_range))
+        m = self.matrices(start_ts, planta_id, [e.equipo_id for e in equipos])
+        if not m['equipos']:
+            raise ValueError(
+                f"No hay datos por equipo (tipo '{tipo}') en el histórico para el rango {date_range}"
+            )
+
+        by_id = {e.equipo_id: e for e in equipos}
+        catalog = [by_id[e] for e in m['equipos']]
+        capacity = np.array([e.capacidad_kw for e in catalog])
+
+        # Specific yield diario y desviación contra la mediana diaria de la flota
+        daily_sy = np.where(m['has_data'], m['energia'] / capacity[:, None], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            # Días sin datos de ningún equipo: mediana NaN sin "All-NaN slice"
+            warnings.simplefilter("ignore", RuntimeWarning)
+            fleet_daily = np.nanmedian(daily_sy, axis=0)
+            daily_dev = daily_sy / fleet_daily[None, :] - 1.0
+        threshold = threshold_pct / 100.0
+        low_days = np.sum(daily_dev < -threshold, axis=1)
+
+        energia = m['energia'].sum(axis=1)
+        esperada = m['esperada'].sum(axis=1)
+        sy = energia / capacity
+        fleet_sy = float(np.median(sy))
+        deviation = sy / fleet_sy - 1.0 if fleet_sy > 0 else np.zeros_like(sy)
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            availability = np.nanmean(m['availability'], axis=1)
+
+        order = np.argsort(deviation, kind='stable')
+        ranked = []
+        for i in order.tolist():
+            ranked.append({
+                'equipo_id': catalog[i].equipo_id,
+                'tipo': catalog[i].tipo,
+                'capacidad_kw': float(capacity[i]),
+                'estado_base': catalog[i].estado_base,
+                'energia_kwh': round(float(energia[i]), 2),
+                'energia_esperada_kwh': round(float(esperada[i]), 2),
+                'availability_pct': round(float(np.nan_to_num(availability[i])), 2),
+                'specific_yield_kwh_kwp': round(float(sy[i]), 3),
+                'desviacion_vs_mediana_pct': round(float(deviation[i]) * 100, 2),
+                'dias_bajo_rendimiento': int(low_days[i]),
+                'bajo_rendimiento': bool(deviation[i] < -threshold),
+            })
+
+        return {
+            'range': date_range,
+            'planta_id': planta_id,
+            'dias': int(m['has_data'].any(axis=0).sum()),
+            'mediana_specific_yield_kwh_kwp': round(fleet_sy, 3),
+            'umbral_desviacion_pct': threshold_pct,
+            'equipos': ranked,
+        }
+
+# Instancia global
+equipment_performance = EquipmentPerformance()
@@ -0,0 +1,169 @@
+import threading
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import record_cache
+from app.models.schemas import PlantaBase
+from app.services.data_loader import data_loader
+from app.services.rollups import COUNT_COLUMN, SUM_FIELDS, period_starts
+from app.services.timeseries_store import SECONDS_PER_DAY
+
+SECONDS_PER_YEAR = 365.25 * SECONDS_PER_DAY
+
+def commissioning_ts(planta: PlantaBase) -> int:
+    """Fecha de puesta en marcha como segundos epoch"""
+    return int(np.datetime64(planta.fecha_puesta_en_marcha[:10], 'D').astype('datetime64[s]').astype(np.int64))
+
+class ExpectedEnergyModel:
+    """
+    Energía esperada a partir de los parámetros de la planta
+
+    esperada = irradiancia POA (kWh/m²) / 1 kW/m² × potencia DC (kWp)
+               × PR objetivo × degradación por edad × (1 - soiling)
+
+    Todo son operaciones sobre arrays de timestamps. La energía modelada
+    diaria del histórico se cachea por planta y versión de datos, así que
+    las desviaciones de cualquier rango se recalculan sin releer archivos.
+    """
+
+    def __init__(self):
+        self._daily: Dict[str, Tuple[int, np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def degradation_factor(planta: PlantaBase, ts: np.ndarray) -> np.ndarray:
+        """Factor de degradación lineal por edad (1.0 en la puesta en marcha)"""
+        age_years = np.maximum(np.asarray(ts, dtype=np.float64) - commissioning_ts(planta), 0.0) / SECONDS_PER_YEAR
+        return np.maximum(1.0 - planta.degradation_annual_pct / 100.0 * age_years, 0.0)
+
+    def plant_factor(self, planta: PlantaBase, ts: np.ndarray) -> np.ndarray:
+        """PR × degradación × (1 - soiling) en cada timestamp"""
+        soiling = 1.0 - planta.soiling_loss_target_pct / 100.0
+        return planta.target_pr * soiling * self.degradation_factor(planta, ts)
+
+    def expected_kwh(
+        self,
+        planta: PlantaBase,
+        irradiancia_kwh_m2: np.ndarray,
+        ts: np.ndarray,
+        capacity_kwp: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Energía esperada por registro; por defecto con la potencia DC de toda la planta"""
+        if capacity_kwp is None:
+            capacity_kwp = planta.potencia_dc_mwp * 1000
+        return np.asarray(irradiancia_kwh_m2, dtype=np.float64) * capacity_kwp * self.plant_factor(planta, ts)
+
+    def expected_power_kw(self, planta: PlantaBase, irradiancia_w_m2: np.ndarray, ts: np.ndarray) -> np.ndarray:
+        """Potencia esperada para irradiancia instantánea, recortada por la potencia AC"""
+        dc_kw = planta.potencia_dc_mwp * np.asarray(irradiancia_w_m2, dtype=np.float64)
+        return np.minimum(dc_kw * self.plant_factor(planta, ts), planta.potencia_ac_mw * 1000)
+
+    # ---------- Histórico ----------
+
+    def _planta(self, planta_id: str) -> Optional[PlantaBase]:
+        planta_data = data_loader.planta_data
+        if planta_data and planta_data.planta.planta_id == planta_id:
+            return planta_data.planta
+        return None
+
+    def daily(self, planta_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Energía modelada por día (datetime64[D], kWh) para el histórico de una planta
+
+        Los registros por equipo usan su capacidad (hoja Equipos) escalada
+        por la relación DC/AC de la planta.
+        """
+        version = data_loader.version
+        with self._lock:
+            cached = self._daily.get(planta_id)
+        hit = cached is not None and cached[0] == version
+        record_cache("expected_energy", hits=int(hit), misses=int(not hit))
+        if hit:
+            return cached[1], cached[2]
+
+        planta = self._planta(planta_id)
+        if planta is None:
+            return np.array([], dtype='datetime64[D]'), np.zeros(0)
+
+        store = data_loader.store
+        cols = store.columns(planta_id=planta_id, plant_level=True)
+        ts = cols['ts']
+
+        # Capacidad DC por código de equipo (0 = registro de planta)
+        dc_ac_ratio = planta.potencia_dc_mwp / planta.potencia_ac_mw if planta.potencia_ac_mw else 1.0
+        catalog = {e.equipo_id: e.capacidad_kw * dc_ac_ratio for e in data_loader.planta_data.equipos}
+        capacity = np.array(
+            [planta.potencia_dc_mwp * 1000] + [catalog.get(e, 0.0) for e in store.equipos[1:]]
+        )
+
+        irradiancia = np.nan_to_num(cols['irradiancia_poa_kwh_m2'].astype(np.float64))
+        expected = self.expected_kwh(planta, irradiancia, ts, capacity[cols['equipo']])
+
+        day_idx = ts // SECONDS_PER_DAY
+        unique_days, inverse = np.unique(day_idx, return_inverse=True)
+        days = unique_days.astype('datetime64[D]')
+        values = np.bincount(inverse, weights=expected, minlength=len(unique_days))
+
+        with self._lock:
+            self._daily[planta_id] = (version, days, values)
+        return days, values
+
+    def deviation(
+        self,
+        desde: date,
+        hasta: date,
+        planta_id: Optional[str] = None,
+        granularity: str = "month"
+    ) -> Dict[str, Any]:
+        """Energía real vs esperada del CSV vs modelada, por período del rango"""
+        if not data_loader.planta_data:
+            raise ValueError("Datos no cargados")
+        planta = data_loader.planta_data.planta
+        if planta_id is not None and planta_id != planta.planta_id:
+            raise ValueError(f"Sin parámetros para la planta {planta_id} en Parametros_Planta.xlsx")
+
+        keys, sums = data_loader.period_sums(granularity, planta.planta_id, desde, hasta)
+        if not len(keys) or sums[:, COUNT_COLUMN].sum() <= 0:
+            raise ValueError(f"No hay datos históricos para el rango {desde} a {hasta}")
+        real = sums[:, SUM_FIELDS.index('energia_real_kwh')]
+        esperada = sums[:, SUM_FIELDS.index('energia_esperada_kwh')]
+
+        days, daily = self.daily(planta.planta_id)
+        in_range = (days >= np.datetime64(desde, 'D')) & (days <= np.datetime64(hasta, 'D'))
+        period_idx = np.searchsorted(keys, period_starts(days[in_range], granularity))
+        modelo = np.bincount(period_idx, weights=daily[in_range], minlength=len(keys))[:len(keys)]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            desviacion = np.where(modelo > 0, (real - modelo) / modelo * 100, 0.0)
+
+        total_real, total_modelo = float(real.sum()), float(modelo.sum())
+        end_ts = int(np.datetime64(hasta, 'D').astype('datetime64[s]').astype(np.int64))
+
+        return {
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'planta_id': planta_id,
+            'granularity': granularity,
+            'target_pr': planta.target_pr,
+            'soiling_pct': planta.soiling_loss_target_pct,
+            'factor_degradacion': round(float(self.degradation_factor(planta, np.array([end_ts]))[0]), 4),
+            'energia_real_kwh': round(total_real, 2),
+            'energia_esperada_kwh': round(float(esperada.sum()), 2),
+            'energia_modelo_kwh': round(total_modelo, 2),
+            'desviacion_modelo_pct': round((total_real - total_modelo) / total_modelo * 100, 2) if total_modelo > 0 else 0.0,
+            'periodos': [
+                {
+                    'periodo': periodo,
+                    'energia_real_kwh': round(float(real[i]), 2),
+                    'energia_esperada_kwh': round(float(esperada[i]), 2),
+                    'energia_modelo_kwh': round(float(modelo[i]), 2),
+                    'desviacion_modelo_pct': round(float(desviacion[i]), 2),
+                }
+                for i, periodo in enumerate(keys.astype(str).tolist())
+            ],
+        }
+
+# Instancia global
+expected_energy = ExpectedEnergyModel()
@@ -0,0 +1,233 @@
+import threading
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.models.schemas import PlantaBase
+from app.services.data_loader import data_loader
+from app.services.rollups import SUM_FIELDS
+from app.services.solar_geometry import daily_insolation
+from app.services.timezones import offset_table, plant_timezone
+
+MIN_FIT_DAYS = 14
+# La tendencia se extrapola como mucho este horizonte; después queda plana
+MAX_TREND_DAYS = 30
+DAYS_PER_YEAR = 365.25
+
+ENERGIA = SUM_FIELDS.index('energia_real_kwh')
+OPEX = SUM_FIELDS.index('opex_estimado_usd')
+
+def _as_days(value: Any) -> np.datetime64:
+    return np.datetime64(value, 'D')
+
+class Forecaster:
+    """
+    Pronóstico diario de energía, ingresos y margen
+
+    Energía = irradiación de cielo despejado del día (base estacional)
+    × rendimiento normalizado con tendencia lineal; OPEX = nivel +
+    tendencia. Ambos se ajustan por mínimos cuadrados vectorizados sobre
+    los últimos `forecast_fit_days` días de los rollups. Los ingresos
+    salen de la energía y la tarifa. El ajuste y el pronóstico se
+    cachean por planta, versión de datos y día local.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[Optional[str], int, date], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def clear_sky(self, planta: PlantaBase, days: np.ndarray) -> np.ndarray:
+        """Irradiación POA de cielo despejado (kWh/m²) de días locales de la planta"""
+        clock = offset_table(plant_timezone(planta))
+        local_midnight = days.astype('datetime64[s]').astype(np.int64)
+        return daily_insolation(planta, clock.to_utc(local_midnight))
+
+    def _planta(self, planta_id: Optional[str]) -> PlantaBase:
+        if not data_loader.planta_data:
+            raise ValueError("Datos no cargados")
+        planta = data_loader.planta_data.planta
+        if planta_id is not None and planta_id != planta.planta_id:
+            raise ValueError(f"Sin parámetros para la planta {planta_id} en Parametros_Planta.xlsx")
+        return planta
+
+    def _daily(self, planta_id: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Días completos del histórico (con datos sub-diarios el último puede estar incompleto)"""
+        keys, sums = data_loader.rollups.table("day", planta_id)
+        resolution = data_loader.store.resolution_seconds or 86400
+        if resolution < 86400 and len(keys):
+            keys, sums = keys[:-1], sums[:-1]
+        return keys, sums
+
+    def fit(
+        self,
+        planta: PlantaBase,
+        keys: np.ndarray,
+        sums: np.ndarray
+    ) -> Dict[str, Any]:
+        """Coeficientes de energía [a, b] (rendimiento y tendencia anual) y OPEX [nivel, tendencia]"""
+        keys, sums = keys[-settings.forecast_fit_days:], sums[-settings.forecast_fit_days:]
+        n = len(keys)
+        if n < MIN_FIT_DAYS:
+            raise ValueError(f"Histórico insuficiente para pronosticar: {n} días (mínimo {MIN_FIT_DAYS})")
+
+        last_day = keys[-1]
+        t = (keys - last_day).astype(np.float64) / DAYS_PER_YEAR
+        cs = self.clear_sky(planta, keys)
+
+        energia = sums[:, ENERGIA]
+        energy_design = np.column_stack([cs, cs * t])
+        energy_coef = np.linalg.lstsq(energy_design, energia, rcond=None)[0]
+        opex_coef = np.linalg.lstsq(np.column_stack([np.ones(n), t]), sums[:, OPEX], rcond=None)[0]
+
+        residual = energia - energy_design @ energy_coef
+        sigma = float(np.sqrt(residual @ residual / max(n - 2, 1)))
+
+        return {
+            'last_day': last_day,
+            'dias_ajuste': n,
+            'energy_coef': energy_coef,
+            'opex_coef': opex_coef,
+            'sigma_energia': sigma,
+        }
+
+    def predict(self, planta: PlantaBase, fitted: Dict[str, Any], days: np.ndarray) -> Dict[str, np.ndarray]:
+        """Energía, ingresos, OPEX y margen diarios pronosticados"""
+        elapsed = (days - fitted['last_day']).astype(np.float64)
+        t = np.minimum(elapsed, MAX_TREND_DAYS) / DAYS_PER_YEAR
+        a, b = fitted['energy_coef']
+        c0, c1 = fitted['opex_coef']
+
+        energia = np.maximum(self.clear_sky(planta, days) * (a + b * t), 0.0)
+        ingresos = energia * planta.tarifa_usd_mwh / 1000
+        opex = np.maximum(c0 + c1 * t, 0.0)
+        return {'energia': energia, 'ingresos': ingresos, 'opex': opex, 'margen': ingresos - opex}
+
+    def forecast(self, planta_id: Optional[str] = None) -> Dict[str, Any]:
+        """Próximos 7 días, cierre del mes y ROI/payback"""
+        planta = self._planta(planta_id)
+        today = offset_table(plant_timezone(planta)).today()
+        key = (planta_id, data_loader.version, today)
+        with self._lock:
+            cached = self._cache.get(key)
+        record_cache("forecast", hits=int(cached is not None), misses=int(cached is None))
+        if cached is not None:
+            return cached
+
+        keys, sums = self._daily(planta_id)
+        fitted = self.fit(planta, keys, sums)
+        last_day = fitted['last_day']
+        start = max(last_day + 1, _as_days(today))
+        # Datos viejos: no se pronostican los días pasados sin datos, solo se informan
+        dias_sin_datos = int((start - last_day - 1).astype(np.int64))
+        stale = dias_sin_datos > MAX_TREND_DAYS
+
+        # Próximos 7 días
+        week = start + np.arange(7)
+        week_pred = self.predict(planta, fitted, week)
+        band = 1.2816 * fitted['sigma_energia'] * np.sqrt(len(week))  # p10-p90
+
+        # Cierre de mes: real del mes hasta el último dato + pronóstico del resto
+        month = start.astype('datetime64[M]')
+        month_start, month_end = month.astype('datetime64[D]'), (month + 1).astype('datetime64[D]')
+        in_month = keys >= month_start
+        real = sums[in_month]
+        rest_start = start if stale else max(last_day + 1, month_start)
+        rest = np.arange(rest_start, month_end, dtype='datetime64[D]')
+        rest_pred = self.predict(planta, fitted, rest)
+        real_energia = float(real[:, ENERGIA].sum())
+        real_ingresos = real_energia * planta.tarifa_usd_mwh / 1000
+        real_opex = float(real[:, OPEX].sum())
+
+        # ROI/payback: año siguiente con el rendimiento actual (sin tendencia)
+        year = start + np.arange(365)
+        annual_energia = float(self.clear_sky(planta, year).sum() * fitted['energy_coef'][0])
+        annual_margen = annual_energia * planta.tarifa_usd_mwh / 1000 - max(float(fitted['opex_coef'][0]), 0.0) * 365
+        capex = planta.potencia_dc_mwp * 1e6 * settings.capex_usd_per_wp
+        a, b = fitted['energy_coef']
+
+        result = {
+            'planta_id': planta_id,
+            'datos_hasta': str(last_day),
+            'dias_sin_datos': dias_sin_datos,
+            'datos_desactualizados': stale,
+            'dias_ajuste': fitted['dias_ajuste'],
+            'tendencia_anual_pct': round(float(b / a * 100), 2) if a > 0 else 0.0,
+            'proximos_dias': [
+                {
+                    'fecha': str(day),
+                    'energia_kwh': round(float(week_pred['energia'][i]), 2),
+                    'ingresos_usd': round(float(week_pred['ingresos'][i]), 2),
+                    'margen_usd': round(float(week_pred['margen'][i]), 2),
+                }
+                for i, day in enumerate(week)
+            ],
+            'total_7_dias': {
+                'periodo': f"{week[0]}/{week[-1]}",
+                'dias_reales': 0,
+                'dias_pronosticados': len(week),
+                'energia_kwh': round(float(week_pred['energia'].sum()), 2),
+                'energia_kwh_p10': round(max(float(week_pred['energia'].sum()) - band, 0.0), 2),
+                'energia_kwh_p90': round(float(week_pred['energia'].sum()) + band, 2),
+                'ingresos_usd': round(float(week_pred['ingresos'].sum()), 2),
+                'margen_usd': round(float(week_pred['margen'].sum()), 2),
+            },
+            'cierre_mes': self._month_summary(month, real, real_energia, real_ingresos, real_opex,
+                                              rest_pred, fitted['sigma_energia']),
+            'capex_estimado_usd': round(capex, 2),
+            'margen_anual_estimado_usd': round(annual_margen, 2),
+            'roi_estimado_pct': round(annual_margen / capex * 100, 2) if capex > 0 else None,
+            'payback_years': round(capex / annual_margen, 1) if annual_margen > 0 else None,
+        }
+
+        with self._lock:
+            self._cache = {k: v for k, v in self._cache.items() if k[1:] == key[1:]}
+            self._cache[key] = result
+        return result
+
+    @staticmethod
+    def _month_summary(
+        month: np.datetime64,
+        real: np.ndarray,
+        real_energia: float,
+        real_ingresos: float,
+        real_opex: float,
+        pred: Dict[str, np.ndarray],
+        sigma: float
+    ) -> Dict[str, Any]:
+        energia = real_energia + float(pred['energia'].sum())
+        band = 1.2816 * sigma * np.sqrt(len(pred['energia']))
+        ingresos = real_ingresos + float(pred['ingresos'].sum())
+        return {
+            'periodo': str(month),
+            'dias_reales': len(real),
+            'dias_pronosticados': len(pred['energia']),
+            'energia_kwh': round(energia, 2),
+            'energia_kwh_p10': round(max(energia - band, real_energia), 2),
+            'energia_kwh_p90': round(energia + band, 2),
+            'ingresos_usd': round(ingresos, 2),
+            'margen_usd': round(ingresos - real_opex - float(pred['opex'].sum()), 2),
+        }
+
+    def trend_pct(self, desde: date, planta_id: Optional[str] = None) -> Optional[float]:
+        """
+        Variación del rendimiento normalizado por cielo despejado a lo largo del rango
+
+        Quita la estacionalidad solar antes de medir la tendencia, así un
+        rango que cruza el invierno no se ve "en baja" solo por tener menos sol.
+        """
+        planta = self._planta(planta_id)
+        keys, sums = self._daily(planta_id)
+        keep = keys >= _as_days(desde)
+        keys, sums = keys[keep], sums[keep]
+        if len(keys) < MIN_FIT_DAYS:
+            return None
+        t = (keys - keys[0]).astype(np.float64) / DAYS_PER_YEAR
+        cs = self.clear_sky(planta, keys)
+        a, b = np.linalg.lstsq(np.column_stack([cs, cs * t]), sums[:, ENERGIA], rcond=None)[0]
+        return float(b * t[-1] / a * 100) if a > 0 else None
+
+# Instancia global
+forecaster = Forecaster()
@@ -1,56 +1,77 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from app.models.schemas import KPIsEjecutivos, Ticket
 from app.services.data_loader import data_loader
 from app.services.realtime_simulator import realtime_simulator
+from app.services.anomaly_detector import anomaly_detector
+from app.services.forecasting import forecaster
+from app.services.timeseries_store import summarize_vector
+from app.services.rollups import COUNT_COLUMN, SUM_FIELDS
 from app.core.config import settings
+from app.core.metrics import record_cache, timed
+
+RANGES = ["30d", "90d", "YTD", "12m"]
+RANGE_DAYS = {"30d": 30, "90d": 90, "12m": 365}
 
 class KPICalculator:
     """Servicio para calcular KPIs ejecutivos"""
     
+    def __init__(self):
+        # Ventanas por rango; la clave incluye la versión de datos y el día
+        # local de la planta, así que se renuevan a su medianoche
+        self._windows: Dict[Tuple[str, int, date], np.ndarray] = {}
+    
+    @timed("kpis.executive")
     def calculate_executive_kpis(self, date_range: str = "30d") -> KPIsEjecutivos:
         """Calcula KPIs consolidados para CEO/CFO/COO"""
         if not data_loader.planta_data or not data_loader.historico:
             raise ValueError("Datos no cargados")
         
-        # Filtrar histórico por rango
-        filtered_hist = self._filter_by_range(data_loader.historico, date_range)
+        # Primer día con datos del rango (búsqueda binaria sobre la vista diaria)
+        desde = data_loader.historico.first_fecha(self.range_start(date_range).strftime('%Y-%m-%d'))
         
-        if not filtered_hist:
+        if desde is None:
             raise ValueError(f"No hay datos históricos para el rango {date_range}")
         
         planta = data_loader.planta_data.planta
         
+        # Totales de la ventana desde el store columnar (cualquier resolución)
+        window = self._window(date_range)
+        totals = summarize_vector(window)
+        
         # KPIs CEO
-        energia_real = sum(h.energia_real_kwh for h in filtered_hist)
-        energia_esperada = sum(h.energia_esperada_kwh for h in filtered_hist)
+        energia_real = totals['energia_real_kwh']
+        energia_esperada = totals['energia_esperada_kwh']
         desviacion_pct = ((energia_real - energia_esperada) / energia_esperada * 100) if energia_esperada > 0 else 0
         
-        # Tendencia simple
-        if len(filtered_hist) >= 2:
-            first_half = filtered_hist[:len(filtered_hist)//2]
-            second_half = filtered_hist[len(filtered_hist)//2:]
-            avg_first = sum(h.energia_real_kwh for h in first_half) / len(first_half)
-            avg_second = sum(h.energia_real_kwh for h in second_half) / len(second_half)
-            tendencia = "up" if avg_second > avg_first * 1.02 else "down" if avg_second < avg_first * 0.98 else "stable"
-        else:
+        # Tendencia del rendimiento normalizado por cielo despejado dentro del rango
+        trend = forecaster.trend_pct(self.range_start(date_range).date())
+        if trend is None:
             tendencia = "stable"
+        else:
+            tendencia = "up" if trend > 2 else "down" if trend < -2 else "stable"
         
         co2_evitado = energia_real * settings.co2_factor_kg_per_kwh
         
         # Alertas (basadas en umbrales)
-        alertas = self._calculate_alertas(filtered_hist)
+        alertas = self._calculate_alertas(window, desde)
         
         # KPIs CFO
-        ingresos = sum(h.ingresos_estimados_usd for h in filtered_hist)
-        opex = sum(h.opex_estimado_usd for h in filtered_hist)
+        ingresos = totals['ingresos_estimados_usd']
+        opex = totals['opex_estimado_usd']
         margen_bruto = ingresos - opex
         margen_bruto_pct = (margen_bruto / ingresos * 100) if ingresos > 0 else 0
         costo_por_kwh = opex / energia_real if energia_real > 0 else 0
         
-        # ROI simplificado (estimación)
-        roi_estimado = None
-        payback_years = None
+        # ROI y payback del pronóstico (margen anual proyectado vs CAPEX estimado)
+        try:
+            forecast = forecaster.forecast()
+            roi_estimado = forecast['roi_estimado_pct']
+            payback_years = forecast['payback_years']
+        except ValueError:
+            roi_estimado = None
+            payback_years = None
         
         variaciones = {
             "energia_vs_esperada_pct": desviacion_pct,
@@ -59,8 +80,8 @@ class KPICalculator:
         }
         
         # KPIs COO
-        pr_promedio = sum(h.pr_real for h in filtered_hist) / len(filtered_hist)
-        availability_promedio = sum(h.availability_real_pct for h in filtered_hist) / len(filtered_hist)
+        pr_promedio = totals['pr_real']
+        availability_promedio = totals['availability_real_pct']
         
         # Potencia actual (de simulación)
         current_point = realtime_simulator.get_current_point()
@@ -74,19 +95,12 @@ class KPICalculator:
         else:
             estado_sistema = "normal"
         
-        # Backlog de tickets
-        tickets_pendientes = [
-            t for t in data_loader.tickets
-            if t.estado.lower() in ['pendiente', 'en progreso', 'bloqueado']
-        ]
-        backlog_total = sum(t.costo_estimado_usd for t in tickets_pendientes)
+        # Backlog de tickets (sobre las columnas: solo el top se materializa)
+        pendientes = data_loader.tickets.pending_mask()
+        backlog_total = float(data_loader.tickets.column('costo_estimado_usd')[pendientes].sum())
         
         # Top 5 tickets por costo
-        top_tickets = sorted(
-            tickets_pendientes,
-            key=lambda x: x.costo_estimado_usd,
-            reverse=True
-        )[:5]
+        top_tickets = data_loader.tickets.query("pendiente", "costo_desc", 5)
         
         return KPIsEjecutivos(
             # CEO
@@ -113,54 +127,151 @@ class KPICalculator:
             potencia_actual_kw=round(potencia_actual, 2),
             estado_sistema=estado_sistema,
             backlog_total_usd=round(backlog_total, 2),
-            tickets_pendientes=len(tickets_pendientes),
+            tickets_pendientes=int(pendientes.sum()),
             top_tickets=top_tickets
         )
     
-    def _filter_by_range(self, historico: List, date_range: str) -> List:
-        """Filtra histórico por rango de fechas"""
-        now = datetime.now()
-        
-        if date_range == "30d":
-            start_date = now - timedelta(days=30)
-        elif date_range == "90d":
-            start_date = now - timedelta(days=90)
-        elif date_range == "YTD":
-            start_date = datetime(now.year, 1, 1)
-        elif date_range == "12m":
-            start_date = now - timedelta(days=365)
-        else:
-            start_date = now - timedelta(days=30)
+    def evaluate_thresholds(
+        self,
+        ranges: List[str] = RANGES,
+        planta_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Evalúa las reglas de Umbrales para todas las plantas y rangos a la vez
         
-        return [
-            h for h in historico
-            if datetime.strptime(h.fecha, '%Y-%m-%d') >= start_date
-        ]
-    
-    def _calculate_alertas(self, historico: List) -> List[str]:
-        """Calcula alertas basadas en umbrales"""
+        Las ventanas salen de sumas prefijo sobre los rollups diarios y se
+        evalúan juntas (plantas × rangos) en una sola pasada.
+        """
         if not data_loader.planta_data:
-            return []
+            raise ValueError("Datos no cargados")
+        
+        plantas = [planta_id] if planta_id else list(data_loader.rollups.plants())
+        starts = [self.range_start(date_range).date() for date_range in ranges]
+        windows = data_loader.rollups.window_sums(starts, plantas)
+        rules = data_loader.threshold_rules
+        result = rules.evaluate(windows.reshape(-1, windows.shape[-1]))
         
         alertas = []
-        planta = data_loader.planta_data.planta
-        umbrales = data_loader.planta_data.umbrales
+        for p, planta in enumerate(plantas):
+            for r, date_range in enumerate(ranges):
+                for alerta in rules.alerts(result, column=p * len(ranges) + r):
+                    alertas.append({'planta_id': planta, 'range': date_range, **alerta})
+        return alertas
+    
+    def loss_waterfall(
+        self,
+        desde: date,
+        hasta: date,
+        planta_id: Optional[str] = None,
+        granularity: str = "month"
+    ) -> Dict:
+        """
+        Cascada esperada → curtailment → soiling → otros → real
         
-        # PR bajo
-        pr_promedio = sum(h.pr_real for h in historico) / len(historico)
-        umbral_pr = next((u for u in umbrales if u.kpi.lower() == 'pr'), None)
+        Sale de la tabla diaria reagrupada por período (rollups o, con
+        DATASET_DB, un SUM en SQL), así que cualquier rango cuesta
+        O(días del rango) sin tocar filas crudas en memoria.
+        """
+        keys, sums = data_loader.period_sums(granularity, planta_id, desde, hasta)
+        if not len(keys) or sums[:, COUNT_COLUMN].sum() <= 0:
+            raise ValueError(f"No hay datos históricos para el rango {desde} a {hasta}")
         
-        if umbral_pr and pr_promedio < umbral_pr.umbral_rojo:
-            alertas.append(f"PR crítico: {pr_promedio:.2%} (objetivo: {planta.target_pr:.2%})")
-        elif umbral_pr and pr_promedio < umbral_pr.umbral_amarillo:
-            alertas.append(f"PR bajo: {pr_promedio:.2%} (objetivo: {planta.target_pr:.2%})")
+        columns = {
+            field: sums[:, SUM_FIELDS.index(field)]
+            for field in ('energia_esperada_kwh', 'curtailment_kwh', 'perdida_soiling_kwh',
+                          'perdida_otros_kwh', 'energia_real_kwh')
+        }
+        no_explicada = (
+            columns['energia_esperada_kwh'] - columns['curtailment_kwh']
+            - columns['perdida_soiling_kwh'] - columns['perdida_otros_kwh']
+            - columns['energia_real_kwh']
+        )
         
-        # Availability baja
-        avail_promedio = sum(h.availability_real_pct for h in historico) / len(historico)
-        umbral_avail = next((u for u in umbrales if u.kpi.lower() == 'availability'), None)
+        periodos = []
+        for i, periodo in enumerate(keys.astype(str).tolist()):
+            periodos.append({
+                'periodo': periodo,
+                **{field: round(float(values[i]), 2) for field, values in columns.items()},
+                'no_explicada_kwh': round(float(no_explicada[i]), 2),
+            })
+        
+        totals = {field: float(values.sum()) for field, values in columns.items()}
+        esperada = totals['energia_esperada_kwh']
+        pasos = [
+            ('energia_esperada', esperada),
+            ('curtailment', -totals['curtailment_kwh']),
+            ('soiling', -totals['perdida_soiling_kwh']),
+            ('otros', -totals['perdida_otros_kwh']),
+            ('no_explicada', -float(no_explicada.sum())),
+            ('energia_real', totals['energia_real_kwh']),
+        ]
+        
+        return {
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'planta_id': planta_id,
+            'granularity': granularity,
+            'pasos': [
+                {
+                    'concepto': concepto,
+                    'kwh': round(kwh, 2),
+                    'pct_esperada': round(kwh / esperada * 100, 2) if esperada > 0 else 0.0
+                }
+                for concepto, kwh in pasos
+            ],
+            'periodos': periodos,
+        }
+    
+    def range_start(self, date_range: str) -> datetime:
+        """
+        Inicio de un rango (30d, 90d, YTD, 12m)
+        
+        Medianoche local de la planta del primer día completo del rango
+        (naive, misma convención que el histórico). "30d" son los últimos 30
+        días calendario incluyendo hoy.
+        """
+        today = data_loader.clock.today()
+        
+        if date_range == "YTD":
+            start = date(today.year, 1, 1)
+        else:
+            start = today - timedelta(days=RANGE_DAYS.get(date_range, 30) - 1)
+        return datetime(start.year, start.month, start.day)
+    
+    def today(self) -> date:
+        """Fecha actual en la zona horaria de la planta"""
+        return data_loader.clock.today()
+    
+    def _window(self, date_range: str) -> np.ndarray:
+        """Vector de rollup de la ventana, cacheado hasta el próximo cambio de datos o de día local"""
+        key = (date_range, data_loader.version, data_loader.clock.today())
+        window = self._windows.get(key)
+        record_cache("kpi_window", hits=int(window is not None), misses=int(window is None))
+        if window is None:
+            if any(k[1:] != key[1:] for k in self._windows):
+                self._windows = {}
+            window = data_loader.window_vector(self.range_start(date_range))
+            self._windows[key] = window
+        return window
+    
+    def _calculate_alertas(self, window: np.ndarray, desde: str) -> List[str]:
+        """Calcula alertas evaluando las reglas de Umbrales sobre la ventana"""
+        if not data_loader.planta_data:
+            return []
+        
+        rules = data_loader.threshold_rules
+        alertas = [
+            f"{a['descripcion']} (actual: {a['valor_formateado']})"
+            for a in rules.alerts(rules.evaluate(window.reshape(1, -1)))
+        ]
         
-        if umbral_avail and avail_promedio < umbral_avail.umbral_rojo:
-            alertas.append(f"Disponibilidad crítica: {avail_promedio:.1f}% (objetivo: {planta.target_availability:.1f}%)")
+        # Episodios anómalos dentro de la ventana (un colapso de pocos días no mueve el promedio)
+        for evento in anomaly_detector.get_events(since=desde, min_severity="amarillo", fuente="historico"):
+            nivel = "crítica" if evento['severidad'] == "rojo" else "detectada"
+            alertas.append(
+                f"Anomalía {nivel} en {evento['kpi']} desde {evento['timestamp'][:10]}: "
+                f"{evento['valor']:.4g} (línea base {evento['linea_base']:.4g})"
+            )
         
         return alertas[:5]  # Máximo 5 alertas
 
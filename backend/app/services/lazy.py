@@ -0,0 +1,46 @@
+import logging
+from typing import Dict, Iterable, Optional
+
+from app.core.lazy import LazyService
+
+logger = logging.getLogger(__name__)
+
+# Servicios con dependencias pesadas (reportlab, openai, twilio) que solo se
+# cargan cuando un endpoint los usa por primera vez
+pdf_generator = LazyService("app.services.pdf_generator", "pdf_generator")
+tts_service = LazyService("app.services.tts_service", "tts_service")
+whatsapp_service = LazyService("app.services.whatsapp_service", "whatsapp_service")
+outbound_queue = LazyService("app.services.message_queue", "outbound_queue")
+provider_http = LazyService("app.services.provider_http", "provider_http")
+
+LAZY_SERVICES: Dict[str, LazyService] = {
+    "pdf_generator": pdf_generator,
+    "tts_service": tts_service,
+    "whatsapp_service": whatsapp_service,
+    "outbound_queue": outbound_queue,
+    "provider_http": provider_http,
+}
+
+def warmup(names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    Inicializa por adelantado los servicios indicados (todos por defecto)
+
+    Returns:
+        dict servicio -> segundos de carga
+    """
+    selected = list(names) if names else list(LAZY_SERVICES)
+    timings = {}
+    for name in selected:
+        service = LAZY_SERVICES.get(name)
+        if service is None:
+            logger.warning(f"Warmup: servicio desconocido '{name}'")
+            continue
+        try:
+            service.resolve()
+            timings[name] = round(service.load_seconds or 0.0, 4)
+        except Exception as e:
+            logger.warning(f"Warmup: no se pudo inicializar {name}: {e}")
+    return timings
+
+def loaded_services() -> Dict[str, bool]:
+    return {name: service.loaded for name, service in LAZY_SERVICES.items()}
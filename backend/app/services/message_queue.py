@@ -0,0 +1,498 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Estados de un mensaje saliente
+STATUS_QUEUED = "queued"
+STATUS_SENDING = "sending"
+STATUS_RETRYING = "retrying"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbound_messages (
+    id TEXT PRIMARY KEY,
+    batch_id TEXT,
+    provider TEXT NOT NULL,
+    to_phone TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    body TEXT,
+    audio_path TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    sid TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbound_due ON outbound_messages (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_outbound_batch ON outbound_messages (batch_id);
+"""
+
+class PermanentSendError(Exception):
+    """Error de envío que no debe reintentarse"""
+
+class TokenBucket:
+    """Rate limiter de tipo token bucket (thread-safe)"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Bloquea hasta obtener un token; devuelve False si se pidió detener"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop is not None:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+def is_permanent_twilio_error(error: BaseException) -> bool:
+    """Errores 4xx de Twilio (número inválido, remitente no verificado...) salvo 429 (rate limit)"""
+    from twilio.base.exceptions import TwilioRestException
+
+    return (
+        isinstance(error, TwilioRestException)
+        and 400 <= (error.status or 0) < 500
+        and error.status != 429
+    )
+
+class TwilioProvider:
+    """Proveedor que delega en WhatsAppService (Twilio o modo simulación)"""
+
+    name = "twilio"
+
+    def send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        from app.services.whatsapp_service import whatsapp_service
+
+        try:
+            if message["kind"] == "audio":
+                return whatsapp_service.send_audio(message["to_phone"], message["audio_path"])
+            return whatsapp_service.send_text(message["to_phone"], message["body"])
+        except FileNotFoundError as e:
+            raise PermanentSendError(str(e))
+        except ValueError as e:
+            # Sin causa: validación local (número no E.164); con causa 4xx: rechazo de Twilio
+            if e.__cause__ is None or is_permanent_twilio_error(e.__cause__):
+                raise PermanentSendError(str(e)) from e
+            raise
+
+class FakeWhatsAppProvider:
+    """Proveedor local sin red para pruebas de carga"""
+
+    name = "fake"
+
+    def __init__(self, latency_seconds: float = 0.0, failure_rate: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("Fallo simulado del proveedor")
+        with self._lock:
+            self.sent += 1
+        return {
+            "success": True,
+            "mode": "fake",
+            "sid": f"FAKE_{uuid.uuid4().hex[:12]}",
+            "status": "sent"
+        }
+
+def build_provider(name: str):
+    """Crea el proveedor configurado"""
+    if name == "fake":
+        return FakeWhatsAppProvider(
+            latency_seconds=settings.whatsapp_fake_latency_ms / 1000,
+            failure_rate=settings.whatsapp_fake_failure_rate
+        )
+    if name == "twilio":
+        return TwilioProvider()
+    raise ValueError(f"Proveedor de WhatsApp desconocido: {name}")
+
+class OutboundQueue:
+    """
+    Cola persistente (SQLite) de mensajes salientes de WhatsApp
+
+    Un pool de workers toma lotes de mensajes vencidos, respeta el rate
+    limit del proveedor y reintenta con backoff exponencial.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        provider=None,
+        workers: int = 4,
+        batch_size: int = 10,
+        max_attempts: int = 5,
+        backoff_base_seconds: float = 2.0,
+        backoff_max_seconds: float = 300.0,
+        rate_per_second: float = 1.0,
+        rate_burst: int = 1,
+        lease_seconds: float = 300.0
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.provider = provider
+        self.num_workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.rate_limiter = TokenBucket(rate_per_second, rate_burst)
+        # Un mensaje "sending" sin actualizar por más de esto se considera
+        # abandonado (proceso caído) y vuelve a tomarse
+        self.lease_seconds = lease_seconds
+
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+
+        # Los mensajes "sending" no se resetean al iniciar: con varios workers de
+        # uvicorn pueden estar en manos de otro proceso. Se recuperan al vencer
+        # su lease (ver _claim_batch).
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- Encolado ----------
+
+    def enqueue_text(self, to_phone: str, message: str, batch_id: Optional[str] = None) -> str:
+        """Encola un mensaje de texto y devuelve su id"""
+        return self._enqueue_many([to_phone], "text", message, None, batch_id)[0]
+
+    def enqueue_audio(self, to_phone: str, audio_path: str, batch_id: Optional[str] = None) -> str:
+        """Encola un envío de audio y devuelve su id"""
+        if not Path(audio_path).exists():
+            raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
+        return self._enqueue_many([to_phone], "audio", None, audio_path, batch_id)[0]
+
+    def broadcast(
+        self,
+        recipients: List[str],
+        message: Optional[str] = None,
+        audio_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Encola el mismo mensaje para una lista de distribución"""
+        if not recipients:
+            raise ValueError("La lista de destinatarios está vacía")
+        if not message and not audio_path:
+            raise ValueError("Se requiere 'message' o 'audio_path'")
+        if audio_path and not Path(audio_path).exists():
+            raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
+
+        # Un destinatario repetido recibe un único mensaje
+        unique_recipients = list(dict.fromkeys(recipients))
+        batch_id = uuid.uuid4().hex
+        kind = "audio" if audio_path else "text"
+        ids = self._enqueue_many(unique_recipients, kind, message, audio_path, batch_id)
+
+        return {
+            "batch_id": batch_id,
+            "queued": len(ids),
+            "message_ids": ids
+        }
+
+    def _enqueue_many(
+        self,
+        recipients: List[str],
+        kind: str,
+        body: Optional[str],
+        audio_path: Optional[str],
+        batch_id: Optional[str]
+    ) -> List[str]:
+        for phone in recipients:
+            if not phone.startswith('+'):
+                raise ValueError(
+                    f"El número de teléfono debe estar en formato E.164 (comenzar con +): {phone}"
+                )
+
+        now = time.time()
+        rows = [
+            (
+                uuid.uuid4().hex, batch_id, self.provider.name, phone, kind, body,
+                audio_path, STATUS_QUEUED, self.max_attempts, now, now, now
+            )
+            for phone in recipients
+        ]
+        conn = self._conn()
+        conn.execute("BEGIN")
+        conn.executemany(
+            """
+            INSERT INTO outbound_messages (
+                id, batch_id, provider, to_phone, kind, body, audio_path,
+                status, max_attempts, next_attempt_at, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        conn.execute("COMMIT")
+
+        self.start()
+        self._wakeup.set()
+        return [row[0] for row in rows]
+
+    # ---------- Consulta de estado ----------
+
+    def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT * FROM outbound_messages WHERE id = ?", (message_id,)
+        ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT * FROM outbound_messages WHERE batch_id = ? ORDER BY created_at",
+            (batch_id,)
+        ).fetchall()
+        if not rows:
+            return None
+
+        counts: Dict[str, int] = {}
+        for row in rows:
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+
+        return {
+            "batch_id": batch_id,
+            "total": len(rows),
+            "status_counts": counts,
+            "messages": [self._row_to_dict(row) for row in rows]
+        }
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) AS n FROM outbound_messages GROUP BY status"
+        ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "message_id": row["id"],
+            "batch_id": row["batch_id"],
+            "provider": row["provider"],
+            "to_phone": row["to_phone"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "last_error": row["last_error"],
+            "sid": row["sid"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    # ---------- Workers ----------
+
+    def start(self) -> None:
+        """Inicia el pool de workers (idempotente)"""
+        with self._start_lock:
+            if self._workers:
+                return
+            self._stop.clear()
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop, name=f"whatsapp-worker-{i}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"Cola WhatsApp: {self.num_workers} workers iniciados ({self.provider.name})")
+
+    def resume_pending(self) -> int:
+        """Arranca los workers si quedaron mensajes pendientes de una ejecución anterior"""
+        pending = self._conn().execute(
+            "SELECT COUNT(*) FROM outbound_messages WHERE status IN (?, ?) "
+            "OR (status = ? AND updated_at <= ?)",
+            (STATUS_QUEUED, STATUS_RETRYING, STATUS_SENDING, time.time() - self.lease_seconds)
+        ).fetchone()[0]
+        if pending:
+            logger.info(f"Cola WhatsApp: reanudando {pending} mensajes pendientes")
+            self.start()
+        return pending
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def wait_idle(self, timeout: float = 30.0) -> bool:
+        """Espera a que no queden mensajes pendientes (útil en pruebas de carga)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            pending = self._conn().execute(
+                "SELECT COUNT(*) FROM outbound_messages WHERE status IN (?, ?, ?)",
+                (STATUS_QUEUED, STATUS_RETRYING, STATUS_SENDING)
+            ).fetchone()[0]
+            if not pending:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        """
+        Marca como 'sending' un lote de mensajes vencidos y lo devuelve
+
+        Incluye mensajes 'sending' cuyo lease venció: el proceso que los
+        tomó se cayó antes de registrar el resultado.
+        """
+        conn = self._conn()
+        with self._claim_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                rows = conn.execute(
+                    """
+                    SELECT * FROM outbound_messages
+                    WHERE (status IN (?, ?) AND next_attempt_at <= ?)
+                       OR (status = ? AND updated_at <= ?)
+                    ORDER BY next_attempt_at
+                    LIMIT ?
+                    """,
+                    (STATUS_QUEUED, STATUS_RETRYING, now,
+                     STATUS_SENDING, now - self.lease_seconds, self.batch_size)
+                ).fetchall()
+                if rows:
+                    conn.executemany(
+                        "UPDATE outbound_messages SET status = ?, updated_at = ? WHERE id = ?",
+                        [(STATUS_SENDING, time.time(), row["id"]) for row in rows]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [dict(row) for row in rows]
+
+    def _next_due_in(self) -> float:
+        row = self._conn().execute(
+            "SELECT MIN(next_attempt_at) FROM outbound_messages WHERE status IN (?, ?)",
+            (STATUS_QUEUED, STATUS_RETRYING)
+        ).fetchone()
+        if row[0] is None:
+            return 1.0
+        return min(1.0, max(0.0, row[0] - time.time()))
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                batch = self._claim_batch()
+            except Exception as e:
+                logger.warning(f"Cola WhatsApp: error tomando lote: {e}")
+                batch = []
+
+            if not batch:
+                self._wakeup.wait(self._next_due_in())
+                self._wakeup.clear()
+                continue
+
+            for message in batch:
+                # Un error inesperado (p.ej. base bloqueada al registrar el
+                # resultado) no debe terminar el worker; el mensaje queda
+                # "sending" y se recupera al vencer su lease
+                try:
+                    if not self.rate_limiter.acquire(self._stop):
+                        # Detención solicitada: devolver el mensaje a la cola
+                        self._update(message["id"], status=STATUS_QUEUED)
+                        continue
+                    self._deliver(message)
+                except Exception:
+                    logger.exception(f"Cola WhatsApp: error procesando el mensaje {message['id']}")
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        attempts = message["attempts"] + 1
+        try:
+            result = self.provider.send(message)
+            self._update(
+                message["id"],
+                status=STATUS_SENT,
+                attempts=attempts,
+                sid=result.get("sid"),
+                last_error=None
+            )
+        except PermanentSendError as e:
+            logger.error(f"Cola WhatsApp: envío a {message['to_phone']} fallido: {e}")
+            self._update(message["id"], status=STATUS_FAILED, attempts=attempts, last_error=str(e))
+        except Exception as e:
+            if attempts >= message["max_attempts"]:
+                logger.error(
+                    f"Cola WhatsApp: envío a {message['to_phone']} fallido tras {attempts} intentos: {e}"
+                )
+                self._update(message["id"], status=STATUS_FAILED, attempts=attempts, last_error=str(e))
+                return
+
+            delay = min(
+                self.backoff_max_seconds,
+                self.backoff_base_seconds * (2 ** (attempts - 1))
+            ) * random.uniform(0.8, 1.2)
+            logger.warning(
+                f"Cola WhatsApp: reintento {attempts} para {message['to_phone']} en {delay:.1f}s: {e}"
+            )
+            self._update(
+                message["id"],
+                status=STATUS_RETRYING,
+                attempts=attempts,
+                last_error=str(e),
+                next_attempt_at=time.time() + delay
+            )
+
+    def _update(self, message_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._conn().execute(
+            f"UPDATE outbound_messages SET {assignments} WHERE id = ?",
+            (*fields.values(), message_id)
+        )
+
+def create_outbound_queue(provider_name: Optional[str] = None) -> OutboundQueue:
+    """Crea la cola usando la configuración de la aplicación"""
+    provider = build_provider(provider_name or settings.whatsapp_queue_provider)
+    return OutboundQueue(
+        db_path=settings.whatsapp_queue_db,
+        provider=provider,
+        workers=settings.whatsapp_queue_workers,
+        batch_size=settings.whatsapp_queue_batch_size,
+        max_attempts=settings.whatsapp_queue_max_attempts,
+        backoff_base_seconds=settings.whatsapp_queue_backoff_seconds,
+        rate_per_second=settings.whatsapp_rate_per_second,
+        rate_burst=settings.whatsapp_rate_burst,
+        lease_seconds=settings.whatsapp_queue_lease_seconds
+    )
+
+# Instancia global
+outbound_queue = create_outbound_queue()
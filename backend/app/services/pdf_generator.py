@@ -12,6 +12,7 @@ from pathlib import Path
 import io
 from typing import Optional
 
+from app.core.metrics import timed
 from app.services.data_loader import data_loader
 from app.services.kpi_calculator import kpi_calculator
 
@@ -22,6 +23,7 @@ class PDFReportGenerator:
         self.output_folder = Path(output_folder)
         self.output_folder.mkdir(parents=True, exist_ok=True)
         
+    @timed("pdf.build")
     def generate_executive_report(self, date_range: str = "30d") -> str:
         """Genera reporte ejecutivo en PDF"""
         if not data_loader.planta_data:
@@ -0,0 +1,256 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Evento de httpcore emitido solo cuando se abre una conexión TCP nueva
+_NEW_CONNECTION_EVENT = "connection.connect_tcp.complete"
+
+class ConnectionStats:
+    """Contadores de requests y conexiones nuevas de un proveedor"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, requests: int = 0, new_connections: int = 0, errors: int = 0) -> None:
+        with self._lock:
+            self.requests += requests
+            self.new_connections += new_connections
+            self.errors += errors
+
+    def as_dict(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.new_connections)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            "errors": self.errors
+        }
+
+class ProviderHTTPPool:
+    """
+    Clientes HTTP compartidos (sync y async) por proveedor externo
+
+    Cada proveedor tiene su propio pool de conexiones keep-alive, con
+    timeouts y límite de conexiones concurrentes configurables. Las
+    requests que superan el límite esperan una conexión libre del pool.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: float = 30.0,
+        connect_timeout_seconds: float = 5.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_seconds: float = 30.0
+    ):
+        self.timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds
+        )
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, ConnectionStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, provider: str) -> ConnectionStats:
+        with self._lock:
+            if provider not in self._stats:
+                self._stats[provider] = ConnectionStats()
+            return self._stats[provider]
+
+    def client(self, provider: str) -> httpx.Client:
+        """Cliente sync compartido para el proveedor (se crea al primer uso)"""
+        with self._lock:
+            if provider in self._clients:
+                return self._clients[provider]
+
+        stats = self._stats_for(provider)
+
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == _NEW_CONNECTION_EVENT:
+                stats.add(new_connections=1)
+
+        def on_request(request: httpx.Request) -> None:
+            request.extensions["trace"] = trace
+
+        def on_response(response: httpx.Response) -> None:
+            stats.add(requests=1)
+
+        client = httpx.Client(
+            timeout=self.timeout,
+            limits=self.limits,
+            event_hooks={"request": [on_request], "response": [on_response]}
+        )
+        with self._lock:
+            # Otro thread pudo crearlo mientras tanto
+            existing = self._clients.setdefault(provider, client)
+        if existing is not client:
+            client.close()
+        return existing
+
+    def async_client(self, provider: str) -> httpx.AsyncClient:
+        """Cliente async compartido para el proveedor (se crea al primer uso)"""
+        with self._lock:
+            if provider in self._async_clients:
+                return self._async_clients[provider]
+
+        stats = self._stats_for(provider)
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == _NEW_CONNECTION_EVENT:
+                stats.add(new_connections=1)
+
+        async def on_request(request: httpx.Request) -> None:
+            request.extensions["trace"] = trace
+
+        async def on_response(response: httpx.Response) -> None:
+            stats.add(requests=1)
+
+        client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=self.limits,
+            event_hooks={"request": [on_request], "response": [on_response]}
+        )
+        with self._lock:
+            self._async_clients.setdefault(provider, client)
+            return self._async_clients[provider]
+
+    def record_error(self, provider: str) -> None:
+        self._stats_for(provider).add(errors=1)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            providers = list(self._stats.items())
+        return {name: stats.as_dict() for name, stats in providers}
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._async_clients.values())
+            self._async_clients = {}
+        for client in clients:
+            await client.aclose()
+
+def rewrite_base_url(url: str, base_url: Optional[str]) -> str:
+    """Reemplaza esquema y host de `url` por los de `base_url` (servidor sustituto)"""
+    if not base_url:
+        return url
+    target = urlsplit(url)
+    base = urlsplit(base_url)
+    path = base.path.rstrip("/") + target.path
+    return urlunsplit((base.scheme, base.netloc, path, target.query, target.fragment))
+
+def _twilio_request_kwargs(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, object]],
+    data: Optional[Dict[str, object]],
+    headers: Optional[Dict[str, str]],
+    auth: Optional[Tuple[str, str]],
+    timeout: Optional[float],
+    allow_redirects: bool
+) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {
+        "method": method.upper(),
+        "url": rewrite_base_url(url, settings.twilio_base_url),
+        "params": params,
+        "data": data,
+        "headers": headers,
+        "auth": auth,
+        "follow_redirects": allow_redirects
+    }
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    return kwargs
+
+def build_twilio_http_client(pool: "ProviderHTTPPool"):
+    """HttpClient de Twilio que usa el pool compartido en lugar de requests"""
+    from twilio.http import HttpClient
+    from twilio.http.response import Response as TwilioResponse
+
+    class PooledTwilioHttpClient(HttpClient):
+        def __init__(self):
+            super().__init__(logging.getLogger("twilio.http_client"), False)
+
+        def request(
+            self,
+            method: str,
+            url: str,
+            params: Optional[Dict[str, object]] = None,
+            data: Optional[Dict[str, object]] = None,
+            headers: Optional[Dict[str, str]] = None,
+            auth: Optional[Tuple[str, str]] = None,
+            timeout: Optional[float] = None,
+            allow_redirects: bool = False,
+        ) -> TwilioResponse:
+            kwargs = _twilio_request_kwargs(
+                method, url, params, data, headers, auth, timeout, allow_redirects
+            )
+            try:
+                response = pool.client("twilio").request(**kwargs)
+            except httpx.HTTPError:
+                pool.record_error("twilio")
+                raise
+            return TwilioResponse(response.status_code, response.text, response.headers)
+
+    return PooledTwilioHttpClient()
+
+def build_async_twilio_http_client(pool: "ProviderHTTPPool"):
+    """AsyncHttpClient de Twilio que usa el pool async compartido"""
+    from twilio.http import AsyncHttpClient
+    from twilio.http.response import Response as TwilioResponse
+
+    class PooledAsyncTwilioHttpClient(AsyncHttpClient):
+        def __init__(self):
+            super().__init__(logging.getLogger("twilio.async_http_client"), True)
+
+        async def request(
+            self,
+            method: str,
+            url: str,
+            params: Optional[Dict[str, object]] = None,
+            data: Optional[Dict[str, object]] = None,
+            headers: Optional[Dict[str, str]] = None,
+            auth: Optional[Tuple[str, str]] = None,
+            timeout: Optional[float] = None,
+            allow_redirects: bool = False,
+        ) -> TwilioResponse:
+            kwargs = _twilio_request_kwargs(
+                method, url, params, data, headers, auth, timeout, allow_redirects
+            )
+            try:
+                response = await pool.async_client("twilio").request(**kwargs)
+            except httpx.HTTPError:
+                pool.record_error("twilio")
+                raise
+            return TwilioResponse(response.status_code, response.text, response.headers)
+
+    return PooledAsyncTwilioHttpClient()
+
+# Instancia global
+provider_http = ProviderHTTPPool(
+    timeout_seconds=settings.provider_http_timeout_seconds,
+    connect_timeout_seconds=settings.provider_http_connect_timeout_seconds,
+    max_connections=settings.provider_http_max_connections,
+    max_keepalive_connections=settings.provider_http_max_keepalive,
+    keepalive_expiry_seconds=settings.provider_http_keepalive_expiry_seconds
+)
@@ -1,96 +1,196 @@
-import random
-import math
-from datetime import datetime, timedelta
-from typing import List
-from app.models.schemas import RealtimeDataPoint
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import timed
+from app.models.schemas import PlantaBase, RealtimeDataPoint
 from app.services.data_loader import data_loader
+from app.services.downsampling import downsample_indices
+from app.services.expected_energy import expected_energy
+from app.services.solar_geometry import STC_IRRADIANCE, solar_lut
+from app.services.timezones import plant_timezone
+
+STEP_SECONDS = 300  # Puntos cada 5 minutos
+BUFFER_HOURS = 168  # Máximo que sirve /api/series/realtime
+
+NOCT_RISE = 25.0  # °C de módulo sobre ambiente a 800 W/m²
 
 class RealtimeSimulator:
-    """Motor de simulación de datos en tiempo real"""
-    
-    def __init__(self):
-        self.start_time = datetime.now()
-        
-    def generate_series(self, hours: int = 24) -> List[RealtimeDataPoint]:
-        """Genera serie temporal simulada para las últimas N horas"""
+    """
+    Motor de simulación de datos en tiempo real
+
+    La curva diaria sale de la posición solar y la irradiancia de cielo
+    despejado en el plano de los módulos para la ubicación de la planta
+    (tablas por día cacheadas en `solar_lut`); encima se aplica ruido de
+    nubosidad y las caídas por tickets críticos.
+
+    Los puntos emitidos (grilla de 5 minutos) se guardan en un buffer de
+    las últimas BUFFER_HOURS: cada consulta solo simula los puntos nuevos
+    y la serie no cambia entre requests, así que la detección de anomalías
+    la puede consumir de forma incremental. Una recarga de datos (o un
+    reloj que retrocede) descarta el buffer e incrementa `generation`.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.start_time = datetime.now(timezone.utc)
+        self._rng = np.random.default_rng(seed)
+        self.generation = 0
+        self._buffer_ts = np.empty(0, dtype=np.int64)
+        self._buffer: Dict[str, np.ndarray] = {}
+        self._loaded_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def simulate(
+        self,
+        planta: PlantaBase,
+        ts: np.ndarray,
+        critical_tickets: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        Simula una planta en timestamps UTC (segundos epoch)
+
+        Returns:
+            dict de arrays: potencia_kw, energia_kwh_intervalo,
+            energia_esperada_kwh_intervalo, irradiancia, temp_modulo,
+            estado_inversores_pct
+        """
+        n = len(ts)
+        rng = self._rng
+        _, poa = solar_lut.lookup(planta, ts)
+
+        # Nubosidad: atenuación multiplicativa sobre cielo despejado
+        irradiancia = poa * rng.uniform(0.92, 1.08, n)
+
+        temp_ambiente = 25.0 + rng.uniform(-2.0, 2.0, n)
+        temp_modulo = temp_ambiente + irradiancia / 800.0 * NOCT_RISE
+
+        # Potencia del modelo de energía esperada (PR, degradación, soiling)
+        esperada = expected_energy.expected_power_kw(planta, irradiancia, ts)
+        potencia = esperada * rng.uniform(0.97, 1.01, n)
+
+        # Simular caídas por tickets críticos
+        if critical_tickets:
+            potencia = potencia * rng.uniform(0.7, 0.95, n)
+
+        producing = poa > 0.1 * STC_IRRADIANCE
+        estado_inversores_pct = np.where(producing, rng.uniform(95, 100, n), 0.0)
+
+        return {
+            'potencia_kw': potencia,
+            'energia_kwh_intervalo': potencia * STEP_SECONDS / 3600,
+            'energia_esperada_kwh_intervalo': esperada * STEP_SECONDS / 3600,
+            'irradiancia': irradiancia,
+            'temp_modulo': temp_modulo,
+            'estado_inversores_pct': estado_inversores_pct,
+        }
+
+    @timed("realtime.series_arrays")
+    def series_arrays(
+        self,
+        hours: int = 24,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb"
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Serie de las últimas N horas en forma columnar
+
+        Con `max_points` se reduce a esa cantidad de puntos eligiéndolos
+        sobre la potencia (LTTB o min/max por bucket).
+
+        Returns:
+            (timestamps UTC en segundos epoch, dict de arrays redondeados a 2 decimales)
+        """
+        num_points = (hours * 60) // 5
+        _, ts, values = self.points_since(None)
+        ts, values = ts[-num_points:], {k: v[-num_points:] for k, v in values.items()}
+
+        keep = downsample_indices(ts, values['potencia_kw'], max_points, downsample)
+        return ts[keep], {k: np.round(v[keep], 2) for k, v in values.items()}
+
+    def points_since(
+        self,
+        after_ts: Optional[int] = None,
+        now: Optional[int] = None
+    ) -> Tuple[int, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Puntos del buffer posteriores a `after_ts` (todos si es None)
+
+        Antes simula los puntos de la grilla que falten hasta `now`.
+
+        Returns:
+            (generation, timestamps UTC en segundos epoch, dict de arrays sin redondear)
+        """
         if not data_loader.planta_data:
             raise ValueError("Datos de planta no cargados")
-        
+
         planta = data_loader.planta_data.planta
-        potencia_ac_kw = planta.potencia_ac_mw * 1000
-        
-        # Generar puntos cada 5 minutos
-        points = []
-        now = datetime.now()
-        num_points = (hours * 60) // 5  # Puntos cada 5 minutos
-        
-        for i in range(num_points):
-            timestamp = now - timedelta(minutes=5 * (num_points - i - 1))
-            
-            # Calcular factor solar basado en hora del día
-            hour = timestamp.hour + timestamp.minute / 60.0
-            solar_factor = self._calculate_solar_factor(hour)
-            
-            # Agregar ruido realista
-            noise = random.uniform(0.92, 1.08)
-            
-            # Calcular potencia base
-            potencia_base = potencia_ac_kw * solar_factor * noise
-            
-            # Simular caídas por tickets críticos
-            if self._has_critical_tickets():
-                potencia_base *= random.uniform(0.7, 0.95)
-            
-            # Calcular irradiancia (proxy)
-            irradiancia = solar_factor * random.uniform(800, 1000)
-            
-            # Temperatura del módulo
-            temp_modulo = 25 + solar_factor * random.uniform(20, 35)
-            
-            # Estado de inversores
-            estado_inversores_pct = random.uniform(95, 100) if solar_factor > 0.1 else 0
-            
-            # Energía del intervalo (5 min = 1/12 hora)
-            energia_kwh = potencia_base / 12
-            
-            point = RealtimeDataPoint(
-                timestamp=timestamp,
-                potencia_kw=round(potencia_base, 2),
-                energia_kwh_intervalo=round(energia_kwh, 2),
-                irradiancia=round(irradiancia, 2),
-                temp_modulo=round(temp_modulo, 2),
-                estado_inversores_pct=round(estado_inversores_pct, 2)
+        now = int(time.time()) if now is None else now
+        end = now - now % STEP_SECONDS
+        horizon = BUFFER_HOURS * 3600 // STEP_SECONDS
+
+        with self._lock:
+            last = int(self._buffer_ts[-1]) if len(self._buffer_ts) else None
+            if data_loader.last_reload != self._loaded_at or (last is not None and end < last):
+                self._reset(data_loader.last_reload)
+                last = None
+
+            first = end - STEP_SECONDS * (horizon - 1)
+            if last is not None:
+                first = max(first, last + STEP_SECONDS)
+            if first <= end:
+                ts = np.arange(first, end + 1, STEP_SECONDS, dtype=np.int64)
+                values = self.simulate(planta, ts, critical_tickets=self._has_critical_tickets())
+                self._buffer_ts = np.concatenate([self._buffer_ts, ts])[-horizon:]
+                self._buffer = {
+                    k: np.concatenate([self._buffer.get(k, np.empty(0)), v])[-horizon:]
+                    for k, v in values.items()
+                }
+
+            lo = int(np.searchsorted(self._buffer_ts, after_ts, side='right')) if after_ts is not None else 0
+            return (
+                self.generation,
+                self._buffer_ts[lo:],
+                {k: v[lo:] for k, v in self._buffer.items()},
             )
-            points.append(point)
-        
-        return points
-    
-    def _calculate_solar_factor(self, hour: float) -> float:
-        """Calcula factor solar basado en curva tipo campana"""
-        # Curva solar: pico a las 13:00, amanecer ~6:00, atardecer ~20:00
-        if hour < 6 or hour > 20:
-            return 0.0
-        
-        # Usar función gaussiana centrada en 13:00
-        center = 13.0
-        width = 4.5
-        factor = math.exp(-((hour - center) ** 2) / (2 * width ** 2))
-        
-        return max(0, factor)
-    
+
+    def _reset(self, loaded_at: Optional[datetime]) -> None:
+        self._buffer_ts = np.empty(0, dtype=np.int64)
+        self._buffer = {}
+        self._loaded_at = loaded_at
+        self.generation += 1
+
+    @timed("realtime.generate_series")
+    def generate_series(
+        self,
+        hours: int = 24,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb"
+    ) -> List[RealtimeDataPoint]:
+        """Genera serie temporal simulada para las últimas N horas (hora local de la planta)"""
+        ts, values = self.series_arrays(hours, max_points, downsample)
+        tz = plant_timezone(data_loader.planta_data.planta)
+        rounded = {k: v.tolist() for k, v in values.items()}
+
+        return [
+            RealtimeDataPoint(
+                timestamp=datetime.fromtimestamp(t, tz),
+                potencia_kw=rounded['potencia_kw'][i],
+                energia_kwh_intervalo=rounded['energia_kwh_intervalo'][i],
+                irradiancia=rounded['irradiancia'][i],
+                temp_modulo=rounded['temp_modulo'][i],
+                estado_inversores_pct=rounded['estado_inversores_pct'][i],
+                energia_esperada_kwh_intervalo=rounded['energia_esperada_kwh_intervalo'][i]
+            )
+            for i, t in enumerate(ts.tolist())
+        ]
+
     def _has_critical_tickets(self) -> bool:
         """Verifica si hay tickets críticos pendientes"""
-        if not data_loader.tickets:
-            return False
-        
-        critical_tickets = [
-            t for t in data_loader.tickets
-            if t.criticidad.lower() in ['alta', 'crítica', 'critica']
-            and t.estado.lower() in ['pendiente', 'en progreso', 'bloqueado']
-        ]
-        
-        return len(critical_tickets) > 0
-    
+        return bool(data_loader.tickets.critical_pending_mask().any())
+
     def get_current_point(self) -> RealtimeDataPoint:
         """Obtiene el punto actual de la simulación"""
         series = self.generate_series(hours=1)
@@ -0,0 +1,289 @@
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Campos del histórico que se acumulan en cada período
+SUM_FIELDS = (
+    'energia_real_kwh',
+    'energia_esperada_kwh',
+    'irradiancia_poa_kwh_m2',
+    'curtailment_kwh',
+    'perdida_soiling_kwh',
+    'perdida_otros_kwh',
+    'ingresos_estimados_usd',
+    'opex_estimado_usd',
+)
+# Campos que se reportan como promedio ponderado por la duración de cada registro
+MEAN_FIELDS = (
+    'pr_real',
+    'availability_real_pct',
+)
+FIELDS = SUM_FIELDS + MEAN_FIELDS
+# Vector acumulable: sumas, sumas ponderadas de promedios, pesos de promedios, conteo
+WEIGHT_OFFSET = len(FIELDS)
+COUNT_COLUMN = len(FIELDS) + len(MEAN_FIELDS)
+ROLLUP_WIDTH = COUNT_COLUMN + 1
+
+GRANULARITIES = ("day", "week", "month", "year")
+
+# Clave de agregado de todas las plantas
+ALL_PLANTS = "*"
+
+def period_starts(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Inicio del período (datetime64[D]) de cada día, vectorizado"""
+    days = days.astype('datetime64[D]')
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        # 1970-01-01 fue jueves: (n + 3) % 7 da 0 para los lunes
+        weekday = (days.astype(np.int64) + 3) % 7
+        return days - weekday.astype('timedelta64[D]')
+    if granularity == "month":
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    if granularity == "year":
+        return days.astype('datetime64[Y]').astype('datetime64[D]')
+    raise ValueError(f"Granularidad inválida: {granularity}. Usar: {', '.join(GRANULARITIES)}")
+
+class _Table:
+    """Tabla de rollup de una planta y granularidad: períodos ordenados + sumas"""
+
+    def __init__(self, keys: np.ndarray, sums: np.ndarray):
+        self.keys = keys
+        self.sums = sums
+
+    def add(self, key: np.datetime64, values: np.ndarray) -> None:
+        idx = int(np.searchsorted(self.keys, key))
+        if idx < len(self.keys) and self.keys[idx] == key:
+            if not self.sums.flags.writeable:
+                # Tabla adjuntada memory-mapped de solo lectura: copia al primer cambio
+                self.sums = self.sums.copy()
+            self.sums[idx] += values
+        else:
+            self.keys = np.insert(self.keys, idx, key)
+            self.sums = np.insert(self.sums, idx, values, axis=0)
+
+class HistoricoRollups:
+    """
+    Tablas pre-agregadas del histórico por día, semana, mes y año
+
+    Se reconstruyen en cada recarga y se actualizan de forma incremental
+    al agregar filas, para que las series por período no recorran las
+    filas crudas en cada request.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, Dict[str, _Table]] = {g: {} for g in GRANULARITIES}
+        self._lock = threading.Lock()
+
+    def rebuild(
+        self,
+        days: np.ndarray,
+        plant_codes: np.ndarray,
+        plant_names: List[str],
+        vectors: np.ndarray
+    ) -> None:
+        """
+        Reconstruye todas las tablas
+
+        Args:
+            days: día (datetime64[D]) de cada registro
+            plant_codes: índice en plant_names de la planta de cada registro
+            plant_names: nombres de planta
+            vectors: matriz (n, ROLLUP_WIDTH) de acumulables
+        """
+        tables: Dict[str, Dict[str, _Table]] = {g: {} for g in GRANULARITIES}
+        if len(days):
+            days = days.astype('datetime64[D]')
+            if (days[1:] < days[:-1]).any():
+                order = np.argsort(days, kind='stable')
+                days, plant_codes, vectors = days[order], plant_codes[order], vectors[order]
+
+            groups = [(ALL_PLANTS, slice(None))]
+            groups += [(plant_names[c], plant_codes == c) for c in np.unique(plant_codes).tolist()]
+
+            # Primero el nivel diario (días ya ordenados: reduceat por tramos);
+            # las granularidades mayores se agregan desde ahí
+            for plant, mask in groups:
+                plant_days = days[mask]
+                boundaries = np.flatnonzero(np.r_[True, plant_days[1:] != plant_days[:-1]])
+                sums = np.add.reduceat(vectors[mask], boundaries, axis=0)
+                tables["day"][str(plant)] = _Table(plant_days[boundaries], sums)
+
+            for granularity in GRANULARITIES[1:]:
+                for plant, day_table in tables["day"].items():
+                    starts = period_starts(day_table.keys, granularity)
+                    boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+                    sums = np.add.reduceat(day_table.sums, boundaries, axis=0)
+                    tables[granularity][plant] = _Table(starts[boundaries], sums)
+
+        with self._lock:
+            self._tables = tables
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Tablas como arrays planos para publicarlas (p.ej. en .npy)
+
+        Por granularidad: períodos y sumas de todas las plantas
+        concatenados, nombres de planta y offsets de cada una.
+        """
+        with self._lock:
+            tables = {g: dict(t) for g, t in self._tables.items()}
+        columns: Dict[str, np.ndarray] = {}
+        for granularity, by_plant in tables.items():
+            plants = sorted(by_plant)
+            parts = [by_plant[p] for p in plants]
+            columns[f"{granularity}.plants"] = np.array(plants, dtype=str)
+            columns[f"{granularity}.offsets"] = np.cumsum([0] + [len(t.keys) for t in parts]).astype(np.int64)
+            columns[f"{granularity}.keys"] = (
+                np.concatenate([t.keys for t in parts]) if parts else np.array([], dtype='datetime64[D]')
+            )
+            columns[f"{granularity}.sums"] = (
+                np.concatenate([t.sums for t in parts]) if parts else np.zeros((0, ROLLUP_WIDTH))
+            )
+        return columns
+
+    def load(self, columns: Dict[str, np.ndarray]) -> None:
+        """Reemplaza las tablas por las de `columns()` (vistas, sin copiar: admite mmap)"""
+        tables: Dict[str, Dict[str, _Table]] = {g: {} for g in GRANULARITIES}
+        for granularity in GRANULARITIES:
+            offsets = columns[f"{granularity}.offsets"].tolist()
+            keys, sums = columns[f"{granularity}.keys"], columns[f"{granularity}.sums"]
+            for i, plant in enumerate(columns[f"{granularity}.plants"].tolist()):
+                lo, hi = offsets[i], offsets[i + 1]
+                tables[granularity][plant] = _Table(keys[lo:hi], sums[lo:hi])
+        with self._lock:
+            self._tables = tables
+
+    def apply_delta(self, day: np.datetime64, planta_id: str, delta: np.ndarray) -> None:
+        """Suma un vector de acumulables (puede ser negativo) al día indicado en todas las tablas"""
+        day_array = np.array([day], dtype='datetime64[D]')
+        with self._lock:
+            for granularity in GRANULARITIES:
+                key = period_starts(day_array, granularity)[0]
+                for plant in (ALL_PLANTS, planta_id):
+                    table = self._tables[granularity].get(plant)
+                    if table is None:
+                        self._tables[granularity][plant] = _Table(
+                            np.array([key]), delta.reshape(1, -1).copy()
+                        )
+                    else:
+                        table.add(key, delta)
+
+    def table(
+        self,
+        granularity: str,
+        planta_id: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Períodos y sumas de una tabla, recortados a [start, end]
+
+        Un período se incluye si su inicio cae dentro del rango.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad inválida: {granularity}. Usar: {', '.join(GRANULARITIES)}")
+
+        with self._lock:
+            table = self._tables[granularity].get(planta_id or ALL_PLANTS)
+            if table is None:
+                return np.array([], dtype='datetime64[D]'), np.zeros((0, ROLLUP_WIDTH))
+            keys, sums = table.keys, table.sums
+
+            lo = int(np.searchsorted(keys, np.datetime64(start, 'D'))) if start else 0
+            hi = int(np.searchsorted(keys, np.datetime64(end, 'D'), side='right')) if end else len(keys)
+            # Copias dentro del lock: apply_delta modifica las sumas in-place
+            return keys[lo:hi].copy(), sums[lo:hi].copy()
+
+    def series(
+        self,
+        granularity: str,
+        planta_id: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[Dict]:
+        """Serie por período con totales y promedios"""
+        keys, sums = self.table(granularity, planta_id, start, end)
+        return series_points(keys.astype(str).tolist(), sums)
+
+    def window_sums(
+        self,
+        starts: List[date],
+        planta_ids: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        Acumulables desde cada fecha de inicio hasta el final, por planta
+
+        Usa sumas prefijo sobre la tabla diaria: cada ventana es una resta.
+
+        Returns:
+            matriz (plantas, ventanas, ROLLUP_WIDTH)
+        """
+        planta_ids = planta_ids or [ALL_PLANTS]
+        start_days = np.array(starts, dtype='datetime64[D]')
+        out = np.zeros((len(planta_ids), len(start_days), ROLLUP_WIDTH))
+        for p, planta_id in enumerate(planta_ids):
+            keys, sums = self.table("day", planta_id)
+            if not len(keys):
+                continue
+            prefix = np.vstack([np.zeros(ROLLUP_WIDTH), np.cumsum(sums, axis=0)])
+            idx = np.searchsorted(keys, start_days)
+            out[p] = prefix[-1] - prefix[idx]
+        return out
+
+    def period_sums(
+        self,
+        granularity: str,
+        planta_id: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sumas por período limitadas exactamente a [start, end]
+
+        A diferencia de `table`, los períodos parciales en los bordes solo
+        suman los días dentro del rango (se reagrupa la tabla diaria).
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad inválida: {granularity}. Usar: {', '.join(GRANULARITIES)}")
+        keys, sums = self.table("day", planta_id, start, end)
+        return regroup_days(keys, sums, granularity)
+
+    def day_vector(self, day: np.datetime64, planta_id: str) -> np.ndarray:
+        """Acumulables de un día de una planta (ceros si no hay datos)"""
+        keys, sums = self.table("day", planta_id, day, day)
+        return sums[0] if len(keys) else np.zeros(ROLLUP_WIDTH)
+
+    def plants(self) -> Iterable[str]:
+        with self._lock:
+            return [p for p in self._tables["day"] if p != ALL_PLANTS]
+
+def regroup_days(days: np.ndarray, sums: np.ndarray, granularity: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Reagrupa acumulables diarios (días ordenados) por período de la granularidad"""
+    if not len(days):
+        return days, sums
+    starts = period_starts(days, granularity)
+    boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    return starts[boundaries], np.add.reduceat(sums, boundaries, axis=0)
+
+def series_points(periods: List[str], sums: np.ndarray) -> List[Dict]:
+    """Puntos de serie (totales y promedios) a partir de una matriz de acumulables"""
+    counts = sums[:, COUNT_COLUMN]
+    points = []
+    for i, period in enumerate(periods):
+        # Registros eliminados pueden dejar períodos vacíos
+        if counts[i] <= 0:
+            continue
+        point = {"periodo": period, "registros": int(round(counts[i]))}
+        for j, field in enumerate(SUM_FIELDS):
+            point[field] = round(float(sums[i, j]), 2)
+        means = []
+        for j in range(len(MEAN_FIELDS)):
+            weight = sums[i, WEIGHT_OFFSET + j]
+            means.append(float(sums[i, len(SUM_FIELDS) + j] / weight) if weight > 0 else 0.0)
+        point["pr_promedio"] = round(means[0], 4)
+        point["availability_promedio_pct"] = round(means[1], 2)
+        points.append(point)
+    return points
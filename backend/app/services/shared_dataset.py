@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos (un solo worker)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+META_FILE = "meta.json"
+# Snapshots que se conservan: un worker puede estar terminando de adjuntar el anterior
+KEEP_SNAPSHOTS = 3
+
+class SharedDataset:
+    """
+    Dataset publicado en archivos memory-mapped para varios workers
+
+    El worker que recarga (o agrega filas) escribe un snapshot nuevo: una
+    carpeta con cada columna en un .npy (store, histórico diario, tickets
+    y rollups) y un meta.json chico con la versión y los parámetros de
+    planta. Cuando
+    el snapshot está completo reemplaza el puntero CURRENT con
+    `os.replace`, así que los demás workers ven la versión anterior o la
+    nueva entera. Los workers adjuntan las columnas con `mmap_mode='r'`:
+    las páginas se comparten entre procesos a través del page cache.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.attached: Optional[str] = None
+        self._pointer_stat: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fd: Optional[int] = None
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Lock exclusivo entre procesos (reentrante dentro del proceso)"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self._lock_fd = os.open(self.root / LOCK_FILE, os.O_CREAT | os.O_RDWR)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    # ---------- Lectura ----------
+
+    def _stat_pointer(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = (self.root / CURRENT_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def changed(self) -> bool:
+        """True si CURRENT cambió desde el último snapshot adjuntado (un stat, sin abrir archivos)"""
+        return self._stat_pointer() != self._pointer_stat
+
+    def current(self) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+        """Nombre del snapshot vigente y el stat de CURRENT tomado antes de leerlo"""
+        stat = self._stat_pointer()
+        try:
+            return (self.root / CURRENT_FILE).read_text(encoding='utf-8').strip() or None, stat
+        except FileNotFoundError:
+            return None, None
+
+    def mark_attached(self, name: str, stat: Optional[Tuple[int, int]]) -> None:
+        self.attached = name
+        self._pointer_stat = stat
+
+    def read_meta(self, name: str) -> Dict[str, Any]:
+        with open(self.root / name / META_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, name: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """meta y columnas (memory-mapped de solo lectura) de un snapshot"""
+        meta = self.read_meta(name)
+        folder = self.root / name
+        columns = {
+            column: np.load(folder / f"{column}.npy", mmap_mode='r')
+            for column in meta['columns']
+        }
+        return meta, columns
+
+    # ---------- Publicación ----------
+
+    def publish(self, meta: Dict[str, Any], columns: Dict[str, np.ndarray]) -> int:
+        """
+        Escribe un snapshot y lo vuelve vigente
+
+        La versión publicada es mayor que la del snapshot vigente aunque lo
+        haya publicado otro worker; se devuelve para que el loader la adopte.
+        """
+        with self.lock():
+            previous, _ = self.current()
+            version = meta['version']
+            if previous is not None:
+                try:
+                    version = max(version, self.read_meta(previous)['version'] + 1)
+                except (OSError, ValueError, KeyError):
+                    pass
+
+            name = f"v{version:010d}-{os.getpid()}"
+            folder = self.root / name
+            tmp = self.root / f".{name}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir()
+            for column, values in columns.items():
+                np.save(tmp / f"{column}.npy", np.ascontiguousarray(values))
+            with open(tmp / META_FILE, 'w', encoding='utf-8') as f:
+                json.dump({**meta, 'version': version, 'columns': list(columns)}, f)
+            os.replace(tmp, folder)
+
+            pointer_tmp = self.root / f".{CURRENT_FILE}.{os.getpid()}"
+            pointer_tmp.write_text(name, encoding='utf-8')
+            os.replace(pointer_tmp, self.root / CURRENT_FILE)
+
+            self.mark_attached(name, self._stat_pointer())
+            self._cleanup(keep=name)
+        logger.info(f"Dataset compartido publicado: {name}")
+        return version
+
+    def _cleanup(self, keep: str) -> None:
+        snapshots = sorted(p.name for p in self.root.iterdir() if p.is_dir() and p.name.startswith('v'))
+        # Los mmaps abiertos sobre archivos borrados siguen siendo válidos (POSIX)
+        for name in snapshots[:-KEEP_SNAPSHOTS]:
+            if name != keep:
+                shutil.rmtree(self.root / name, ignore_errors=True)
+
+class SharedDatasetMiddleware:
+    """Antes de cada request, adjunta el snapshot vigente si otro worker publicó uno nuevo"""
+
+    def __init__(self, app: ASGIApp, sync: Callable[[], Any]):
+        self.app = app
+        self.sync = sync
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            self.sync()
+        await self.app(scope, receive, send)
@@ -0,0 +1,215 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+
+from app.core.metrics import record_cache
+from app.models.schemas import PlantaBase
+
+MINUTES_PER_DAY = 1440
+SECONDS_PER_DAY = 86400
+
+# Irradiancia de referencia (STC) y albedo del suelo
+STC_IRRADIANCE = 1000.0
+ALBEDO = 0.2
+# Fracción difusa típica con cielo despejado
+CLEAR_SKY_DIFFUSE_FRACTION = 0.15
+
+def _sun_terms(ts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Declinación y ecuación del tiempo (radianes) para timestamps UTC
+
+    Algoritmo de baja precisión del Astronomical Almanac (~0.01°).
+    """
+    n = ts / SECONDS_PER_DAY + 2440587.5 - 2451545.0  # días desde J2000.0
+
+    mean_lon = np.radians((280.460 + 0.9856474 * n) % 360)
+    mean_anomaly = np.radians((357.528 + 0.9856003 * n) % 360)
+    ecliptic_lon = (
+        mean_lon
+        + np.radians(1.915) * np.sin(mean_anomaly)
+        + np.radians(0.020) * np.sin(2 * mean_anomaly)
+    )
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+
+    right_ascension = np.arctan2(np.cos(obliquity) * np.sin(ecliptic_lon), np.cos(ecliptic_lon))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_lon))
+    equation_of_time = (mean_lon - right_ascension + np.pi) % (2 * np.pi) - np.pi
+    return declination, equation_of_time
+
+def _hour_angle(ts: np.ndarray, lon: float, equation_of_time: np.ndarray) -> np.ndarray:
+    utc_hours = (ts % SECONDS_PER_DAY) / 3600.0
+    return np.radians((utc_hours - 12.0) * 15.0 + lon) + equation_of_time
+
+def solar_position(ts: np.ndarray, lat: float, lon: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Elevación y azimut solar (grados) para timestamps UTC en segundos epoch
+
+    Vectorizado sobre cualquier forma de `ts`. Azimut desde el norte en
+    sentido horario.
+    """
+    declination, equation_of_time = _sun_terms(ts)
+    hour_angle = _hour_angle(ts, lon, equation_of_time)
+
+    phi = np.radians(lat)
+    sin_elevation = (
+        np.sin(phi) * np.sin(declination)
+        + np.cos(phi) * np.cos(declination) * np.cos(hour_angle)
+    )
+    elevation = np.arcsin(np.clip(sin_elevation, -1.0, 1.0))
+    azimuth = np.arctan2(
+        -np.sin(hour_angle),
+        np.tan(declination) * np.cos(phi) - np.sin(phi) * np.cos(hour_angle)
+    )
+    return np.degrees(elevation), np.degrees(azimuth) % 360
+
+def clear_sky_ghi(cos_zenith: np.ndarray) -> np.ndarray:
+    """Irradiancia global horizontal de cielo despejado (modelo de Haurwitz, W/m²)"""
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        ghi = 1098.0 * cos_zenith * np.exp(-0.057 / cos_zenith)
+    return np.where(cos_zenith > 0, ghi, 0.0)
+
+def plane_of_array(cos_zenith: np.ndarray, cos_aoi: np.ndarray, tilt_deg: float) -> np.ndarray:
+    """
+    Irradiancia en el plano de los módulos (W/m²) con cielo despejado
+
+    Transposición isotrópica: directa por el coseno del ángulo de
+    incidencia, difusa por el factor de vista del cielo y reflejada por
+    albedo.
+    """
+    ghi = clear_sky_ghi(cos_zenith)
+    dhi = ghi * CLEAR_SKY_DIFFUSE_FRACTION
+    tilt = np.radians(tilt_deg)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dni = np.where(cos_zenith > 0.01, (ghi - dhi) / cos_zenith, 0.0)
+    beam = dni * np.clip(cos_aoi, 0.0, None)
+    sky = dhi * (1 + np.cos(tilt)) / 2
+    ground = ghi * ALBEDO * (1 - np.cos(tilt)) / 2
+    return beam + sky + ground
+
+def plant_tilt(planta: PlantaBase) -> float:
+    """Inclinación fija de los módulos (≈ latitud, hasta 40°), mirando al ecuador"""
+    return min(abs(planta.lat), 40.0)
+
+def _poa_from_terms(
+    sin_dec: np.ndarray,
+    cos_dec_cos_h: np.ndarray,
+    lat: float,
+    tilt_deg: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """cos(cenit) y POA a partir de sin(δ) y cos(δ)·cos(H)"""
+    phi = np.radians(lat)
+    cos_zenith = np.sin(phi) * sin_dec + np.cos(phi) * cos_dec_cos_h
+    # Superficie mirando al ecuador: equivale a horizontal en la latitud
+    # desplazada `tilt` grados hacia el ecuador
+    phi_tilted = phi - np.sign(lat) * np.radians(tilt_deg)
+    cos_aoi = np.sin(phi_tilted) * sin_dec + np.cos(phi_tilted) * cos_dec_cos_h
+    return cos_zenith, plane_of_array(cos_zenith, cos_aoi, tilt_deg)
+
+def clear_sky_poa(ts: np.ndarray, lat: float, lon: float, tilt_deg: float) -> np.ndarray:
+    """POA de cielo despejado (W/m²) en timestamps UTC, módulos mirando al ecuador"""
+    declination, equation_of_time = _sun_terms(ts)
+    hour_angle = _hour_angle(ts, lon, equation_of_time)
+    _, poa = _poa_from_terms(
+        np.sin(declination), np.cos(declination) * np.cos(hour_angle), lat, tilt_deg
+    )
+    return poa
+
+def daily_insolation(planta: PlantaBase, day_start_utc: np.ndarray, step_seconds: int = 900) -> np.ndarray:
+    """Irradiación POA de cielo despejado (kWh/m²) de días que empiezan en `day_start_utc`"""
+    offsets = np.arange(0, SECONDS_PER_DAY, step_seconds) + step_seconds // 2
+    ts = np.asarray(day_start_utc, dtype=np.int64)[:, None] + offsets[None, :]
+    poa = clear_sky_poa(ts.astype(np.float64), planta.lat, planta.lon, plant_tilt(planta))
+    return poa.sum(axis=1) * step_seconds / 3600 / 1000
+
+SiteKey = Tuple[float, float, float]
+
+class SolarLUTCache:
+    """
+    Tablas por planta y día UTC de elevación solar y POA minuto a minuto
+
+    Las series de cualquier resolución se obtienen indexando las tablas
+    (sin trigonometría por punto). Los días faltantes se calculan juntos
+    en una sola pasada vectorizada. Se conservan los últimos
+    `max_days` días por planta.
+    """
+
+    def __init__(self, max_days: int = 64):
+        self.max_days = max_days
+        self._tables: Dict[SiteKey, "OrderedDict[int, Tuple[np.ndarray, np.ndarray]]"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def site_key(planta: PlantaBase) -> SiteKey:
+        return (round(planta.lat, 4), round(planta.lon, 4), plant_tilt(planta))
+
+    def _compute(self, site: SiteKey, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lat, lon, tilt = site
+        # Declinación y ecuación del tiempo en los bordes de cada día,
+        # interpoladas linealmente minuto a minuto (varían < 0.5° por día)
+        bounds = np.concatenate([days, days + 1]) * SECONDS_PER_DAY
+        declination, equation_of_time = _sun_terms(bounds.astype(np.float64))
+        n = len(days)
+        # Centro de cada minuto
+        frac = (np.arange(MINUTES_PER_DAY) + 0.5) / MINUTES_PER_DAY
+
+        def interpolate(edges: np.ndarray) -> np.ndarray:
+            return edges[:n, None] + (edges[n:] - edges[:n])[:, None] * frac
+
+        sin_dec = interpolate(np.sin(declination))
+        cos_dec_cos_h = interpolate(np.cos(declination)) * np.cos(
+            np.radians((frac * 24.0 - 12.0) * 15.0 + lon) + interpolate(equation_of_time)
+        )
+        cos_zenith, poa = _poa_from_terms(sin_dec, cos_dec_cos_h, lat, tilt)
+        elevation = np.degrees(np.arcsin(np.clip(cos_zenith, -1.0, 1.0)))
+        return elevation.astype(np.float32), poa.astype(np.float32)
+
+    def tables(self, site: SiteKey, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Matrices (días, 1440) de elevación y POA para los días UTC pedidos"""
+        days = np.asarray(days, dtype=np.int64)
+        with self._lock:
+            cached = self._tables.setdefault(site, OrderedDict())
+            missing = [d for d in days.tolist() if d not in cached]
+            self.hits += len(days) - len(missing)
+            self.misses += len(missing)
+        record_cache("solar_lut", hits=len(days) - len(missing), misses=len(missing))
+
+        if missing:
+            elevation, poa = self._compute(site, np.array(missing, dtype=np.int64))
+            with self._lock:
+                for i, day in enumerate(missing):
+                    cached[day] = (elevation[i], poa[i])
+
+        with self._lock:
+            rows = [cached[d] for d in days.tolist()]
+            for d in days.tolist():
+                cached.move_to_end(d)
+            while len(cached) > max(self.max_days, len(days)):
+                cached.popitem(last=False)
+
+        return np.stack([r[0] for r in rows]), np.stack([r[1] for r in rows])
+
+    def lookup(self, planta: PlantaBase, ts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Elevación (°) y POA de cielo despejado (W/m²) para timestamps UTC en segundos"""
+        ts = np.asarray(ts, dtype=np.int64)
+        day = ts // SECONDS_PER_DAY
+        unique_days, day_index = np.unique(day, return_inverse=True)
+        elevation, poa = self.tables(self.site_key(planta), unique_days)
+        minute = (ts % SECONDS_PER_DAY) // 60
+        return elevation[day_index, minute], poa[day_index, minute]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'sites': len(self._tables),
+                'days_cached': sum(len(t) for t in self._tables.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+# Instancia global
+solar_lut = SolarLUTCache()
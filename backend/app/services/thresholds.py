@@ -0,0 +1,183 @@
+import logging
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.models.schemas import UmbralBase
+from app.services.rollups import SUM_FIELDS, WEIGHT_OFFSET
+
+logger = logging.getLogger(__name__)
+
+# ---------- KPIs evaluables a partir de una matriz de acumulables ----------
+
+def _mean_field(index: int) -> Callable[[np.ndarray], np.ndarray]:
+    def accessor(sums: np.ndarray) -> np.ndarray:
+        weight = sums[:, WEIGHT_OFFSET + index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weight > 0, sums[:, len(SUM_FIELDS) + index] / weight, np.nan)
+    return accessor
+
+def _pct_of_expected(field: str) -> Callable[[np.ndarray], np.ndarray]:
+    column = SUM_FIELDS.index(field)
+    expected = SUM_FIELDS.index('energia_esperada_kwh')
+
+    def accessor(sums: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(sums[:, expected] > 0, sums[:, column] / sums[:, expected] * 100, np.nan)
+    return accessor
+
+def _energy_deviation(sums: np.ndarray) -> np.ndarray:
+    real = sums[:, SUM_FIELDS.index('energia_real_kwh')]
+    expected = sums[:, SUM_FIELDS.index('energia_esperada_kwh')]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(expected > 0, (real - expected) / expected * 100, np.nan)
+
+def _gross_margin(sums: np.ndarray) -> np.ndarray:
+    ingresos = sums[:, SUM_FIELDS.index('ingresos_estimados_usd')]
+    opex = sums[:, SUM_FIELDS.index('opex_estimado_usd')]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(ingresos > 0, (ingresos - opex) / ingresos * 100, np.nan)
+
+# Clave canónica -> (función sobre la matriz de acumulables, formato del valor)
+KPI_SPECS: Dict[str, Dict[str, Any]] = {
+    'pr': {'accessor': _mean_field(0), 'format': '{:.2%}'},
+    'availability': {'accessor': _mean_field(1), 'format': '{:.1f}%'},
+    'soiling': {'accessor': _pct_of_expected('perdida_soiling_kwh'), 'format': '{:.2f}%'},
+    'curtailment': {'accessor': _pct_of_expected('curtailment_kwh'), 'format': '{:.2f}%'},
+    'otros': {'accessor': _pct_of_expected('perdida_otros_kwh'), 'format': '{:.2f}%'},
+    'desviacion_energia': {'accessor': _energy_deviation, 'format': '{:+.1f}%'},
+    'margen_bruto': {'accessor': _gross_margin, 'format': '{:.1f}%'},
+}
+
+# Nombres alternativos que se pueden usar en la hoja Umbrales
+KPI_ALIASES = {
+    'disponibilidad': 'availability',
+    'perdidas_otros': 'otros',
+    'desviacion': 'desviacion_energia',
+    'margen': 'margen_bruto',
+}
+
+SEVERITIES = ('ok', 'amarillo', 'rojo')
+
+def normalize_kpi(name: str) -> str:
+    key = name.strip().lower().replace(' ', '_')
+    return KPI_ALIASES.get(key, key)
+
+class ThresholdRules:
+    """
+    Tabla de reglas compilada desde la hoja Umbrales
+
+    Cada fila se convierte en (KPI, umbral amarillo, umbral rojo,
+    dirección). La dirección sale de la propia fila: amarillo > rojo
+    significa que valores más bajos son peores. `evaluate` calcula cada
+    KPI una sola vez y compara todas las reglas contra todas las columnas
+    (ventanas × plantas) en una pasada vectorizada.
+    """
+
+    def __init__(self, umbrales: List[UmbralBase]):
+        rows = []
+        self.unsupported: List[str] = []
+        for umbral in umbrales:
+            key = normalize_kpi(umbral.kpi)
+            if key not in KPI_SPECS:
+                self.unsupported.append(umbral.kpi)
+                continue
+            rows.append((key, umbral))
+        if self.unsupported:
+            logger.warning(f"KPIs de Umbrales sin cálculo asociado (se ignoran): {self.unsupported}")
+
+        # Ordenar por KPI para reducir por grupos con reduceat
+        self.kpis: List[str] = sorted({key for key, _ in rows})
+        rows.sort(key=lambda r: self.kpis.index(r[0]))
+        self.names: Dict[str, str] = {}
+        for key, umbral in rows:
+            self.names.setdefault(key, umbral.kpi)
+
+        self.rule_kpi = np.array([self.kpis.index(key) for key, _ in rows], dtype=np.int64)
+        self.yellow = np.array([u.umbral_amarillo for _, u in rows], dtype=np.float64)
+        self.red = np.array([u.umbral_rojo for _, u in rows], dtype=np.float64)
+        # +1: más alto es peor; -1: más bajo es peor
+        self.sign = np.where(self.yellow > self.red, -1.0, 1.0)
+        self.descriptions = [u.descripcion_alerta for _, u in rows]
+
+        # Para desempatar dentro de un KPI: la regla con umbral amarillo más extremo
+        oriented_yellow = self.yellow * self.sign
+        self.rank = np.argsort(np.argsort(oriented_yellow, kind='stable'), kind='stable')
+        self.group_starts = np.flatnonzero(np.r_[True, self.rule_kpi[1:] != self.rule_kpi[:-1]]) \
+            if len(rows) else np.array([], dtype=np.int64)
+        self._lower_is_worse = {
+            key: bool(self.sign[self.rule_kpi == k][0] < 0) for k, key in enumerate(self.kpis)
+        }
+
+    def __len__(self) -> int:
+        return len(self.rule_kpi)
+
+    def lower_is_worse(self, kpi: str) -> bool:
+        return self._lower_is_worse[kpi]
+
+    def kpi_values(self, sums: np.ndarray) -> np.ndarray:
+        """Matriz (KPIs, columnas) de valores, cada KPI calculado una vez"""
+        if not self.kpis:
+            return np.zeros((0, len(sums)))
+        return np.vstack([KPI_SPECS[key]['accessor'](sums) for key in self.kpis])
+
+    def evaluate(self, sums: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Evalúa todas las reglas sobre columnas de acumulables
+
+        Args:
+            sums: matriz (columnas, ROLLUP_WIDTH); cada columna es una
+                ventana de una planta
+
+        Returns:
+            dict con 'values' (KPIs × columnas), 'severity' (0 ok,
+            1 amarillo, 2 rojo) y 'rule' (fila de regla que disparó o -1)
+        """
+        values = self.kpi_values(sums)
+        n_rules = len(self)
+        if n_rules == 0:
+            empty = np.zeros(values.shape, dtype=np.int64)
+            return {'values': values, 'severity': empty, 'rule': empty - 1}
+
+        oriented = values[self.rule_kpi] * self.sign[:, None]
+        severity = np.where(
+            oriented > (self.red * self.sign)[:, None], 2,
+            np.where(oriented > (self.yellow * self.sign)[:, None], 1, 0)
+        )
+
+        # Severidad: la peor entre las filas del KPI. Descripción: la fila más
+        # extrema que se cruzó (las filas de la hoja escalan por nivel)
+        rows = np.arange(n_rules)
+        code = np.where(severity > 0, self.rank[:, None] * n_rules + rows[:, None], -1)
+        best = np.maximum.reduceat(code, self.group_starts, axis=0)
+
+        return {
+            'values': values,
+            'severity': np.maximum.reduceat(severity, self.group_starts, axis=0),
+            'rule': np.where(best >= 0, best % n_rules, -1),
+        }
+
+    def alerts(
+        self,
+        result: Dict[str, np.ndarray],
+        column: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Alertas disparadas en una columna, de mayor a menor severidad"""
+        alerts = []
+        for k, key in enumerate(self.kpis):
+            rule = int(result['rule'][k, column])
+            if rule < 0:
+                continue
+            value = float(result['values'][k, column])
+            severity = int(result['severity'][k, column])
+            crossed_red = value * self.sign[rule] > self.red[rule] * self.sign[rule]
+            alerts.append({
+                'kpi': self.names[key],
+                'valor': value,
+                'valor_formateado': KPI_SPECS[key]['format'].format(value),
+                'severidad': SEVERITIES[severity],
+                'umbral': float(self.red[rule] if crossed_red else self.yellow[rule]),
+                'descripcion': self.descriptions[rule],
+            })
+        alerts.sort(key=lambda a: -SEVERITIES.index(a['severidad']))
+        return alerts
@@ -0,0 +1,386 @@
+import calendar
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.rollups import SUM_FIELDS, MEAN_FIELDS, FIELDS, ROLLUP_WIDTH
+
+SECONDS_PER_DAY = 86400
+# Las sumas (energía, dinero) en float64 para que los totales de años no pierdan
+# centavos; los promedios (PR, disponibilidad) alcanzan con float32
+FIELD_DTYPES = {f: (np.float64 if f in SUM_FIELDS else np.float32) for f in FIELDS}
+
+def to_epoch(value: datetime) -> int:
+    """Segundos epoch de un datetime naive (hora local de planta) sin conversión de zona"""
+    return calendar.timegm(value.timetuple())
+
+def parse_step_seconds(granularity: str) -> Optional[int]:
+    """Segundos de una granularidad sub-diaria ("15min", "hour") o None si es diaria o mayor"""
+    if granularity == "hour":
+        return 3600
+    match = re.fullmatch(r"(\d+)min", granularity)
+    if match:
+        minutes = int(match.group(1))
+        if minutes <= 0 or (SECONDS_PER_DAY % (minutes * 60)):
+            raise ValueError(f"Granularidad inválida: {granularity} (debe dividir el día)")
+        return minutes * 60
+    return None
+
+def rollup_vectors(
+    intervals: np.ndarray,
+    values: Dict[str, np.ndarray]
+) -> np.ndarray:
+    """
+    Matriz (n, ROLLUP_WIDTH) con los acumulables de cada registro
+
+    Columnas: sumas de SUM_FIELDS, sumas ponderadas por duración de
+    MEAN_FIELDS, pesos (en días) de MEAN_FIELDS y conteo de registros.
+    Los valores NaN (p.ej. PR nocturno) no suman ni pesan.
+    """
+    n = len(intervals)
+    # Orden Fortran: cada columna queda contigua al escribirla
+    out = np.zeros((n, ROLLUP_WIDTH), order='F')
+    weight = intervals / SECONDS_PER_DAY
+
+    for i, field in enumerate(SUM_FIELDS):
+        out[:, i] = values[field]
+        np.nan_to_num(out[:, i], copy=False, nan=0.0)
+
+    offset = len(SUM_FIELDS)
+    for j, field in enumerate(MEAN_FIELDS):
+        column = values[field]
+        valid = np.isfinite(column)
+        np.multiply(column, weight, out=out[:, offset + j], where=valid)
+        np.copyto(out[:, offset + len(MEAN_FIELDS) + j], weight, where=valid)
+
+    out[:, -1] = 1.0
+    return out
+
+def plant_level_mask(ts: np.ndarray, planta: np.ndarray, equipo: np.ndarray) -> np.ndarray:
+    """
+    Registros que cuentan para los totales de planta
+
+    Un día con registro a nivel planta (equipo 0) se toma de ese registro;
+    los de equipo solo se suman en los días de la planta sin registro propio.
+    Así los registros por equipo cargados junto a los de planta no duplican.
+    """
+    plant_row = equipo == 0
+    if plant_row.all() or not plant_row.any():
+        return np.ones(len(ts), dtype=bool)
+    key = planta.astype(np.int64) * (1 << 32) + ts // SECONDS_PER_DAY
+    return plant_row | ~np.isin(key, key[plant_row])
+
+class _Bucket:
+    """Registros de un mes calendario, ordenados por (timestamp, planta, equipo)"""
+
+    __slots__ = ("ts", "interval", "planta", "equipo", "values")
+
+    def __init__(self, ts, interval, planta, equipo, values):
+        self.ts = ts
+        self.interval = interval
+        self.planta = planta
+        self.equipo = equipo
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.ts.nbytes + self.interval.nbytes + self.planta.nbytes + self.equipo.nbytes
+            + sum(v.nbytes for v in self.values.values())
+        )
+
+class HistoricoStore:
+    """
+    Almacenamiento columnar del histórico a cualquier resolución
+
+    Cada registro tiene timestamp (int64, segundos epoch de la hora local
+    de planta), duración del intervalo (int32), planta y equipo (índices
+    int16 a tablas de nombres) y los campos numéricos (sumas en float64,
+    promedios en float32). Los
+    registros se agrupan en buckets mensuales para que las consultas por
+    ventana solo toquen los meses involucrados y los appends solo
+    reordenen el mes afectado.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, _Bucket] = {}
+        self.plantas: List[str] = []
+        self.equipos: List[str] = [""]  # índice 0 = registro a nivel planta
+        self._lock = threading.Lock()
+
+    # ---------- Construcción ----------
+
+    @classmethod
+    def from_columns(
+        cls,
+        columns: Dict[str, np.ndarray],
+        plantas: List[str],
+        equipos: List[str]
+    ) -> "HistoricoStore":
+        """
+        Store sobre columnas ya ordenadas como las devuelve `columns()`, sin copiarlas
+
+        Los buckets mensuales son vistas de los arrays recibidos (p.ej.
+        memory-mapped de solo lectura); un upsert posterior arma arrays
+        nuevos para el mes afectado.
+        """
+        store = cls()
+        store.plantas = list(plantas)
+        store.equipos = list(equipos)
+        ts = columns["ts"]
+        if not len(ts):
+            return store
+
+        months = ts.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        ends = np.r_[starts[1:], len(ts)]
+        for month, lo, hi in zip(months[starts].tolist(), starts.tolist(), ends.tolist()):
+            store._buckets[month] = _Bucket(
+                ts[lo:hi], columns["interval"][lo:hi], columns["planta"][lo:hi],
+                columns["equipo"][lo:hi], {f: columns[f][lo:hi] for f in FIELDS}
+            )
+        return store
+
+    def _index_names(self, names: np.ndarray, table: List[str]) -> np.ndarray:
+        uniques, inverse = np.unique(names.astype(str), return_inverse=True)
+        mapping = np.empty(len(uniques), dtype=np.int16)
+        for i, name in enumerate(uniques.tolist()):
+            if name not in table:
+                table.append(name)
+            mapping[i] = table.index(name)
+        return mapping[inverse]
+
+    def upsert(
+        self,
+        timestamps: np.ndarray,
+        intervals: np.ndarray,
+        plantas: np.ndarray,
+        equipos: Optional[np.ndarray],
+        values: Dict[str, np.ndarray]
+    ) -> Dict[str, int]:
+        """
+        Inserta registros; los de igual (timestamp, planta, equipo) reemplazan a los existentes
+
+        Returns:
+            dict con 'added' y 'replaced'
+        """
+        n = len(timestamps)
+        if n == 0:
+            return {"added": 0, "replaced": 0}
+
+        ts = np.asarray(timestamps, dtype=np.int64)
+        interval = np.asarray(intervals, dtype=np.int32)
+        if equipos is None:
+            equipos = np.full(n, "")
+
+        with self._lock:
+            planta = self._index_names(np.asarray(plantas), self.plantas)
+            equipo = self._index_names(np.asarray(equipos), self.equipos)
+            columns = {f: np.asarray(values[f], dtype=FIELD_DTYPES[f]) for f in FIELDS}
+
+            months = ts.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+            added = 0
+            replaced = 0
+            for month in np.unique(months).tolist():
+                mask = months == month
+                bucket = self._buckets.get(month)
+                incoming = _Bucket(
+                    ts[mask], interval[mask], planta[mask], equipo[mask],
+                    {f: c[mask] for f, c in columns.items()}
+                )
+                before = len(bucket) if bucket else 0
+                merged = self._merge(bucket, incoming)
+                self._buckets[month] = merged
+                added += len(merged) - before
+                replaced += len(incoming) - (len(merged) - before)
+
+        return {"added": added, "replaced": replaced}
+
+    @staticmethod
+    def _merge(existing: Optional[_Bucket], incoming: _Bucket) -> _Bucket:
+        """Concatena, ordena y deduplica (gana el último registro)"""
+        parts = [existing, incoming] if existing is not None else [incoming]
+        ts = np.concatenate([p.ts for p in parts])
+        interval = np.concatenate([p.interval for p in parts])
+        planta = np.concatenate([p.planta for p in parts])
+        equipo = np.concatenate([p.equipo for p in parts])
+        values = {f: np.concatenate([p.values[f] for p in parts]) for f in FIELDS}
+
+        # Orden estable: ante claves iguales, el registro más nuevo queda último
+        order = np.lexsort((np.arange(len(ts)), equipo, planta, ts))
+        ts, interval, planta, equipo = ts[order], interval[order], planta[order], equipo[order]
+        values = {f: v[order] for f, v in values.items()}
+
+        last = np.ones(len(ts), dtype=bool)
+        if len(ts) > 1:
+            same_as_next = (
+                (ts[:-1] == ts[1:]) & (planta[:-1] == planta[1:]) & (equipo[:-1] == equipo[1:])
+            )
+            last[:-1] = ~same_as_next
+
+        if not last.all():
+            ts, interval, planta, equipo = ts[last], interval[last], planta[last], equipo[last]
+            values = {f: v[last] for f, v in values.items()}
+
+        return _Bucket(ts, interval, planta, equipo, values)
+
+    # ---------- Consultas ----------
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self._buckets.values())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self._buckets.values())
+
+    @property
+    def resolution_seconds(self) -> Optional[int]:
+        """Duración mínima de intervalo almacenada"""
+        with self._lock:
+            mins = [int(b.interval.min()) for b in self._buckets.values() if len(b)]
+        return min(mins) if mins else None
+
+    @property
+    def has_equipment(self) -> bool:
+        with self._lock:
+            return any(bool((b.equipo > 0).any()) for b in self._buckets.values())
+
+    def columns(
+        self,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        planta_id: Optional[str] = None,
+        equipo_id: Optional[str] = None,
+        plant_level: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        Columnas de los registros con start_ts <= timestamp < end_ts
+
+        Devuelve 'ts', 'interval', 'planta', 'equipo' y los campos numéricos.
+        Con `plant_level` quedan solo los registros que suman a la planta
+        (ver `plant_level_mask`).
+        """
+        with self._lock:
+            planta_idx = self._lookup(self.plantas, planta_id)
+            equipo_idx = self._lookup(self.equipos, equipo_id)
+            months = sorted(self._buckets)
+            if start_ts is not None:
+                first = int(np.datetime64(int(start_ts), 's').astype('datetime64[M]').astype(np.int64))
+                months = [m for m in months if m >= first]
+            if end_ts is not None:
+                last = int(np.datetime64(int(end_ts), 's').astype('datetime64[M]').astype(np.int64))
+                months = [m for m in months if m <= last]
+            buckets = [self._buckets[m] for m in months]
+
+        if planta_idx == -1 or equipo_idx == -1 or not buckets:
+            return self._empty()
+
+        parts = []
+        for bucket in buckets:
+            lo = int(np.searchsorted(bucket.ts, start_ts)) if start_ts is not None else 0
+            hi = int(np.searchsorted(bucket.ts, end_ts)) if end_ts is not None else len(bucket)
+            if hi <= lo:
+                continue
+            mask = slice(lo, hi)
+            part = {
+                "ts": bucket.ts[mask],
+                "interval": bucket.interval[mask],
+                "planta": bucket.planta[mask],
+                "equipo": bucket.equipo[mask],
+            }
+            for f in FIELDS:
+                part[f] = bucket.values[f][mask]
+            if planta_idx is not None or equipo_idx is not None:
+                keep = np.ones(hi - lo, dtype=bool)
+                if planta_idx is not None:
+                    keep &= part["planta"] == planta_idx
+                if equipo_idx is not None:
+                    keep &= part["equipo"] == equipo_idx
+                part = {k: v[keep] for k, v in part.items()}
+            parts.append(part)
+
+        if not parts:
+            return self._empty()
+        result = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+        if plant_level:
+            keep = plant_level_mask(result["ts"], result["planta"], result["equipo"])
+            if not keep.all():
+                result = {k: v[keep] for k, v in result.items()}
+        return result
+
+    @staticmethod
+    def _lookup(table: List[str], name: Optional[str]) -> Optional[int]:
+        """Índice del nombre, None si no se filtra, -1 si no existe"""
+        if name is None:
+            return None
+        return table.index(name) if name in table else -1
+
+    @staticmethod
+    def _empty() -> Dict[str, np.ndarray]:
+        empty = {
+            "ts": np.array([], dtype=np.int64),
+            "interval": np.array([], dtype=np.int32),
+            "planta": np.array([], dtype=np.int16),
+            "equipo": np.array([], dtype=np.int16),
+        }
+        for f in FIELDS:
+            empty[f] = np.array([], dtype=FIELD_DTYPES[f])
+        return empty
+
+    def totals(
+        self,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        planta_id: Optional[str] = None
+    ) -> Dict[str, float]:
+        """Sumas y promedios ponderados por duración de una ventana"""
+        return summarize_vector(self.window_vector(start_ts, end_ts, planta_id))
+
+    def window_vector(
+        self,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        planta_id: Optional[str] = None
+    ) -> np.ndarray:
+        """Vector de acumulables (ROLLUP_WIDTH) de una ventana, a nivel planta"""
+        cols = self.columns(start_ts, end_ts, planta_id, plant_level=True)
+        return rollup_vectors(cols["interval"], cols).sum(axis=0)
+
+    def resample(
+        self,
+        step_seconds: int,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        planta_id: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Agrega registros en intervalos fijos
+
+        Returns:
+            (inicios de intervalo en segundos epoch, matriz (k, ROLLUP_WIDTH))
+        """
+        cols = self.columns(start_ts, end_ts, planta_id, plant_level=True)
+        if len(cols["ts"]) == 0:
+            return np.array([], dtype=np.int64), np.zeros((0, ROLLUP_WIDTH))
+
+        keys = cols["ts"] - cols["ts"] % step_seconds
+        # Los buckets se recorren en orden, así que los timestamps ya están ordenados
+        boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sums = np.add.reduceat(rollup_vectors(cols["interval"], cols), boundaries, axis=0)
+        return keys[boundaries], sums
+
+def summarize_vector(vector: np.ndarray) -> Dict[str, float]:
+    """Convierte un vector de acumulables en totales y promedios"""
+    result = {field: float(vector[i]) for i, field in enumerate(SUM_FIELDS)}
+    offset = len(SUM_FIELDS)
+    for j, field in enumerate(MEAN_FIELDS):
+        weight = vector[offset + len(MEAN_FIELDS) + j]
+        result[field] = float(vector[offset + j] / weight) if weight > 0 else 0.0
+    result["registros"] = int(round(vector[-1]))
+    return result
@@ -0,0 +1,115 @@
+import logging
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.schemas import PlantaBase
+
+logger = logging.getLogger(__name__)
+
+# Rango cubierto por las tablas de offsets (fuera de él se usa el offset del borde)
+TABLE_START = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TABLE_END = datetime(2100, 1, 1, tzinfo=timezone.utc)
+# Paso del muestreo inicial: las transiciones reales están a meses de distancia
+SAMPLE_STEP = timedelta(days=7)
+
+def resolve_timezone(name: Optional[str]) -> tzinfo:
+    """
+    ZoneInfo de un nombre IANA; si no es válido, la zona configurada por defecto
+
+    Si tampoco se encuentra la configurada (p.ej. Windows sin el paquete
+    tzdata) se usa UTC.
+    """
+    try:
+        return ZoneInfo(name or settings.timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        if name and name != settings.timezone:
+            logger.warning(f"Zona horaria inválida '{name}', usando {settings.timezone}")
+            return resolve_timezone(None)
+        logger.warning(f"Zona horaria '{settings.timezone}' no disponible (¿falta tzdata?), usando UTC")
+        return timezone.utc
+
+def plant_timezone(planta: Optional[PlantaBase]) -> tzinfo:
+    """Zona horaria de la planta (`zona_horaria`), o la configurada si no hay planta"""
+    return resolve_timezone(planta.zona_horaria if planta else None)
+
+class UTCOffsetTable:
+    """
+    Transiciones de offset UTC de una zona horaria, precalculadas
+
+    Convierte arrays de segundos epoch entre UTC y hora local de pared
+    con un searchsorted, sin llamar a zoneinfo por elemento. Los
+    timestamps locales son "epoch de la hora de pared naive", la misma
+    convención del store del histórico.
+    """
+
+    def __init__(self, tz: tzinfo):
+        self.tz = tz
+        transitions = [int(TABLE_START.timestamp())]
+        offsets = [self._offset(TABLE_START)]
+
+        moment = TABLE_START + SAMPLE_STEP
+        while moment < TABLE_END:
+            offset = self._offset(moment)
+            if offset != offsets[-1]:
+                # Refinar al segundo exacto de la transición dentro del paso
+                lo = int((moment - SAMPLE_STEP).timestamp())
+                hi = int(moment.timestamp())
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if self._offset(datetime.fromtimestamp(mid, timezone.utc)) == offsets[-1]:
+                        lo = mid
+                    else:
+                        hi = mid
+                transitions.append(hi)
+                offsets.append(offset)
+            moment += SAMPLE_STEP
+
+        # El primer tramo se extiende hacia atrás sin límite
+        transitions[0] = np.iinfo(np.int64).min
+        self.transitions = np.array(transitions, dtype=np.int64)
+        self.offsets = np.array(offsets, dtype=np.int64)
+
+    def _offset(self, moment: datetime) -> int:
+        return int(moment.astimezone(self.tz).utcoffset().total_seconds())
+
+    def offset_at(self, ts_utc: np.ndarray) -> np.ndarray:
+        """Offset (segundos) vigente en cada instante UTC"""
+        idx = np.searchsorted(self.transitions, ts_utc, side='right') - 1
+        return self.offsets[idx]
+
+    def to_local(self, ts_utc: np.ndarray) -> np.ndarray:
+        ts_utc = np.asarray(ts_utc, dtype=np.int64)
+        return ts_utc + self.offset_at(ts_utc)
+
+    def to_utc(self, ts_local: np.ndarray) -> np.ndarray:
+        """Hora local de pared → UTC (dos iteraciones de punto fijo sobre el offset)"""
+        ts_local = np.asarray(ts_local, dtype=np.int64)
+        guess = ts_local - self.offset_at(ts_local)
+        return ts_local - self.offset_at(guess)
+
+    def now_local(self) -> datetime:
+        """Hora local de pared actual (naive)"""
+        now = datetime.now(timezone.utc)
+        offset = int(self.offset_at(np.array([int(now.timestamp())]))[0])
+        return now.replace(tzinfo=None) + timedelta(seconds=offset)
+
+    def today(self) -> date:
+        return self.now_local().date()
+
+@lru_cache(maxsize=64)
+def _table(tz_key: str, tz: tzinfo) -> UTCOffsetTable:
+    return UTCOffsetTable(tz)
+
+def offset_table(tz: tzinfo) -> UTCOffsetTable:
+    """
+    Tabla de offsets (cacheada por zona)
+
+    Se arma con el tzinfo recibido, sin volver a resolver el nombre: el
+    `timezone.utc` de respaldo funciona aunque no haya base de zonas.
+    """
+    return _table(getattr(tz, "key", None) or str(tz), tz)
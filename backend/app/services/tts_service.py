@@ -1,15 +1,55 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Iterator, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import queue
+import re
+import threading
 
 from app.core.config import settings
+from app.core.metrics import record_cache, timed
 from app.services.kpi_calculator import kpi_calculator
 from app.services.data_loader import data_loader
+from app.services.audio_cache import AudioCache
+from app.services.tts_stub import (
+    StubOpenAIClient, StubAsyncOpenAIClient, silent_mp3, estimate_duration_seconds
+)
+from app.services.provider_http import provider_http
 
 logger = logging.getLogger(__name__)
 
+# Header que pide al SDK de OpenAI no leer el cuerpo completo antes de devolverlo
+STREAMED_RAW_RESPONSE_HEADER = "X-Stainless-Streamed-Raw-Response"
+STREAM_READ_BYTES = 4096
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentence_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Divide el texto en fragmentos de oraciones completas de hasta `max_chars`.
+    
+    El primer fragmento se limita a una oración para reducir el tiempo
+    hasta el primer audio.
+    """
+    sentences = [s for s in _SENTENCE_SPLIT.split(" ".join(text.split())) if s]
+    if not sentences:
+        return []
+    
+    chunks = [sentences[0]]
+    current = ""
+    for sentence in sentences[1:]:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    
+    return chunks
+
 class TTSService:
     """Servicio de Text-to-Speech usando OpenAI"""
     
@@ -17,13 +57,41 @@ class TTSService:
         self.output_folder = Path(output_folder)
         self.output_folder.mkdir(parents=True, exist_ok=True)
         self.client = None
+        self.async_client = None
+        self.cache: Optional[AudioCache] = None
+        # Origen del audio sintetizado; forma parte de la clave de caché
+        self.provider = "stub" if settings.tts_stub_client else "openai"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        if settings.tts_cache_enabled:
+            self.cache = AudioCache(
+                self.output_folder / "tts_cache",
+                max_bytes=settings.tts_cache_max_mb * 1024 * 1024
+            )
         
-        if settings.openai_api_key:
+        if settings.tts_stub_client:
+            latency = settings.tts_stub_latency_ms / 1000
+            self.client = StubOpenAIClient(latency_seconds=latency)
+            self.async_client = StubAsyncOpenAIClient(latency_seconds=latency)
+        elif settings.openai_api_key:
             try:
-                self.client = OpenAI(api_key=settings.openai_api_key)
+                # Clientes sobre el pool HTTP compartido (conexiones keep-alive)
+                self.client = OpenAI(
+                    api_key=settings.openai_api_key,
+                    base_url=settings.openai_base_url,
+                    timeout=provider_http.timeout,
+                    http_client=provider_http.client("openai")
+                )
+                self.async_client = AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    base_url=settings.openai_base_url,
+                    timeout=provider_http.timeout,
+                    http_client=provider_http.async_client("openai")
+                )
             except Exception as e:
                 logger.warning(f"No se pudo inicializar OpenAI client: {e}")
     
+    @timed("tts.generate")
     def generate_audio_summary(
         self,
         date_range: str = "30d",
@@ -32,37 +100,206 @@ class TTSService:
         """Genera audio con resumen ejecutivo"""
         
         if not self.client:
-            # Modo simulación
-            logger.warning("OpenAI API key no configurada. Modo simulación activado.")
-            return self._generate_mock_audio()
+            return self._simulated_audio()
         
-        # Generar texto del resumen
-        if custom_text:
-            text = custom_text
-        else:
-            text = self._generate_summary_text(date_range)
+        # Si el mismo texto ya fue sintetizado, servirlo desde disco
+        text, cache_key, cached = self._prepare_summary(date_range, custom_text)
+        if cached:
+            return str(cached)
         
         # Generar audio con OpenAI TTS
         try:
+            response = self.client.audio.speech.create(**self._speech_params(text))
+            return self._store_audio(cache_key, response.stream_to_file)
+        except Exception as e:
+            raise self._synthesis_error(e) from e
+    
+    @timed("tts.generate")
+    async def generate_audio_summary_async(
+        self,
+        date_range: str = "30d",
+        custom_text: Optional[str] = None
+    ) -> str:
+        """Versión async de generate_audio_summary (no bloquea el event loop)"""
+        
+        if not self.async_client:
+            return self._simulated_audio()
+        
+        text, cache_key, cached = self._prepare_summary(date_range, custom_text)
+        if cached:
+            return str(cached)
+        
+        try:
+            response = await self.async_client.audio.speech.create(**self._speech_params(text))
+            return self._store_audio(cache_key, lambda path: Path(path).write_bytes(response.content))
+        except Exception as e:
+            raise self._synthesis_error(e) from e
+    
+    def _simulated_audio(self) -> str:
+        logger.warning("OpenAI API key no configurada. Modo simulación activado.")
+        return self._generate_mock_audio()
+    
+    def _prepare_summary(
+        self,
+        date_range: str,
+        custom_text: Optional[str]
+    ) -> Tuple[str, Optional[str], Optional[Path]]:
+        """Texto a sintetizar, clave de caché y archivo cacheado si existe"""
+        text = custom_text if custom_text else self._generate_summary_text(date_range)
+        cache_key, cached = self._lookup_cache(text)
+        return text, cache_key, cached
+    
+    @staticmethod
+    def _speech_params(text: str) -> dict:
+        return {
+            "model": settings.openai_tts_model,
+            "voice": settings.openai_tts_voice,
+            "input": text
+        }
+    
+    def _store_audio(self, cache_key: Optional[str], writer) -> str:
+        """Guarda el audio que escribe `writer(ruta)` en la caché o en un archivo nuevo"""
+        if cache_key:
+            filepath = self.cache.put_file(cache_key, writer)
+        else:
+            filepath = self._new_output_path()
+            writer(str(filepath))
+        logger.info(f"Audio generado: {filepath}")
+        return str(filepath)
+    
+    @staticmethod
+    def _synthesis_error(e: Exception) -> ValueError:
+        logger.error(f"Error generando audio con OpenAI: {str(e)}")
+        return ValueError(f"Error generando audio: {str(e)}")
+    
+    def _lookup_cache(self, text: str) -> Tuple[Optional[str], Optional[Path]]:
+        """Devuelve (clave de caché, archivo cacheado si existe)"""
+        if not self.cache:
+            return None, None
+        
+        cache_key = AudioCache.make_key(
+            text, settings.openai_tts_model, settings.openai_tts_voice, self.provider
+        )
+        cached = self.cache.get(cache_key)
+        record_cache("tts_audio", hits=int(bool(cached)), misses=int(not cached))
+        if cached:
+            logger.info(f"Audio servido desde caché: {cached}")
+        return cache_key, cached
+    
+    def _new_output_path(self) -> Path:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.output_folder / f"resumen_ejecutivo_{timestamp}.mp3"
+    
+    def stream_audio_summary(
+        self,
+        date_range: str = "30d",
+        custom_text: Optional[str] = None
+    ) -> Tuple[Iterator[bytes], str]:
+        """
+        Genera el resumen ejecutivo como flujo de bytes MP3
+        
+        El texto se divide en fragmentos de oraciones que se sintetizan en
+        paralelo y se entregan en orden, a medida que llegan del proveedor.
+        
+        Returns:
+            (iterador de bytes, origen: "cache", "tts" o "mock")
+        """
+        # Resolver el texto antes de empezar a emitir, para que los errores
+        # lleguen al cliente como respuesta HTTP y no como un flujo cortado
+        text = custom_text if custom_text else self._generate_summary_text(date_range)
+        chunks = split_sentence_chunks(text, settings.tts_stream_chunk_chars)
+        
+        if not self.client:
+            logger.warning("OpenAI API key no configurada. Modo simulación activado.")
+            return self._iter_mock_audio(chunks), "mock"
+        
+        cache_key, cached = self._lookup_cache(text)
+        if cached:
+            return self._iter_file(cached), "cache"
+        
+        return self._iter_synthesized(chunks, cache_key), "tts"
+    
+    def _iter_synthesized(self, chunks: List[str], cache_key: Optional[str]) -> Iterator[bytes]:
+        """Sintetiza los fragmentos en paralelo y emite sus bytes en orden"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.tts_stream_max_workers,
+                thread_name_prefix="tts-stream"
+            )
+        
+        queues = [queue.Queue() for _ in chunks]
+        cancelled = threading.Event()
+        futures = [
+            self._executor.submit(self._synthesize_chunk, chunk, q, cancelled)
+            for chunk, q in zip(chunks, queues)
+        ]
+        
+        audio = bytearray() if cache_key else None
+        completed = False
+        try:
+            for q in queues:
+                while True:
+                    item = q.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise self._synthesis_error(item) from item
+                    if audio is not None:
+                        audio.extend(item)
+                    yield item
+            completed = True
+        finally:
+            # Si el cliente se desconecta, no sintetizar lo que falta y cortar
+            # las síntesis en curso (cierran su respuesta en el próximo bloque)
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+        
+        if completed and audio:
+            self.cache.put_bytes(cache_key, bytes(audio))
+            logger.info(f"Audio en streaming guardado en caché ({len(chunks)} fragmentos)")
+    
+    @timed("tts.synthesize_chunk")
+    def _synthesize_chunk(self, text: str, out: queue.Queue, cancelled: threading.Event) -> None:
+        """
+        Sintetiza un fragmento y publica sus bytes en la cola a medida que llegan
+
+        Deja de leer (y cierra la respuesta) si `cancelled` se activa.
+        """
+        try:
+            if cancelled.is_set():
+                return
             response = self.client.audio.speech.create(
-                model=settings.openai_tts_model,
-                voice=settings.openai_tts_voice,
-                input=text
+                **self._speech_params(text),
+                extra_headers={STREAMED_RAW_RESPONSE_HEADER: "true"}
             )
-            
-            # Guardar audio
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"resumen_ejecutivo_{timestamp}.mp3"
-            filepath = self.output_folder / filename
-            
-            response.stream_to_file(str(filepath))
-            
-            logger.info(f"Audio generado: {filepath}")
-            return str(filepath)
-            
+            try:
+                for data in response.iter_bytes(STREAM_READ_BYTES):
+                    if cancelled.is_set():
+                        return
+                    out.put(data)
+            finally:
+                close = getattr(response, "close", None)
+                if close:
+                    close()
+            out.put(None)
         except Exception as e:
-            logger.error(f"Error generando audio con OpenAI: {str(e)}")
-            raise ValueError(f"Error generando audio: {str(e)}")
+            out.put(e)
+    
+    def _iter_mock_audio(self, chunks: List[str]) -> Iterator[bytes]:
+        """Emite silencio MP3 real con la duración estimada de cada fragmento"""
+        for chunk in chunks:
+            audio = silent_mp3(estimate_duration_seconds(chunk))
+            for start in range(0, len(audio), STREAM_READ_BYTES):
+                yield audio[start:start + STREAM_READ_BYTES]
+    
+    def _iter_file(self, path: Path) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(STREAM_READ_BYTES)
+                if not data:
+                    break
+                yield data
     
     def _generate_summary_text(self, date_range: str) -> str:
         """Genera texto del resumen ejecutivo en español"""
@@ -105,8 +342,8 @@ class TTSService:
         filename = f"resumen_ejecutivo_{timestamp}_MOCK.mp3"
         filepath = self.output_folder / filename
         
-        # Crear archivo vacío como placeholder
-        filepath.touch()
+        # Crear archivo con silencio MP3 reproducible como placeholder
+        filepath.write_bytes(silent_mp3(5.0))
         
         logger.info(f"Audio simulado generado: {filepath}")
         return str(filepath)
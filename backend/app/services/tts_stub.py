@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Iterator
+
+# Frame MPEG-1 Layer III, 128 kbps, 44.1 kHz, mono. Con side info en cero el
+# decodificador produce silencio, así que es un MP3 válido y reproducible.
+_MP3_FRAME_HEADER = b"\xff\xfb\x90\xc4"
+_MP3_FRAME_SIZE = 417
+_MP3_FRAME_SECONDS = 1152 / 44100
+SILENT_MP3_FRAME = _MP3_FRAME_HEADER + b"\x00" * (_MP3_FRAME_SIZE - len(_MP3_FRAME_HEADER))
+
+# Velocidad aproximada de locución en español (caracteres por segundo)
+CHARS_PER_SECOND = 15.0
+
+def estimate_duration_seconds(text: str) -> float:
+    """Duración estimada del audio para un texto"""
+    return max(1.0, len(text.strip()) / CHARS_PER_SECOND)
+
+def silent_mp3(duration_seconds: float) -> bytes:
+    """Genera un MP3 de silencio de la duración indicada"""
+    frames = max(1, int(duration_seconds / _MP3_FRAME_SECONDS))
+    return SILENT_MP3_FRAME * frames
+
+class StubSpeechResponse:
+    """Respuesta compatible con la de `client.audio.speech.create` de OpenAI"""
+
+    def __init__(self, content: bytes, latency_seconds: float = 0.0):
+        self.content = content
+        self.latency_seconds = latency_seconds
+
+    def iter_bytes(self, chunk_size: int = 4096) -> Iterator[bytes]:
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def stream_to_file(self, file: str) -> None:
+        with open(file, "wb") as f:
+            for chunk in self.iter_bytes():
+                f.write(chunk)
+
+class _StubSpeech:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def create(self, model: str, voice: str, input: str, **kwargs) -> StubSpeechResponse:
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return StubSpeechResponse(silent_mp3(estimate_duration_seconds(input)))
+
+class _StubAudio:
+    def __init__(self, latency_seconds: float):
+        self.speech = _StubSpeech(latency_seconds)
+
+class StubOpenAIClient:
+    """Cliente TTS local (sin red) con la misma interfaz que `OpenAI().audio.speech`"""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.audio = _StubAudio(latency_seconds)
+
+class _StubAsyncSpeech(_StubSpeech):
+    async def create(self, model: str, voice: str, input: str, **kwargs) -> StubSpeechResponse:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return StubSpeechResponse(silent_mp3(estimate_duration_seconds(input)))
+
+class _StubAsyncAudio:
+    def __init__(self, latency_seconds: float):
+        self.speech = _StubAsyncSpeech(latency_seconds)
+
+class StubAsyncOpenAIClient:
+    """Versión async del cliente TTS local, equivalente a `AsyncOpenAI().audio.speech`"""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.audio = _StubAsyncAudio(latency_seconds)
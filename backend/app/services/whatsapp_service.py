@@ -4,21 +4,102 @@ import logging
 from typing import Optional
 
 from app.core.config import settings
+from app.core.metrics import timed
+from app.services.provider_http import (
+    provider_http, build_twilio_http_client, build_async_twilio_http_client
+)
 
 logger = logging.getLogger(__name__)
 
+# En producción el audio debe subirse a un servidor y enviarse por URL pública
+AUDIO_URL_NOTE = "Para enviar el audio, debe estar accesible via URL pública"
+
 class WhatsAppService:
     """Servicio de envío de mensajes por WhatsApp usando Twilio"""
     
     def __init__(self):
         self.client = None
+        self.async_client = None
         
         if settings.twilio_account_sid and settings.twilio_auth_token:
+            # Clientes sobre el pool HTTP compartido (conexiones keep-alive)
             self.client = Client(
                 settings.twilio_account_sid,
-                settings.twilio_auth_token
+                settings.twilio_auth_token,
+                http_client=build_twilio_http_client(provider_http)
+            )
+            self.async_client = Client(
+                settings.twilio_account_sid,
+                settings.twilio_auth_token,
+                http_client=build_async_twilio_http_client(provider_http)
             )
     
+    @staticmethod
+    def _validate_phone(to_phone: str) -> None:
+        if not to_phone.startswith('+'):
+            raise ValueError(
+                "El número de teléfono debe estar en formato E.164 (comenzar con +)"
+            )
+    
+    @staticmethod
+    def _audio_request(to_phone: str, audio_path: str) -> dict:
+        """Valida un envío de audio y arma los parámetros de messages.create"""
+        WhatsAppService._validate_phone(to_phone)
+        
+        # Validar que el archivo existe
+        if not Path(audio_path).exists():
+            raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
+        
+        # Nota: Para enviar archivos multimedia con Twilio WhatsApp,
+        # el archivo debe estar accesible públicamente via URL.
+        # Para demo local, se envía un mensaje de texto indicando que hay audio
+        return {
+            "from_": settings.twilio_whatsapp_from,
+            "body": f"📊 Nuevo reporte ejecutivo disponible. Audio generado el {Path(audio_path).stat().st_mtime}",
+            "to": f"whatsapp:{to_phone}"
+        }
+    
+    @staticmethod
+    def _text_request(to_phone: str, message: str) -> dict:
+        """Valida un envío de texto y arma los parámetros de messages.create"""
+        WhatsAppService._validate_phone(to_phone)
+        return {
+            "from_": settings.twilio_whatsapp_from,
+            "body": message,
+            "to": f"whatsapp:{to_phone}"
+        }
+    
+    @staticmethod
+    def _simulated(to_phone: str, kind: str) -> dict:
+        logger.warning("Credenciales de Twilio no configuradas. Modo simulación.")
+        return {
+            "success": True,
+            "mode": "simulation",
+            "message": f"SIMULACIÓN: {kind} se enviaría a {to_phone}",
+            "sid": "MOCK_SID_123456",
+            "status": "simulated"
+        }
+    
+    @staticmethod
+    def _sent(to_phone: str, message, note: Optional[str] = None) -> dict:
+        logger.info(f"Mensaje WhatsApp enviado a {to_phone}. SID: {message.sid}")
+        result = {
+            "success": True,
+            "mode": "real",
+            "message": "Mensaje enviado exitosamente",
+            "sid": message.sid,
+            "status": message.status
+        }
+        if note:
+            result["note"] = note
+        return result
+    
+    @staticmethod
+    def _send_error(e: Exception) -> ValueError:
+        logger.error(f"Error enviando mensaje WhatsApp: {str(e)}")
+        return ValueError(f"Error enviando WhatsApp: {str(e)}")
+    
+    @timed("whatsapp.send_audio")
     def send_audio(self, to_phone: str, audio_path: str) -> dict:
         """
         Envía audio por WhatsApp
@@ -30,58 +111,19 @@ class WhatsAppService:
         Returns:
             dict con resultado del envío
         """
-        
-        # Validar número de teléfono
-        if not to_phone.startswith('+'):
-            raise ValueError(
-                "El número de teléfono debe estar en formato E.164 (comenzar con +)"
-            )
-        
-        # Validar que el archivo existe
-        if not Path(audio_path).exists():
-            raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
+        params = self._audio_request(to_phone, audio_path)
         
         # Modo simulación si no hay credenciales
         if not self.client:
-            logger.warning("Credenciales de Twilio no configuradas. Modo simulación.")
-            return {
-                "success": True,
-                "mode": "simulation",
-                "message": f"SIMULACIÓN: Audio se enviaría a {to_phone}",
-                "sid": "MOCK_SID_123456",
-                "status": "simulated"
-            }
+            return self._simulated(to_phone, "Audio")
         
         try:
-            # Nota: Para enviar archivos multimedia con Twilio WhatsApp,
-            # el archivo debe estar accesible públicamente via URL.
-            # Para demo local, simular el envío.
-            
-            # En producción, subir el archivo a un servidor accesible
-            # y usar la URL pública aquí
-            
-            # Por ahora, enviar mensaje de texto indicando que hay audio
-            message = self.client.messages.create(
-                from_=settings.twilio_whatsapp_from,
-                body=f"📊 Nuevo reporte ejecutivo disponible. Audio generado el {Path(audio_path).stat().st_mtime}",
-                to=f"whatsapp:{to_phone}"
-            )
-            
-            logger.info(f"Mensaje WhatsApp enviado a {to_phone}. SID: {message.sid}")
-            
-            return {
-                "success": True,
-                "mode": "real",
-                "message": "Mensaje enviado exitosamente",
-                "sid": message.sid,
-                "status": message.status,
-                "note": "Para enviar el audio, debe estar accesible via URL pública"
-            }
-            
+            message = self.client.messages.create(**params)
         except Exception as e:
-            logger.error(f"Error enviando mensaje WhatsApp: {str(e)}")
-            raise ValueError(f"Error enviando WhatsApp: {str(e)}")
+            raise self._send_error(e) from e
+        return self._sent(to_phone, message, AUDIO_URL_NOTE)
     
+    @timed("whatsapp.send_text")
     def send_text(self, to_phone: str, message: str) -> dict:
         """
         Envía mensaje de texto por WhatsApp
@@ -93,42 +135,44 @@ class WhatsAppService:
         Returns:
             dict con resultado del envío
         """
-        
-        if not to_phone.startswith('+'):
-            raise ValueError(
-                "El número de teléfono debe estar en formato E.164 (comenzar con +)"
-            )
+        params = self._text_request(to_phone, message)
         
         if not self.client:
-            logger.warning("Credenciales de Twilio no configuradas. Modo simulación.")
-            return {
-                "success": True,
-                "mode": "simulation",
-                "message": f"SIMULACIÓN: Mensaje se enviaría a {to_phone}",
-                "sid": "MOCK_SID_123456",
-                "status": "simulated"
-            }
+            return self._simulated(to_phone, "Mensaje")
         
         try:
-            msg = self.client.messages.create(
-                from_=settings.twilio_whatsapp_from,
-                body=message,
-                to=f"whatsapp:{to_phone}"
-            )
-            
-            logger.info(f"Mensaje WhatsApp enviado a {to_phone}. SID: {msg.sid}")
-            
-            return {
-                "success": True,
-                "mode": "real",
-                "message": "Mensaje enviado exitosamente",
-                "sid": msg.sid,
-                "status": msg.status
-            }
-            
+            msg = self.client.messages.create(**params)
+        except Exception as e:
+            raise self._send_error(e) from e
+        return self._sent(to_phone, msg)
+
+    @timed("whatsapp.send_audio")
+    async def send_audio_async(self, to_phone: str, audio_path: str) -> dict:
+        """Versión async de send_audio (no bloquea el event loop)"""
+        params = self._audio_request(to_phone, audio_path)
+        
+        if not self.async_client:
+            return self._simulated(to_phone, "Audio")
+        
+        try:
+            message = await self.async_client.messages.create_async(**params)
+        except Exception as e:
+            raise self._send_error(e) from e
+        return self._sent(to_phone, message, AUDIO_URL_NOTE)
+    
+    @timed("whatsapp.send_text")
+    async def send_text_async(self, to_phone: str, message: str) -> dict:
+        """Versión async de send_text (no bloquea el event loop)"""
+        params = self._text_request(to_phone, message)
+        
+        if not self.async_client:
+            return self._simulated(to_phone, "Mensaje")
+        
+        try:
+            msg = await self.async_client.messages.create_async(**params)
         except Exception as e:
-            logger.error(f"Error enviando mensaje WhatsApp: {str(e)}")
-            raise ValueError(f"Error enviando WhatsApp: {str(e)}")
+            raise self._send_error(e) from e
+        return self._sent(to_phone, msg)
 
 # Instancia global
 whatsapp_service = WhatsAppService()
@@ -0,0 +1,106 @@
+"""
+Throughput de la detección de anomalías (z-score móvil, EWMA, CUSUM)
+
+Procesa una serie sintética con episodios de caída inyectados:
+  - en un solo lote vectorizado
+  - en streaming, en lotes de --batch puntos (estado incremental)
+  - con un bucle Python por punto sobre una muestra, como referencia
+
+Uso (desde backend/):
+    python -m benchmarks.bench_anomaly --points 5000000 --batch 1000
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from app.services.anomaly_detector import SeriesDetector
+
+def make_detector() -> SeriesDetector:
+    return SeriesDetector(
+        lower_is_worse=True, window=14, min_history=7, z_threshold=3.0,
+        ewma_alpha=0.3, ewma_threshold=3.0, cusum_k=0.5, cusum_h=4.0
+    )
+
+def generate(points: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.82, 0.02, points)
+    # Caídas de 3 puntos cada ~1000
+    starts = rng.integers(0, points - 3, points // 1000)
+    for offset in range(3):
+        values[starts + offset] -= 0.2
+    return values
+
+def python_loop(values: np.ndarray, window: int = 14, min_history: int = 7) -> int:
+    """Misma lógica punto a punto, sin NumPy"""
+    history = []
+    ewma_value = 0.0
+    s = 0.0
+    alpha = 0.3
+    ewma_sigma = math.sqrt(alpha / (2 - alpha))
+    flagged = 0
+    for x in values.tolist():
+        if len(history) >= min_history:
+            mean = sum(history) / len(history)
+            std = math.sqrt(max(sum(h * h for h in history) / len(history) - mean * mean, 0.0))
+            sigma = max(std, 0.01 * abs(mean) + 1e-9)
+            z = (x - mean) / sigma
+        else:
+            z = 0.0
+        ewma_value = (1 - alpha) * ewma_value + alpha * z
+        s = max(0.0, s - z - 0.5) if len(history) >= min_history else s
+        if len(history) >= min_history and (-z > 3.0 or -ewma_value / ewma_sigma > 3.0 or s > 4.0):
+            flagged += 1
+        history.append(x)
+        history = history[-window:]
+    return flagged
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=5_000_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--python-sample", type=int, default=200_000)
+    args = parser.parse_args()
+
+    values = generate(args.points)
+
+    start = time.perf_counter()
+    result = make_detector().update(values)
+    single_s = time.perf_counter() - start
+
+    detector = make_detector()
+    flagged_stream = 0
+    start = time.perf_counter()
+    for lo in range(0, args.points, args.batch):
+        flagged_stream += int(detector.update(values[lo:lo + args.batch])["flagged"].sum())
+    stream_s = time.perf_counter() - start
+
+    sample = values[:args.python_sample]
+    start = time.perf_counter()
+    python_loop(sample)
+    python_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "points": args.points,
+        "single_batch": {
+            "seconds": round(single_s, 4),
+            "points_per_second": round(args.points / single_s),
+            "flagged": int(result["flagged"].sum()),
+            "episodes": int(result["starts"].sum()),
+        },
+        "streaming": {
+            "batch": args.batch,
+            "seconds": round(stream_s, 4),
+            "points_per_second": round(args.points / stream_s),
+            "flagged": flagged_stream,
+        },
+        "python_loop": {
+            "points": len(sample),
+            "points_per_second": round(len(sample) / python_s),
+        },
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Memoria y latencia del store columnar del histórico con datos sub-diarios
+
+Genera un año de registros cada 15 minutos por inversor y compara:
+  - store columnar (int64 epoch + float32)
+  - DataFrame de pandas equivalente (float64, strings como objetos)
+  - lista de HistoricoPerformance (estimada con una muestra vía tracemalloc)
+y mide ventanas de KPIs, resampleo y reconstrucción de rollups.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_historico_memory --days 365 --inverters 45 --interval 15
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.models.schemas import HistoricoPerformance
+from app.services.rollups import FIELDS, HistoricoRollups
+from app.services.timeseries_store import HistoricoStore, SECONDS_PER_DAY, rollup_vectors
+
+PYDANTIC_SAMPLE = 20000
+
+def generate(days: int, inverters: int, interval_minutes: int, seed: int = 42) -> dict:
+    """Columnas sintéticas: curva solar diaria por inversor con ruido"""
+    rng = np.random.default_rng(seed)
+    step = interval_minutes * 60
+    start = int(np.datetime64("2025-01-01T00:00:00", "s").astype(np.int64))
+    times = start + np.arange(days * SECONDS_PER_DAY // step, dtype=np.int64) * step
+    n = len(times) * inverters
+
+    ts = np.repeat(times, inverters)
+    equipos = np.tile(np.array([f"INV-{i + 1:03d}" for i in range(inverters)]), len(times))
+    hour = (ts % SECONDS_PER_DAY) / 3600.0
+    solar = np.clip(np.sin((hour - 6.0) / 12.0 * np.pi), 0.0, None)
+    capacity_kwh = 1000.0 * interval_minutes / 60.0
+
+    irradiance = solar * 0.25 * interval_minutes / 15.0
+    expected = solar * capacity_kwh * 0.85
+    real = expected * rng.normal(0.97, 0.03, n)
+    pr = np.where(solar > 0.05, real / np.maximum(expected, 1e-9) * 0.85, np.nan)
+
+    values = {
+        "energia_real_kwh": real,
+        "energia_esperada_kwh": expected,
+        "irradiancia_poa_kwh_m2": irradiance,
+        "pr_real": pr,
+        "availability_real_pct": np.where(rng.random(n) < 0.01, 0.0, 100.0),
+        "curtailment_kwh": expected * 0.01,
+        "perdida_soiling_kwh": expected * 0.02,
+        "perdida_otros_kwh": expected * 0.005,
+        "ingresos_estimados_usd": real * 0.065,
+        "opex_estimado_usd": np.full(n, 0.5),
+    }
+    return {
+        "ts": ts,
+        "intervals": np.full(n, step, dtype=np.int32),
+        "plantas": np.full(n, "PV-001"),
+        "equipos": equipos,
+        "values": values,
+    }
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def dataframe_bytes(data: dict) -> int:
+    import pandas as pd
+
+    df = pd.DataFrame({
+        "fecha": data["ts"].astype("datetime64[s]"),
+        "planta_id": data["plantas"].astype(object),
+        "equipo_id": data["equipos"].astype(object),
+        "intervalo_minutos": data["intervals"].astype(np.int64) // 60,
+        **data["values"],
+    })
+    return int(df.memory_usage(deep=True).sum())
+
+def pydantic_bytes_per_row(data: dict) -> float:
+    sample = min(PYDANTIC_SAMPLE, len(data["ts"]))
+    fechas = data["ts"][:sample].astype("datetime64[s]").astype(str)
+    tracemalloc.start()
+    rows = [
+        HistoricoPerformance(
+            fecha=fechas[i],
+            planta_id=str(data["plantas"][i]),
+            equipo_id=str(data["equipos"][i]),
+            intervalo_minutos=int(data["intervals"][i]) // 60,
+            **{f: float(data["values"][f][i]) for f in FIELDS}
+        )
+        for i in range(sample)
+    ]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current / sample
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--inverters", type=int, default=45)
+    parser.add_argument("--interval", type=int, default=15, help="Minutos por registro")
+    args = parser.parse_args()
+
+    data = generate(args.days, args.inverters, args.interval)
+    rows = len(data["ts"])
+
+    store = HistoricoStore()
+    start = time.perf_counter()
+    store.upsert(data["ts"], data["intervals"], data["plantas"], data["equipos"], data["values"])
+    build_s = time.perf_counter() - start
+
+    last_ts = int(data["ts"][-1])
+    window_30d = last_ts - 30 * SECONDS_PER_DAY
+
+    def rebuild_rollups():
+        cols = store.columns()
+        days = (cols["ts"] // SECONDS_PER_DAY).astype("datetime64[D]")
+        HistoricoRollups().rebuild(
+            days, cols["planta"], list(store.plantas), rollup_vectors(cols["interval"], cols)
+        )
+
+    per_row = pydantic_bytes_per_row(data)
+    result = {
+        "rows": rows,
+        "days": args.days,
+        "inverters": args.inverters,
+        "interval_minutes": args.interval,
+        "memory_mb": {
+            "store": round(store.nbytes / 1e6, 1),
+            "dataframe": round(dataframe_bytes(data) / 1e6, 1),
+            "pydantic_estimate": round(per_row * rows / 1e6, 1),
+        },
+        "bytes_per_row": {
+            "store": round(store.nbytes / rows, 1),
+            "pydantic_estimate": round(per_row, 1),
+        },
+        "seconds": {
+            "build_store": round(build_s, 4),
+            "totals_30d": round(timed(lambda: store.totals(start_ts=window_30d)), 4),
+            "totals_all": round(timed(lambda: store.totals(), repeat=3), 4),
+            "resample_hour_7d": round(timed(
+                lambda: store.resample(3600, start_ts=last_ts - 7 * SECONDS_PER_DAY)
+            ), 4),
+            "rebuild_rollups": round(timed(rebuild_rollups, repeat=1), 4),
+        },
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Prueba de carga HTTP: sesiones concurrentes de dashboards CEO/CFO/COO
+
+Cada usuario virtual reproduce lo que pide el frontend:
+  - al abrir la app: GET /api/plant
+  - home: KPIs ejecutivos del rango elegido y, a veces, descarga del PDF
+  - ceo: KPIs + serie realtime de 24 h
+  - cfo: KPIs
+  - coo: KPIs 30d + top 10 tickets pendientes + serie de 1 h, y luego
+    la serie de 1 h cada 15 s mientras la vista está abierta
+Tras `--dwell` segundos en una vista navega a otra. `--time-scale`
+comprime los tiempos (0.1 = polls cada 1.5 s) para corridas cortas.
+
+Sin `--url` la app corre en el mismo proceso (httpx.ASGITransport, un
+solo event loop como un worker de uvicorn) sobre un dataset sintético;
+con `--url` se apunta a un servidor ya iniciado y con datos cargados.
+Reporta throughput, p50/p95/p99 y tasa de errores por endpoint en JSON.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_load --users 10,50,100 --duration 60 --time-scale 0.1
+    python -m benchmarks.bench_load --url http://localhost:8000 --users 25 --duration 300
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# Peso de cada vista al navegar y de cada rango en los selectores
+VIEWS = {"home": 0.35, "ceo": 0.2, "cfo": 0.15, "coo": 0.3}
+RANGES = {"30d": 0.6, "90d": 0.2, "YTD": 0.1, "12m": 0.1}
+POLL_SECONDS = 15.0  # COOView: setInterval(loadRealtime, 15000)
+
+class Recorder:
+    """Latencias y errores por endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **params) -> None:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, params=params or None)
+            await response.aread()
+            status = str(response.status_code)
+            failed = response.status_code >= 400
+        except httpx.HTTPError as e:
+            status, failed = type(e).__name__, True
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][status] += 1
+        if failed:
+            self.errors[name] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        endpoints = {}
+        for name in sorted(self.latencies):
+            values = np.array(self.latencies[name]) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            endpoints[name] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / elapsed, 3),
+                "error_rate": round(self.errors[name] / len(values), 4),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(values.max()), 2),
+                "status": dict(self.statuses[name]),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        all_values = np.concatenate([np.array(v) for v in self.latencies.values()]) * 1000 if total else None
+        summary = {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 3),
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+        }
+        if all_values is not None:
+            summary.update({
+                f"p{q}_ms": round(float(v), 2)
+                for q, v in zip((50, 95, 99), np.percentile(all_values, [50, 95, 99]))
+            })
+        return {"total": summary, "endpoints": endpoints}
+
+def _pick(weights: Dict[str, float], rng: random.Random) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+async def session(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    rng: random.Random,
+    deadline: float,
+    dwell: float,
+    time_scale: float,
+    pdf_rate: float
+) -> None:
+    """Un usuario: abre la app y navega entre vistas hasta el deadline"""
+    await recorder.request(client, "GET /api/plant", "GET", "/api/plant")
+    while time.monotonic() < deadline:
+        view = _pick(VIEWS, rng)
+        date_range = _pick(RANGES, rng)
+        leave_at = min(deadline, time.monotonic() + rng.uniform(0.5, 1.5) * dwell * time_scale)
+
+        if view == "home":
+            await recorder.request(client, "GET /api/kpis/exec", "GET", "/api/kpis/exec", range=date_range)
+            if rng.random() < pdf_rate:
+                await recorder.request(client, "POST /api/report/pdf", "POST", "/api/report/pdf", range=date_range)
+        elif view == "ceo":
+            await asyncio.gather(
+                recorder.request(client, "GET /api/kpis/exec", "GET", "/api/kpis/exec", range=date_range),
+                recorder.request(client, "GET /api/series/realtime?hours=24", "GET", "/api/series/realtime", hours=24),
+            )
+        elif view == "cfo":
+            await recorder.request(client, "GET /api/kpis/exec", "GET", "/api/kpis/exec", range=date_range)
+        else:
+            await asyncio.gather(
+                recorder.request(client, "GET /api/kpis/exec", "GET", "/api/kpis/exec", range="30d"),
+                recorder.request(
+                    client, "GET /api/tickets", "GET", "/api/tickets",
+                    status="pendiente", sort="costo_desc", limit=10
+                ),
+                recorder.request(client, "GET /api/series/realtime?hours=1", "GET", "/api/series/realtime", hours=1),
+            )
+            while time.monotonic() + POLL_SECONDS * time_scale < leave_at:
+                await asyncio.sleep(POLL_SECONDS * time_scale)
+                await recorder.request(
+                    client, "GET /api/series/realtime?hours=1", "GET", "/api/series/realtime", hours=1
+                )
+
+        await asyncio.sleep(max(0.0, leave_at - time.monotonic()))
+
+async def run_level(
+    make_client,
+    users: int,
+    duration: float,
+    ramp: float,
+    dwell: float,
+    time_scale: float,
+    pdf_rate: float,
+    seed: int
+) -> Dict[str, Dict]:
+    recorder = Recorder()
+    start = time.monotonic()
+    deadline = start + duration
+
+    async def user(index: int) -> None:
+        # Arranque escalonado a lo largo del ramp-up
+        await asyncio.sleep(ramp * index / max(users, 1))
+        await session(client, recorder, random.Random(seed + index), deadline, dwell, time_scale, pdf_rate)
+
+    async with make_client() as client:
+        await asyncio.gather(*(user(i) for i in range(users)))
+    elapsed = time.monotonic() - start
+    return {"users": users, "elapsed_seconds": round(elapsed, 3), **recorder.report(elapsed)}
+
+def in_process_client(data_folder: Optional[Path], days: int, tickets: int, seed: int, timeout: float):
+    """Cliente contra la app en este proceso, con el dataset cargado"""
+    from app.main import app
+    from app.services.data_loader import data_loader
+    from benchmarks.bench_suite import write_dataset
+
+    if data_folder is None:
+        data_folder = Path(tempfile.mkdtemp(prefix="bench-load-"))
+        write_dataset(data_folder, days, 1, tickets, seed)
+    data_loader.set_data_folder(str(data_folder))
+    outcome = data_loader.reload_data()
+    if not outcome["success"]:
+        raise RuntimeError(f"Recarga con errores: {outcome['errors']}")
+
+    from app.services.pdf_generator import pdf_generator
+    pdf_generator.output_folder = Path(tempfile.mkdtemp(prefix="bench-load-pdf-"))
+
+    transport = httpx.ASGITransport(app=app)
+    return lambda: httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Servidor local (p.ej. http://localhost:8000); sin url, en proceso")
+    parser.add_argument("--users", default="10", help="Usuarios concurrentes; lista separada por comas para un barrido")
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos por nivel de usuarios")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Segundos para iniciar todas las sesiones")
+    parser.add_argument("--dwell", type=float, default=60.0, help="Segundos promedio en cada vista")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Escala de polls y permanencia (0.1 = 10x más rápido)")
+    parser.add_argument("--pdf-rate", type=float, default=0.05, help="Probabilidad de descargar el PDF al abrir home")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-folder", type=Path, default=None, help="En proceso: carpeta de entrada existente")
+    parser.add_argument("--days", type=int, default=365, help="En proceso: días del dataset sintético")
+    parser.add_argument("--tickets", type=int, default=500, help="En proceso: tickets del dataset sintético")
+    parser.add_argument("--output", type=Path, default=None, help="Escribe el JSON en este archivo")
+    args = parser.parse_args()
+
+    levels = [int(u) for u in args.users.split(",") if u.strip()]
+    if args.url:
+        target = args.url
+        make_client = lambda: httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        logging.disable(logging.CRITICAL)
+        target = "in-process"
+        make_client = in_process_client(args.data_folder, args.days, args.tickets, args.seed, args.timeout)
+
+    results = [
+        asyncio.run(run_level(
+            make_client, users, args.duration, args.ramp, args.dwell, args.time_scale, args.pdf_rate, args.seed
+        ))
+        for users in levels
+    ]
+    report = {
+        "target": target,
+        "config": {
+            "duration_seconds": args.duration, "ramp_seconds": args.ramp, "dwell_seconds": args.dwell,
+            "time_scale": args.time_scale, "pdf_rate": args.pdf_rate, "seed": args.seed,
+            "views": VIEWS, "ranges": RANGES,
+        },
+        "levels": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Ráfaga de envíos TTS/WhatsApp contra el servidor sustituto local
+
+Mide latencia y reutilización de conexiones del pool HTTP compartido,
+tanto en la variante sync (threads) como async. Con una concurrencia
+mayor que PROVIDER_HTTP_MAX_KEEPALIVE las conexiones excedentes se
+cierran al liberarse y la tasa de reutilización baja.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_provider_pool --requests 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.provider_standin import ProviderStandIn
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=int, default=10)
+    args = parser.parse_args()
+
+    server = ProviderStandIn(latency_seconds=args.latency_ms / 1000).start()
+
+    # Apuntar los SDKs al servidor sustituto antes de crear los servicios
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-standin",
+        "OPENAI_BASE_URL": f"{server.base_url}/v1",
+        "TTS_CACHE_ENABLED": "false",
+        "TWILIO_ACCOUNT_SID": "ACstandin",
+        "TWILIO_AUTH_TOKEN": "standin",
+        "TWILIO_WHATSAPP_FROM": "whatsapp:+10000000000",
+        "TWILIO_BASE_URL": server.base_url
+    })
+    from app.services.provider_http import provider_http
+    from app.services.tts_service import tts_service
+    from app.services.whatsapp_service import whatsapp_service
+
+    results = {}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(
+            lambda i: whatsapp_service.send_text(f"+5491100{i:06d}", "Resumen"),
+            range(args.requests)
+        ))
+    results["whatsapp_sync_seconds"] = round(time.perf_counter() - start, 4)
+
+    async def burst_async():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with semaphore:
+                await whatsapp_service.send_text_async(f"+5491100{i:06d}", "Resumen")
+                await tts_service.generate_audio_summary_async(custom_text=f"Resumen {i}.")
+
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        await provider_http.aclose()
+
+    start = time.perf_counter()
+    asyncio.run(burst_async())
+    results["async_seconds"] = round(time.perf_counter() - start, 4)
+
+    results["client_stats"] = provider_http.stats()
+    results["server_tcp_connections"] = server.connections
+    provider_http.close()
+    server.stop()
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Serialización de respuestas grandes: camino por defecto de FastAPI vs fast_json
+
+Para /api/series/realtime (168 h = 2016 puntos) y /api/tickets (1000
+tickets) compara:
+  - default: validación contra response_model + jsonable_encoder + json.dumps
+    (lo que hace FastAPI con lo que retorna el endpoint)
+  - fast_json: pydantic-core directo sobre los modelos ya validados
+y, para la serie, construir los puntos con validación vs model_construct
+(en pydantic v2 model_construct es Python puro y no resulta más rápido).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_serialization --repeat 50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Callable, List
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import fast_json
+from app.models.schemas import RealtimeDataPoint, Ticket
+from app.services.realtime_simulator import STEP_SECONDS, RealtimeSimulator
+from benchmarks.bench_solar import make_plants
+
+def make_points(hours: int, validate: bool) -> List[RealtimeDataPoint]:
+    planta = make_plants(1)[0]
+    ts = int(time.time()) - STEP_SECONDS * np.arange(hours * 12 - 1, -1, -1, dtype=np.int64)
+    values = RealtimeSimulator(seed=1).simulate(planta, ts)
+    rounded = {k: np.round(v, 2).tolist() for k, v in values.items()}
+    build = RealtimeDataPoint if validate else RealtimeDataPoint.model_construct
+    return [
+        build(timestamp=datetime.fromtimestamp(t, timezone.utc), **{k: v[i] for k, v in rounded.items()})
+        for i, t in enumerate(ts.tolist())
+    ]
+
+def make_tickets(count: int) -> List[Ticket]:
+    rng = np.random.default_rng(3)
+    return [
+        Ticket(
+            ticket_id=f"TKT-{i:05d}", planta_id="PV-001", fecha_creacion="2026-02-07",
+            estado="Pendiente", tipo="Correctivo", criticidad="Alta",
+            equipo_id=f"INV-{i % 45:03d}" if i % 3 else None,
+            descripcion="Limpieza profunda de módulos fotovoltaicos",
+            costo_estimado_usd=float(rng.uniform(100, 50000)),
+            impacto_estimado_kwh=float(rng.uniform(0, 30000)),
+            sla_objetivo_horas=24, responsable="Ana Martínez",
+            fecha_estimada_resolucion="2026-02-17"
+        )
+        for i in range(count)
+    ]
+
+def timed(fn: Callable[[], bytes], repeat: int) -> dict:
+    samples = []
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(samples) * 1000, 3), "bytes": len(body), "_body": body}
+
+def compare(data: list, type_, repeat: int) -> dict:
+    field = create_response_field(name="response", type_=type_)
+
+    def default() -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=data))
+        return JSONResponse(content).body
+
+    def fast() -> bytes:
+        return fast_json(data, type_).body
+
+    results = {"default": timed(default, repeat), "fast_json": timed(fast, repeat)}
+    same = json.loads(results["default"].pop("_body")) == json.loads(results["fast_json"].pop("_body"))
+    results["speedup"] = round(results["default"]["median_ms"] / results["fast_json"]["median_ms"], 1)
+    results["same_payload"] = same
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, default=168)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    construct = {
+        "validated_ms": timed(lambda: make_points(args.hours, True) and b"", 10)["median_ms"],
+        "model_construct_ms": timed(lambda: make_points(args.hours, False) and b"", 10)["median_ms"],
+    }
+
+    print(json.dumps({
+        "realtime_points": args.hours * 12,
+        "realtime_build": construct,
+        "realtime": compare(make_points(args.hours, True), List[RealtimeDataPoint], args.repeat),
+        "tickets": compare(make_tickets(args.tickets), List[Ticket], args.repeat),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
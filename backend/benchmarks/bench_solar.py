@@ -0,0 +1,98 @@
+"""
+Simulación solar vectorizada para muchas plantas
+
+Genera --days días de puntos cada 5 minutos para --plants plantas
+sintéticas (ubicaciones al azar):
+  - en frío: calcula las tablas diarias de posición solar y POA
+  - en caliente: reutiliza las tablas cacheadas (solo indexado y ruido)
+  - referencia: posición solar recalculada punto a punto con math
+
+Uso (desde backend/):
+    python -m benchmarks.bench_solar --plants 100 --days 7
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from app.models.schemas import PlantaBase
+from app.services.realtime_simulator import STEP_SECONDS, RealtimeSimulator
+from app.services.solar_geometry import SolarLUTCache
+import app.services.realtime_simulator as simulator_module
+
+def make_plants(count: int, seed: int = 11) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        PlantaBase(
+            planta_id=f"PV-{i:03d}", nombre_planta=f"Planta {i}", pais="AR",
+            provincia_estado="Mendoza", ciudad="San Rafael",
+            lat=float(rng.uniform(-45, 45)), lon=float(rng.uniform(-120, 120)),
+            zona_horaria="UTC", potencia_dc_mwp=50.0, potencia_ac_mw=45.0,
+            cantidad_paneles=1, cantidad_strings=1, cantidad_inversores=1,
+            fecha_puesta_en_marcha="2022-06-15", tarifa_usd_mwh=60.0, target_pr=0.8,
+            target_availability=98.0, soiling_loss_target_pct=2.0,
+            degradation_annual_pct=0.5, curtailment_policy="N/A"
+        )
+        for i in range(count)
+    ]
+
+def python_elevation(t: float, lat: float, lon: float) -> float:
+    """Misma fórmula de elevación, punto a punto"""
+    n = t / 86400 + 2440587.5 - 2451545.0
+    mean_lon = math.radians((280.460 + 0.9856474 * n) % 360)
+    g = math.radians((357.528 + 0.9856003 * n) % 360)
+    ecl = mean_lon + math.radians(1.915) * math.sin(g) + math.radians(0.020) * math.sin(2 * g)
+    eps = math.radians(23.439 - 0.0000004 * n)
+    ra = math.atan2(math.cos(eps) * math.sin(ecl), math.cos(ecl))
+    dec = math.asin(math.sin(eps) * math.sin(ecl))
+    h = math.radians(((18.697374558 + 24.06570982441908 * n) % 24) * 15 + lon) - ra
+    phi = math.radians(lat)
+    return math.degrees(math.asin(
+        math.sin(phi) * math.sin(dec) + math.cos(phi) * math.cos(dec) * math.cos(h)
+    ))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plants", type=int, default=100)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    plants = make_plants(args.plants)
+    end = int(time.time())
+    ts = end - STEP_SECONDS * np.arange(args.days * 288 - 1, -1, -1, dtype=np.int64)
+
+    # Cache aislada para medir en frío
+    simulator_module.solar_lut = SolarLUTCache()
+    simulator = RealtimeSimulator(seed=1)
+
+    def run() -> float:
+        start = time.perf_counter()
+        for planta in plants:
+            simulator.simulate(planta, ts)
+        return time.perf_counter() - start
+
+    cold_s = run()
+    warm_s = run()
+
+    sample = ts[:2000].tolist()
+    start = time.perf_counter()
+    for t in sample:
+        python_elevation(t, plants[0].lat, plants[0].lon)
+    python_s = (time.perf_counter() - start) / len(sample)
+
+    points = len(ts) * len(plants)
+    print(json.dumps({
+        "plants": args.plants,
+        "points_per_plant": len(ts),
+        "points": points,
+        "cold_ms": round(cold_s * 1000, 2),
+        "warm_ms": round(warm_s * 1000, 2),
+        "warm_points_per_second": round(points / warm_s),
+        "python_loop_estimated_ms": round(python_s * points * 1000, 1),
+        "cache": simulator_module.solar_lut.stats(),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Latencia de arranque en frío de la API
+
+Cada muestra corre en un proceso nuevo y mide:
+  - import de app.main (y qué dependencias pesadas quedaron cargadas)
+  - evento de startup (autoconfiguración y carga de datos)
+  - primera request de KPIs y primera request de PDF (carga diferida)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 5 --warmup all
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ("pandas", "numpy", "reportlab", "openai", "twilio", "httpx")
+
+_PROBE = r"""
+import json, logging, sys, time
+logging.disable(logging.CRITICAL)
+t0 = time.perf_counter()
+import app.main
+t_import = time.perf_counter() - t0
+modules_after_import = [m for m in HEAVY if m in sys.modules]
+
+from fastapi.testclient import TestClient
+t1 = time.perf_counter()
+with TestClient(app.main.app) as client:
+    t_startup = time.perf_counter() - t1
+    t2 = time.perf_counter()
+    client.get("/api/kpis/exec")
+    t_kpis = time.perf_counter() - t2
+    if WARMUP_WAIT:
+        time.sleep(WARMUP_WAIT)
+    t3 = time.perf_counter()
+    client.post("/api/report/pdf")
+    t_pdf = time.perf_counter() - t3
+
+print(json.dumps({
+    "import_seconds": t_import,
+    "startup_seconds": t_startup,
+    "first_kpis_seconds": t_kpis,
+    "first_pdf_seconds": t_pdf,
+    "modules_after_import": modules_after_import,
+}))
+"""
+
+def run_once(warmup: str, warmup_wait: float) -> dict:
+    env = dict(os.environ, WARMUP_SERVICES=warmup)
+    code = f"HEAVY = {HEAVY_MODULES!r}\nWARMUP_WAIT = {warmup_wait!r}\n" + _PROBE
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", default="", help='"" (sin warmup), "all" o lista de servicios')
+    parser.add_argument("--warmup-wait", type=float, default=0.0,
+                        help="Segundos a esperar antes del PDF para que termine el warmup")
+    args = parser.parse_args()
+
+    samples = [run_once(args.warmup, args.warmup_wait) for _ in range(args.runs)]
+    summary = {"runs": args.runs, "warmup": args.warmup or None}
+    for key in ("import_seconds", "startup_seconds", "first_kpis_seconds", "first_pdf_seconds"):
+        values = [s[key] for s in samples]
+        summary[key] = {
+            "median": round(statistics.median(values), 4),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4)
+        }
+    summary["modules_after_import"] = samples[-1]["modules_after_import"]
+
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Suite de benchmarks: carga, KPIs, simulador, tickets y reportes
+
+Genera un dataset sintético reproducible con los scripts create_*_data.py
+a la escala pedida (años de histórico, muchas plantas, 100k tickets) y
+mide:
+  - DataLoader.reload_data (parseo de Excel/CSV, validación y rollups)
+  - calculate_executive_kpis por rango (primera llamada tras recargar y repetidas)
+  - generate_series(168) del simulador en tiempo real
+  - GET /api/tickets con cada orden y con el filtro de pendientes
+  - generación del PDF ejecutivo
+y emite JSON con la configuración, el commit y cada medición. Con
+`--baseline` agrega el cociente contra un resultado anterior (>1 = más lento).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_suite --days 1095 --plants 10 --tickets 100000 --output bench.json
+    python -m benchmarks.bench_suite --days 1095 --plants 10 --tickets 100000 --baseline bench.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from create_historico_data import create_historico_data
+from create_planta_data import create_planta_data
+from create_tickets_data import create_tickets_data
+
+TICKET_QUERIES = {
+    "costo_desc": "/api/tickets?sort=costo_desc",
+    "costo_asc": "/api/tickets?sort=costo_asc",
+    "fecha": "/api/tickets?sort=fecha",
+    "pendientes_top10": "/api/tickets?status=pendiente&sort=costo_desc&limit=10",
+}
+
+def write_dataset(folder: Path, days: int, plants: int, tickets: int, seed: int) -> Dict[str, int]:
+    """
+    Archivos de entrada en `folder`
+
+    Con la misma semilla los valores son idénticos; el histórico termina
+    hoy porque los rangos de KPIs (30d, YTD, ...) se cuentan desde hoy.
+    """
+    end_date = datetime.combine(datetime.now().date(), datetime.min.time())
+    create_planta_data(folder)
+    historico = create_historico_data(folder, days, plants, end_date=end_date, seed=seed)
+    tickets_df = create_tickets_data(folder, tickets, plants, seed=seed)
+    return {"historico_rows": len(historico), "tickets": len(tickets_df)}
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median": round(statistics.median(samples), 6),
+        "min": round(min(samples), 6),
+        "max": round(max(samples), 6),
+        "runs": len(samples),
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(folder: Path, repeat: int, skip_pdf: bool) -> Dict[str, Dict]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.services.data_loader import data_loader
+    from app.services.kpi_calculator import RANGES, kpi_calculator
+    from app.services.realtime_simulator import realtime_simulator
+
+    results: Dict[str, Dict] = {}
+    data_loader.set_data_folder(str(folder))
+
+    def reload() -> None:
+        outcome = data_loader.reload_data()
+        if not outcome["success"]:
+            raise RuntimeError(f"Recarga con errores: {outcome['errors']}")
+
+    results["reload_data"] = measure(reload, repeat)
+
+    # Primera llamada por rango tras una recarga (sin ventanas ni pronóstico cacheados)
+    reload()
+    for date_range in RANGES:
+        start = time.perf_counter()
+        kpi_calculator.calculate_executive_kpis(date_range)
+        first = time.perf_counter() - start
+        results[f"kpis_exec.{date_range}"] = {
+            "first": round(first, 6),
+            **measure(lambda: kpi_calculator.calculate_executive_kpis(date_range), repeat),
+        }
+
+    results["generate_series.168h"] = measure(lambda: realtime_simulator.generate_series(168), repeat)
+
+    # Sin context manager: no corre el startup (la recarga ya está hecha)
+    client = TestClient(app)
+    for name, url in TICKET_QUERIES.items():
+        def get_tickets() -> None:
+            response = client.get(url)
+            response.raise_for_status()
+        results[f"api_tickets.{name}"] = {
+            "items": len(client.get(url).json()),
+            **measure(get_tickets, repeat),
+        }
+
+    if not skip_pdf:
+        from app.services.pdf_generator import pdf_generator
+
+        pdf_generator.output_folder = Path(tempfile.mkdtemp(prefix="bench-pdf-"))
+        results["pdf_report.30d"] = measure(lambda: pdf_generator.generate_executive_report("30d"), repeat)
+
+    return results
+
+def compare(results: Dict[str, Dict], baseline_path: Path) -> Dict[str, float]:
+    """Cociente de medianas contra un JSON anterior de esta suite"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+    return {
+        name: round(value["median"] / baseline[name]["median"], 3)
+        for name, value in results.items()
+        if name in baseline and baseline[name]["median"] > 0
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365 * 3, help="Días de histórico por planta")
+    parser.add_argument("--plants", type=int, default=5)
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-folder", type=Path, default=None,
+                        help="Carpeta para el dataset (por defecto un directorio temporal)")
+    parser.add_argument("--skip-pdf", action="store_true")
+    parser.add_argument("--output", type=Path, default=None, help="Escribe el JSON en este archivo")
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON anterior para comparar medianas")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    folder = args.data_folder or Path(tempfile.mkdtemp(prefix="bench-data-"))
+    start = time.perf_counter()
+    sizes = write_dataset(folder, args.days, args.plants, args.tickets, args.seed)
+    generate_seconds = time.perf_counter() - start
+
+    report = {
+        "suite": "bench_suite",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "config": {
+            "days": args.days, "plants": args.plants, "tickets": args.tickets,
+            "seed": args.seed, "repeat": args.repeat,
+        },
+        "dataset": {**sizes, "generate_seconds": round(generate_seconds, 3), "folder": str(folder)},
+        "results": run_suite(folder, args.repeat, args.skip_pdf),
+    }
+    if args.baseline:
+        report["vs_baseline"] = compare(report["results"], args.baseline)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Prueba de carga de la cola de WhatsApp con el proveedor falso (sin red)
+
+Uso (desde backend/):
+    python -m benchmarks.bench_whatsapp_queue --messages 2000 --workers 8 --rate 500
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.message_queue import OutboundQueue, FakeWhatsAppProvider
+
+def run(messages: int, workers: int, rate: float, latency_ms: int, failure_rate: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        provider = FakeWhatsAppProvider(
+            latency_seconds=latency_ms / 1000,
+            failure_rate=failure_rate
+        )
+        queue = OutboundQueue(
+            db_path=str(Path(tmp) / "queue.db"),
+            provider=provider,
+            workers=workers,
+            rate_per_second=rate,
+            rate_burst=max(1, int(rate)),
+            backoff_base_seconds=0.05
+        )
+        recipients = [f"+54911{i:08d}" for i in range(messages)]
+
+        start = time.perf_counter()
+        batch = queue.broadcast(recipients, message="Resumen ejecutivo disponible")
+        enqueue_s = time.perf_counter() - start
+
+        drained = queue.wait_idle(timeout=max(60.0, messages / rate * 2))
+        total_s = time.perf_counter() - start
+        queue.stop()
+
+        return {
+            "messages": messages,
+            "workers": workers,
+            "rate_per_second": rate,
+            "provider_latency_ms": latency_ms,
+            "failure_rate": failure_rate,
+            "drained": drained,
+            "enqueue_seconds": round(enqueue_s, 4),
+            "total_seconds": round(total_s, 4),
+            "throughput_msg_s": round(messages / total_s, 1),
+            "status_counts": queue.get_batch(batch["batch_id"])["status_counts"]
+        }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=500.0, help="Mensajes por segundo")
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    result = run(args.messages, args.workers, args.rate, args.latency_ms, args.failure_rate)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
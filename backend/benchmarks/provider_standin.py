@@ -0,0 +1,84 @@
+"""
+Servidor HTTP local que sustituye a OpenAI TTS y Twilio en pruebas
+
+Responde `POST /v1/audio/speech` con silencio MP3 y
+`POST /2010-04-01/Accounts/<sid>/Messages.json` con un mensaje simulado.
+Usa HTTP/1.1 keep-alive y cuenta las conexiones TCP aceptadas, para
+verificar la reutilización de conexiones del lado del cliente.
+"""
+import json
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.tts_stub import silent_mp3, estimate_duration_seconds
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Evitar la espera de delayed ACK entre headers y cuerpo
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.count_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if self.server.latency_seconds:
+            time.sleep(self.server.latency_seconds)
+
+        if self.path.endswith("/audio/speech"):
+            text = json.loads(body or b"{}").get("input", "")
+            self._send(200, "audio/mpeg", silent_mp3(estimate_duration_seconds(text)))
+        elif self.path.endswith("/Messages.json"):
+            payload = {
+                "sid": f"SM{uuid.uuid4().hex}",
+                "status": "queued",
+                "body": "",
+                "to": "",
+                "from": ""
+            }
+            self._send(201, "application/json", json.dumps(payload).encode())
+        else:
+            self._send(404, "application/json", b'{"error": "not found"}')
+
+    def _send(self, status: int, content_type: str, data: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class ProviderStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency_seconds: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency_seconds = latency_seconds
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ProviderStandIn":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
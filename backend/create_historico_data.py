@@ -1,18 +1,10 @@
-import pandas as pd
-import numpy as np
+import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import List, Optional
 
-# Configuración
-output_dir = Path("../data/input")
-output_dir.mkdir(parents=True, exist_ok=True)
-
-# Generar 90 días de histórico
-num_days = 90
-end_date = datetime.now()
-start_date = end_date - timedelta(days=num_days)
-
-dates = pd.date_range(start=start_date, end=end_date, freq='D')
+import numpy as np
+import pandas as pd
 
 # Parámetros de la planta
 potencia_dc_mwp = 50.0
@@ -20,56 +12,72 @@ target_pr = 0.82
 target_availability = 98.5
 tarifa_usd_mwh = 65.0
 
-# Generar datos
-data = []
+def plant_ids(plants: int) -> List[str]:
+    return [f"PV-{i + 1:03d}" for i in range(plants)]
+
+def create_historico_data(
+    output_dir: Path = Path("../data/input"),
+    num_days: int = 90,
+    plants: int = 1,
+    end_date: Optional[datetime] = None,
+    seed: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Escribe Historico_Performance.csv: un registro diario por planta
+
+    Los valores se generan vectorizados, así que escala a años de datos
+    y muchas plantas (PV-001, PV-002, ...). Con `seed` el archivo es
+    reproducible.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=num_days)
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    n = len(dates) * plants
 
-for date in dates:
     # Simular variación estacional y aleatoria
-    season_factor = 1.0 + 0.2 * np.sin((date.dayofyear / 365) * 2 * np.pi - np.pi/2)
+    day_of_year = np.tile(dates.dayofyear.to_numpy(), plants)
+    season_factor = 1.0 + 0.2 * np.sin((day_of_year / 365) * 2 * np.pi - np.pi/2)
     daily_hours_equiv = 5.5 * season_factor  # Horas equivalentes de sol
-    
-    # Energía esperada (kWh)
+
+    # Energía esperada (kWh) y real con variación aleatoria (+/- 5%)
     energia_esperada_kwh = potencia_dc_mwp * 1000 * daily_hours_equiv * target_pr
-    
-    # Energía real con variación aleatoria
-    variation = np.random.normal(1.0, 0.05)  # +/- 5%
-    energia_real_kwh = energia_esperada_kwh * variation
-    
-    # Irradiancia
-    irradiancia_poa = daily_hours_equiv * np.random.uniform(0.95, 1.05)
-    
-    # PR real
-    pr_real = (energia_real_kwh / (potencia_dc_mwp * 1000 * irradiancia_poa)) if irradiancia_poa > 0 else 0
-    pr_real = max(0.70, min(0.88, pr_real))
-    
-    # Availability
-    availability_real = np.random.uniform(96.0, 99.8)
-    
-    # Pérdidas
-    curtailment_kwh = energia_esperada_kwh * np.random.uniform(0.02, 0.05)
-    perdida_soiling_kwh = energia_esperada_kwh * np.random.uniform(0.015, 0.035)
-    perdida_otros_kwh = energia_esperada_kwh * np.random.uniform(0.01, 0.03)
-    
+    energia_real_kwh = energia_esperada_kwh * rng.normal(1.0, 0.05, n)
+
+    # Irradiancia y PR real
+    irradiancia_poa = daily_hours_equiv * rng.uniform(0.95, 1.05, n)
+    pr_real = np.clip(energia_real_kwh / (potencia_dc_mwp * 1000 * irradiancia_poa), 0.70, 0.88)
+
     # Financiero
     ingresos_estimados_usd = (energia_real_kwh / 1000) * tarifa_usd_mwh
-    opex_estimado_usd = ingresos_estimados_usd * np.random.uniform(0.15, 0.25)
-    
-    data.append({
-        'fecha': date.strftime('%Y-%m-%d'),
-        'planta_id': 'PV-001',
-        'energia_real_kwh': round(energia_real_kwh, 2),
-        'energia_esperada_kwh': round(energia_esperada_kwh, 2),
-        'irradiancia_poa_kwh_m2': round(irradiancia_poa, 2),
-        'pr_real': round(pr_real, 4),
-        'availability_real_pct': round(availability_real, 2),
-        'curtailment_kwh': round(curtailment_kwh, 2),
-        'perdida_soiling_kwh': round(perdida_soiling_kwh, 2),
-        'perdida_otros_kwh': round(perdida_otros_kwh, 2),
-        'ingresos_estimados_usd': round(ingresos_estimados_usd, 2),
-        'opex_estimado_usd': round(opex_estimado_usd, 2)
+
+    df = pd.DataFrame({
+        'fecha': np.tile(dates.strftime('%Y-%m-%d').to_numpy(), plants),
+        'planta_id': np.repeat(plant_ids(plants), len(dates)),
+        'energia_real_kwh': energia_real_kwh.round(2),
+        'energia_esperada_kwh': energia_esperada_kwh.round(2),
+        'irradiancia_poa_kwh_m2': irradiancia_poa.round(2),
+        'pr_real': pr_real.round(4),
+        'availability_real_pct': rng.uniform(96.0, 99.8, n).round(2),
+        'curtailment_kwh': (energia_esperada_kwh * rng.uniform(0.02, 0.05, n)).round(2),
+        'perdida_soiling_kwh': (energia_esperada_kwh * rng.uniform(0.015, 0.035, n)).round(2),
+        'perdida_otros_kwh': (energia_esperada_kwh * rng.uniform(0.01, 0.03, n)).round(2),
+        'ingresos_estimados_usd': ingresos_estimados_usd.round(2),
+        'opex_estimado_usd': (ingresos_estimados_usd * rng.uniform(0.15, 0.25, n)).round(2)
     })
+    df.to_csv(output_dir / 'Historico_Performance.csv', index=False)
+    return df
 
-df = pd.DataFrame(data)
-df.to_csv(output_dir / 'Historico_Performance.csv', index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera Historico_Performance.csv")
+    parser.add_argument("--output", type=Path, default=Path("../data/input"))
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--plants", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
 
-print(f"✓ Historico_Performance.csv creado con {len(df)} registros")
+    df = create_historico_data(args.output, args.days, args.plants, seed=args.seed)
+    print(f"✓ Historico_Performance.csv creado con {len(df)} registros")
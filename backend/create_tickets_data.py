@@ -1,14 +1,12 @@
-import pandas as pd
-import numpy as np
+import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 
-# Configuración
-output_dir = Path("../data/input")
-output_dir.mkdir(parents=True, exist_ok=True)
+import numpy as np
+import pandas as pd
 
-# Generar tickets
-tickets_data = []
+from create_historico_data import plant_ids
 
 estados = ['Pendiente', 'En Progreso', 'Bloqueado', 'Cerrado']
 tipos = ['Correctivo', 'Preventivo', 'Predictivo', 'Emergencia']
@@ -34,101 +32,83 @@ descripciones = [
     'Revisión de sistema de puesta a tierra'
 ]
 
-# Generar 50 tickets
-num_tickets = 50
+# Distribución realista por posición: fracción acumulada de cada estado / criticidad
+estado_cortes = [(0.3, 'Pendiente'), (0.5, 'En Progreso'), (0.6, 'Bloqueado'), (1.0, 'Cerrado')]
+criticidad_cortes = [(0.1, 'Crítica'), (0.3, 'Alta'), (0.7, 'Media'), (1.0, 'Baja')]
+
+# Por criticidad: rango de costo (USD), rango de impacto (kWh) y SLA (horas)
+costo_rango = {'Crítica': (15000, 50000), 'Alta': (5000, 15000), 'Media': (1000, 5000), 'Baja': (200, 1000)}
+impacto_rango = {'Crítica': (5000, 25000), 'Alta': (5000, 25000), 'Media': (500, 5000), 'Baja': (0, 500)}
+sla_horas = {'Crítica': 4, 'Alta': 24, 'Media': 72, 'Baja': 168}
+
+def _by_position(n: int, cortes: list) -> np.ndarray:
+    position = np.arange(n) / n
+    labels = np.array([label for _, label in cortes], dtype=object)
+    return labels[np.searchsorted([corte for corte, _ in cortes], position, side='right')]
+
+def create_tickets_data(
+    output_dir: Path = Path("../data/input"),
+    num_tickets: int = 50,
+    plants: int = 1,
+    seed: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Escribe Tickets_Mantenimiento.csv
+
+    Con los 50 tickets por defecto reproduce la distribución original
+    (15 pendientes, 10 en progreso, 5 bloqueados, 20 cerrados); a mayor
+    escala mantiene las proporciones y reparte los tickets entre
+    `plants` plantas. Con `seed` el archivo es reproducible.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    n = num_tickets
+    now = datetime.now()
+
+    estado = _by_position(n, estado_cortes)
+    criticidad = _by_position(n, criticidad_cortes)
+
+    # Fecha de creación (últimos 60 días) y estimada de resolución (no aplica a cerrados)
+    creacion = np.datetime64(now.date()) - rng.integers(1, 60, n).astype('timedelta64[D]')
+    resolucion = np.datetime64(now.date()) + rng.integers(1, 15, n).astype('timedelta64[D]')
+    resolucion = np.where(estado == 'Cerrado', None, resolucion.astype(str).astype(object))
+
+    def por_criticidad(rangos: dict) -> np.ndarray:
+        low = np.array([rangos[c][0] for c in criticidad], dtype=float)
+        high = np.array([rangos[c][1] for c in criticidad], dtype=float)
+        return rng.uniform(low, high)
 
-for i in range(num_tickets):
-    ticket_id = f"TKT-{i+1:04d}"
-    
-    # Distribución realista de estados
-    if i < 15:
-        estado = 'Pendiente'
-    elif i < 25:
-        estado = 'En Progreso'
-    elif i < 30:
-        estado = 'Bloqueado'
-    else:
-        estado = 'Cerrado'
-    
-    # Distribución de criticidad
-    if i < 5:
-        criticidad = 'Crítica'
-    elif i < 15:
-        criticidad = 'Alta'
-    elif i < 35:
-        criticidad = 'Media'
-    else:
-        criticidad = 'Baja'
-    
-    tipo = np.random.choice(tipos)
-    equipo_id = np.random.choice(equipos)
-    descripcion = np.random.choice(descripciones)
-    responsable = np.random.choice(responsables)
-    
-    # Fecha de creación (últimos 60 días)
-    days_ago = np.random.randint(1, 60)
-    fecha_creacion = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
-    
-    # Costo basado en criticidad
-    if criticidad == 'Crítica':
-        costo_base = np.random.uniform(15000, 50000)
-    elif criticidad == 'Alta':
-        costo_base = np.random.uniform(5000, 15000)
-    elif criticidad == 'Media':
-        costo_base = np.random.uniform(1000, 5000)
-    else:
-        costo_base = np.random.uniform(200, 1000)
-    
-    costo_estimado_usd = round(costo_base, 2)
-    
-    # Impacto en energía
-    if criticidad in ['Crítica', 'Alta']:
-        impacto_kwh = np.random.uniform(5000, 25000)
-    elif criticidad == 'Media':
-        impacto_kwh = np.random.uniform(500, 5000)
-    else:
-        impacto_kwh = np.random.uniform(0, 500)
-    
-    impacto_estimado_kwh = round(impacto_kwh, 2)
-    
-    # SLA
-    if criticidad == 'Crítica':
-        sla_objetivo_horas = 4
-    elif criticidad == 'Alta':
-        sla_objetivo_horas = 24
-    elif criticidad == 'Media':
-        sla_objetivo_horas = 72
-    else:
-        sla_objetivo_horas = 168
-    
-    # Fecha estimada de resolución
-    if estado == 'Cerrado':
-        fecha_estimada_resolucion = None
-    else:
-        days_to_resolve = np.random.randint(1, 15)
-        fecha_estimada_resolucion = (datetime.now() + timedelta(days=days_to_resolve)).strftime('%Y-%m-%d')
-    
-    tickets_data.append({
-        'ticket_id': ticket_id,
-        'planta_id': 'PV-001',
-        'fecha_creacion': fecha_creacion,
+    ids = plant_ids(plants)
+    df = pd.DataFrame({
+        'ticket_id': [f"TKT-{i + 1:04d}" for i in range(n)],
+        'planta_id': ids[0] if plants == 1 else rng.choice(ids, n),
+        'fecha_creacion': creacion.astype(str),
         'estado': estado,
-        'tipo': tipo,
+        'tipo': rng.choice(tipos, n),
         'criticidad': criticidad,
-        'equipo_id': equipo_id,
-        'descripcion': descripcion,
-        'costo_estimado_usd': costo_estimado_usd,
-        'impacto_estimado_kwh': impacto_estimado_kwh,
-        'sla_objetivo_horas': sla_objetivo_horas,
-        'responsable': responsable,
-        'fecha_estimada_resolucion': fecha_estimada_resolucion
+        'equipo_id': rng.choice(np.array(equipos, dtype=object), n),
+        'descripcion': rng.choice(descripciones, n),
+        'costo_estimado_usd': por_criticidad(costo_rango).round(2),
+        'impacto_estimado_kwh': por_criticidad(impacto_rango).round(2),
+        'sla_objetivo_horas': [sla_horas[c] for c in criticidad],
+        'responsable': rng.choice(responsables, n),
+        'fecha_estimada_resolucion': resolucion
     })
+    df.to_csv(output_dir / 'Tickets_Mantenimiento.csv', index=False)
+    return df
 
-df = pd.DataFrame(tickets_data)
-df.to_csv(output_dir / 'Tickets_Mantenimiento.csv', index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera Tickets_Mantenimiento.csv")
+    parser.add_argument("--output", type=Path, default=Path("../data/input"))
+    parser.add_argument("--tickets", type=int, default=50)
+    parser.add_argument("--plants", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
 
-print(f"✓ Tickets_Mantenimiento.csv creado con {len(df)} tickets")
-print(f"  - Pendientes: {len(df[df['estado']=='Pendiente'])}")
-print(f"  - En Progreso: {len(df[df['estado']=='En Progreso'])}")
-print(f"  - Bloqueados: {len(df[df['estado']=='Bloqueado'])}")
-print(f"  - Cerrados: {len(df[df['estado']=='Cerrado'])}")
+    df = create_tickets_data(args.output, args.tickets, args.plants, seed=args.seed)
+    print(f"✓ Tickets_Mantenimiento.csv creado con {len(df)} tickets")
+    print(f"  - Pendientes: {len(df[df['estado']=='Pendiente'])}")
+    print(f"  - En Progreso: {len(df[df['estado']=='En Progreso'])}")
+    print(f"  - Bloqueados: {len(df[df['estado']=='Bloqueado'])}")
+    print(f"  - Cerrados: {len(df[df['estado']=='Cerrado'])}")
@@ -42,6 +42,7 @@ pip install --only-binary :all: ^
     twilio==8.10.3 ^
     python-dateutil==2.8.2 ^
     pytz==2023.3 ^
+    "tzdata>=2024.1" ^
     aiofiles==23.2.1
 
 echo.
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.data_loader import DataLoader
+from create_historico_data import create_historico_data
+from create_planta_data import create_planta_data
+from create_tickets_data import create_tickets_data
+
+FIELDS_ROW = dict(
+    energia_real_kwh=1000.0,
+    energia_esperada_kwh=1100.0,
+    irradiancia_poa_kwh_m2=5.0,
+    pr_real=0.8,
+    availability_real_pct=99.0,
+    curtailment_kwh=10.0,
+    perdida_soiling_kwh=5.0,
+    perdida_otros_kwh=5.0,
+    ingresos_estimados_usd=65.0,
+    opex_estimado_usd=13.0,
+)
+
+@pytest.fixture
+def loader(tmp_path):
+    """DataLoader con 30 días sintéticos de una planta (PV-001) hasta 2026-02-12"""
+    create_planta_data(tmp_path)
+    create_historico_data(tmp_path, 30, 1, end_date=datetime(2026, 2, 12), seed=1)
+    create_tickets_data(tmp_path, 10, 1, seed=1)
+    loader = DataLoader()
+    loader.set_data_folder(str(tmp_path))
+    assert loader.reload_data()["success"]
+    return loader
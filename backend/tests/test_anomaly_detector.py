@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.schemas import HistoricoPerformance
+from app.services import anomaly_detector as module
+from app.services import expected_energy as expected_module
+from app.services import realtime_simulator as simulator_module
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.realtime_simulator import RealtimeSimulator
+from tests.conftest import FIELDS_ROW
+
+# Mediodía en la planta de prueba (UTC-3)
+NOON = int(datetime(2026, 2, 12, 15, tzinfo=timezone.utc).timestamp())
+
+@pytest.fixture
+def simulator(loader, monkeypatch):
+    for mod in (module, simulator_module, expected_module):
+        monkeypatch.setattr(mod, "data_loader", loader)
+    simulator = RealtimeSimulator(seed=1)
+    monkeypatch.setattr(simulator, "_has_critical_tickets", lambda: False)
+    monkeypatch.setattr(module, "realtime_simulator", simulator)
+    return simulator
+
+@pytest.fixture
+def detector(simulator):
+    return AnomalyDetector()
+
+def _row(fecha, **values):
+    return HistoricoPerformance(fecha=fecha, planta_id="PV-001", **{**FIELDS_ROW, **values})
+
+def _events_on(detector, fecha):
+    return [e for e in detector.get_events() if e['timestamp'].startswith(fecha)]
+
+def test_replaced_past_day_recomputes_events(loader, detector):
+    detector.process_new()
+    assert not _events_on(detector, "2026-02-05")
+
+    # Día ya evaluado con una caída fuerte de disponibilidad
+    baseline = loader.historico.row("PV-001", "2026-02-05")
+    loader.append_historico([_row("2026-02-05", **{
+        **baseline.model_dump(exclude={'fecha', 'planta_id', 'equipo_id', 'intervalo_minutos'}),
+        'availability_real_pct': 40.0,
+    })])
+    detector.process_new()
+    assert _events_on(detector, "2026-02-05")
+
+    # Restaurar el valor original descarta el evento
+    loader.append_historico([baseline])
+    detector.process_new()
+    assert not _events_on(detector, "2026-02-05")
+
+def test_realtime_drop_emits_event_once(detector, simulator, monkeypatch):
+    detector.process_realtime(now=NOON)
+    before = len(detector.realtime_events)
+
+    # Tickets críticos: la potencia cae 5-30% desde el próximo punto
+    monkeypatch.setattr(simulator, "_has_critical_tickets", lambda: True)
+    assert detector.process_realtime(now=NOON + 1800) > 0
+    new = detector.realtime_events[before:]
+    assert all(e['fuente'] == 'tiempo_real' and e['timestamp'] > "2026-02-12T12:00:00" for e in new)
+    assert {e['kpi'] for e in new} & {'PR'}
+
+    # Sin puntos nuevos no se reprocesa nada
+    assert detector.process_realtime(now=NOON + 1800) == 0
+    assert len(detector.realtime_events) == before + len(new)
+
+def test_regenerated_realtime_buffer_rewinds_state(loader, detector, simulator):
+    detector.process_realtime(now=NOON)
+    generation = simulator.generation
+
+    # El reloj retrocede: el buffer se descarta y la serie se reevalúa completa
+    detector.process_realtime(now=NOON - 86400)
+    assert simulator.generation == generation + 1
+    assert detector._rt_last_ts <= NOON - 86400
+    assert all(e['timestamp'] < "2026-02-11T12:01:00" for e in detector.realtime_events)
+
+    # Una recarga también regenera el buffer
+    assert loader.reload_data()["success"]
+    detector.process_realtime(now=NOON)
+    assert simulator.generation == generation + 2
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import data
+from app.main import app
+
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+@pytest.fixture
+def client(loader, monkeypatch):
+    monkeypatch.setattr(data, "data_loader", loader)
+    return TestClient(app)
+
+def test_each_coding_has_its_own_etag(client):
+    plain = client.get("/api/tickets", headers=IDENTITY)
+    gzipped = client.get("/api/tickets", headers=GZIP)
+
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.content == plain.content
+    assert gzipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    for response in (plain, gzipped):
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+@pytest.mark.parametrize("headers", [IDENTITY, GZIP], ids=["identity", "gzip"])
+def test_304_for_each_coding(client, headers):
+    etag = client.get("/api/tickets", headers=headers).headers["ETag"]
+
+    again = client.get("/api/tickets", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert "content-encoding" not in again.headers
+
+def test_gzip_etag_does_not_validate_identity(client):
+    gzip_etag = client.get("/api/tickets", headers=GZIP).headers["ETag"]
+    response = client.get("/api/tickets", headers={**IDENTITY, "If-None-Match": gzip_etag})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
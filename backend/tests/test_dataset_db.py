@@ -0,0 +1,43 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.schemas import HistoricoPerformance
+from app.services.data_loader import DataLoader
+from app.services.rollups import GRANULARITIES
+from tests.conftest import FIELDS_ROW
+
+@pytest.fixture
+def db_loader(loader, tmp_path, monkeypatch):
+    """Mismos datos que `loader`, con DATASET_DB"""
+    monkeypatch.setattr(settings, "dataset_db", str(tmp_path / "dataset.db"))
+    db_loader = DataLoader()
+    db_loader.set_data_folder(loader.data_folder)
+    assert db_loader.reload_data()["success"]
+    return db_loader
+
+def _append_both(loaders, rows):
+    for loader in loaders:
+        loader.append_historico(rows)
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+def test_sql_period_sums_match_rollups(loader, db_loader, granularity):
+    # Equipo en un día con registro de planta (no suma) y en un día sin él (suma)
+    _append_both((loader, db_loader), [
+        HistoricoPerformance(fecha="2026-02-12", planta_id="PV-001", equipo_id="INV-001", **FIELDS_ROW),
+        HistoricoPerformance(fecha="2026-02-13", planta_id="PV-001", equipo_id="INV-001", **FIELDS_ROW),
+        HistoricoPerformance(fecha="2026-02-13", planta_id="PV-001", equipo_id="INV-002", **FIELDS_ROW),
+    ])
+    for planta_id in (None, "PV-001"):
+        args = (granularity, planta_id, date(2026, 1, 20), date(2026, 2, 13))
+        expected_keys, expected = loader.rollups.period_sums(*args)
+        keys, sums = db_loader.period_sums(*args)
+        np.testing.assert_array_equal(keys, expected_keys)
+        np.testing.assert_allclose(sums, expected)
+
+def test_sql_window_matches_store(loader, db_loader):
+    start = datetime(2026, 2, 1)
+    np.testing.assert_allclose(db_loader.window_vector(start), loader.window_vector(start))
+    assert not db_loader.period_sums("month", None, date(2027, 1, 1), date(2027, 2, 1))[0].size
@@ -0,0 +1,19 @@
+from datetime import date
+
+import pytest
+
+from app.services import expected_energy as module
+from app.services.expected_energy import ExpectedEnergyModel
+
+@pytest.fixture
+def model(loader, monkeypatch):
+    monkeypatch.setattr(module, "data_loader", loader)
+    return ExpectedEnergyModel()
+
+def test_deviation_covers_range_with_data(model):
+    result = model.deviation(date(2026, 2, 1), date(2026, 2, 12), granularity="week")
+    assert result['periodos'] and result['energia_real_kwh'] > 0
+
+def test_deviation_without_data_in_range_raises(model):
+    with pytest.raises(ValueError, match="No hay datos históricos para el rango 2027-01-01 a 2027-01-31"):
+        model.deviation(date(2027, 1, 1), date(2027, 1, 31))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from app.models.schemas import HistoricoPerformance
+from app.services.timeseries_store import HistoricoStore
+from tests.conftest import FIELDS_ROW
+
+def test_equipment_row_does_not_double_count_plant_day(loader):
+    day = np.datetime64("2026-02-12")
+    before_day = loader.rollups.day_vector(day, "PV-001").copy()
+    before_totals = loader.store.totals()
+    before_row = loader.historico.row("PV-001", "2026-02-12")
+
+    loader.append_historico([
+        HistoricoPerformance(fecha="2026-02-12", planta_id="PV-001", equipo_id="INV-001", **FIELDS_ROW)
+    ])
+
+    np.testing.assert_array_equal(loader.rollups.day_vector(day, "PV-001"), before_day)
+    assert loader.store.totals() == before_totals
+    assert loader.historico.row("PV-001", "2026-02-12") == before_row
+
+def test_equipment_rows_sum_on_days_without_plant_row(loader):
+    rows = [
+        HistoricoPerformance(fecha="2026-02-13", planta_id="PV-001", equipo_id=equipo, **FIELDS_ROW)
+        for equipo in ("INV-001", "INV-002")
+    ]
+    loader.append_historico(rows)
+
+    vector = loader.rollups.day_vector(np.datetime64("2026-02-13"), "PV-001")
+    assert vector[0] == pytest.approx(2000.0)
+    assert loader.historico[-1].fecha == "2026-02-13"
+    assert loader.historico[-1].energia_real_kwh == pytest.approx(2000.0)
+
+def test_sum_fields_keep_float64_precision():
+    store = HistoricoStore()
+    n = 1000
+    values = {f: np.full(n, v) for f, v in FIELDS_ROW.items()}
+    values["ingresos_estimados_usd"] = np.full(n, 7934.07)
+    store.upsert(
+        np.arange(n, dtype=np.int64) * 86400, np.full(n, 86400), np.full(n, "PV-001"), None, values
+    )
+    assert store.totals()["ingresos_estimados_usd"] == pytest.approx(7934070.0, abs=1e-6)
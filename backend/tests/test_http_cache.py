@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import data
+from app.main import app
+from tests.conftest import FIELDS_ROW
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+@pytest.fixture
+def client(loader, monkeypatch):
+    monkeypatch.setattr(data, "data_loader", loader)
+    return TestClient(app)
+
+def test_repeated_request_gets_304(client):
+    first = client.get("/api/tickets", headers=IDENTITY)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get("/api/tickets", headers={**IDENTITY, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+
+    # Sin ETag, If-Modified-Since con el Last-Modified recibido
+    since = client.get(
+        "/api/tickets", headers={**IDENTITY, "If-Modified-Since": first.headers["Last-Modified"]}
+    )
+    assert since.status_code == 304
+
+def test_append_historico_changes_etag(client):
+    first = client.get("/api/plant", headers=IDENTITY)
+    etag = first.headers["ETag"]
+
+    appended = client.post("/api/data/historico", json=[
+        {"fecha": "2026-02-13", "planta_id": "PV-001", **FIELDS_ROW}
+    ])
+    assert appended.status_code == 200
+
+    after = client.get("/api/plant", headers={**IDENTITY, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert client.get(
+        "/api/plant", headers={**IDENTITY, "If-None-Match": after.headers["ETag"]}
+    ).status_code == 304
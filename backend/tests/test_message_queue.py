@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from app.services.message_queue import (
+    FakeWhatsAppProvider, OutboundQueue, PermanentSendError,
+    STATUS_FAILED, STATUS_SENDING, STATUS_SENT
+)
+
+REJECTED = "+5491199999999"
+
+class _RejectingProvider(FakeWhatsAppProvider):
+    """Rechaza de forma permanente un número (como un 4xx de Twilio)"""
+
+    def send(self, message):
+        if message["to_phone"] == REJECTED:
+            raise PermanentSendError("Número no registrado en WhatsApp")
+        return super().send(message)
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(provider, **kwargs):
+        options = dict(
+            workers=2, max_attempts=20, backoff_base_seconds=0.01, backoff_max_seconds=0.05,
+            rate_per_second=1000, rate_burst=1000,
+        )
+        queue = OutboundQueue(str(tmp_path / "outbound.db"), provider=provider, **{**options, **kwargs})
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+def _phones(n):
+    return [f"+54911{i:08d}" for i in range(n)]
+
+def test_transient_failures_are_retried_until_sent(make_queue):
+    provider = FakeWhatsAppProvider(failure_rate=0.5)
+    queue = make_queue(provider)
+
+    batch = queue.broadcast(_phones(20), message="Resumen diario")
+    assert queue.wait_idle(timeout=10)
+
+    result = queue.get_batch(batch["batch_id"])
+    assert result["status_counts"] == {STATUS_SENT: 20}
+    assert provider.sent == 20
+    assert all(m["sid"].startswith("FAKE_") and m["last_error"] is None for m in result["messages"])
+    # Con 50% de fallos algún mensaje necesitó más de un intento
+    assert sum(m["attempts"] for m in result["messages"]) > 20
+
+def test_retries_back_off_and_give_up_after_max_attempts(make_queue):
+    queue = make_queue(FakeWhatsAppProvider(failure_rate=1.0), max_attempts=3, backoff_base_seconds=0.1, backoff_max_seconds=1.0)
+
+    started = time.time()
+    message_id = queue.enqueue_text(_phones(1)[0], "Hola")
+    assert queue.wait_idle(timeout=10)
+
+    message = queue.get_message(message_id)
+    assert message["status"] == STATUS_FAILED
+    assert message["attempts"] == 3
+    assert message["last_error"] == "Fallo simulado del proveedor"
+    # Esperas de 0.1 s y 0.2 s (±20% de jitter) entre los tres intentos
+    assert message["updated_at"] - started >= 0.24
+
+def test_permanent_failure_is_not_retried(make_queue):
+    provider = _RejectingProvider()
+    queue = make_queue(provider)
+
+    batch = queue.broadcast([REJECTED, *_phones(2)], message="Alerta")
+    assert queue.wait_idle(timeout=10)
+
+    result = queue.get_batch(batch["batch_id"])
+    assert result["status_counts"] == {STATUS_SENT: 2, STATUS_FAILED: 1}
+    rejected = next(m for m in result["messages"] if m["to_phone"] == REJECTED)
+    assert rejected["attempts"] == 1
+    assert rejected["last_error"] == "Número no registrado en WhatsApp"
+
+def test_duplicate_recipients_get_one_message(make_queue):
+    provider = FakeWhatsAppProvider()
+    queue = make_queue(provider)
+    phones = _phones(3)
+
+    batch = queue.broadcast([*phones, phones[0], phones[2]], message="Reporte")
+    assert batch["queued"] == 3
+    assert queue.wait_idle(timeout=10)
+
+    result = queue.get_batch(batch["batch_id"])
+    assert sorted(m["to_phone"] for m in result["messages"]) == phones
+    assert result["status_counts"] == {STATUS_SENT: 3}
+    assert provider.sent == 3
+
+def test_expired_lease_is_reclaimed_by_another_process(make_queue, monkeypatch):
+    # Proceso que toma el lote y se cae antes de registrar el resultado
+    crashed = make_queue(FakeWhatsAppProvider(), lease_seconds=0.2)
+    monkeypatch.setattr(crashed, "start", lambda: None)
+    message_id = crashed.enqueue_text(_phones(1)[0], "Hola")
+    assert [m["id"] for m in crashed._claim_batch()] == [message_id]
+    assert crashed.get_message(message_id)["status"] == STATUS_SENDING
+
+    provider = FakeWhatsAppProvider()
+    queue = make_queue(provider, lease_seconds=0.2)
+    # Dentro del lease el mensaje sigue siendo del otro proceso
+    assert queue.resume_pending() == 0
+
+    time.sleep(0.25)
+    assert queue.resume_pending() == 1
+    assert queue.wait_idle(timeout=10)
+
+    message = queue.get_message(message_id)
+    assert message["status"] == STATUS_SENT
+    assert message["attempts"] == 1
+    assert provider.sent == 1
@@ -0,0 +1,41 @@
+import numpy as np
+
+from app.core.config import settings
+from app.models.schemas import HistoricoPerformance
+from app.services.data_loader import DataLoader
+
+def _attached(loader, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "shared_dataset_dir", str(tmp_path / "shared"))
+    publisher = DataLoader()
+    publisher.set_data_folder(loader.data_folder)
+    assert publisher.reload_data()["success"]
+    worker = DataLoader()
+    assert worker.sync_shared()
+    return publisher, worker
+
+def test_worker_attaches_columns_memory_mapped(loader, tmp_path, monkeypatch):
+    publisher, worker = _attached(loader, tmp_path, monkeypatch)
+
+    # Ni tickets ni histórico diario viajan como JSON: todo son columnas .npy
+    meta, columns = worker.shared.load(worker.shared.attached)
+    assert 'tickets' not in meta and 'historico' not in meta
+    assert all(isinstance(a, np.memmap) for a in columns.values() if a.size)
+    assert isinstance(worker.tickets.column('costo_estimado_usd'), np.memmap)
+    assert isinstance(worker.historico.columns()['energia_real_kwh'], np.memmap)
+
+    assert worker.query_tickets("pendiente", "costo_desc", 5) == publisher.query_tickets("pendiente", "costo_desc", 5)
+    assert list(worker.historico) == list(publisher.historico)
+    np.testing.assert_array_equal(
+        worker.rollups.day_vector(np.datetime64("2026-02-12"), "PV-001"),
+        publisher.rollups.day_vector(np.datetime64("2026-02-12"), "PV-001"),
+    )
+
+def test_attached_worker_appends_over_read_only_columns(loader, tmp_path, monkeypatch):
+    _, worker = _attached(loader, tmp_path, monkeypatch)
+    row = worker.historico.row("PV-001", "2026-02-12").model_dump()
+    row.update(fecha="2026-02-13")
+
+    worker.append_historico([HistoricoPerformance(**row)])
+
+    assert worker.historico[-1].fecha == "2026-02-13"
+    assert worker.rollups.day_vector(np.datetime64("2026-02-13"), "PV-001")[0] == row['energia_real_kwh']
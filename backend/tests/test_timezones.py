@@ -0,0 +1,32 @@
+import zoneinfo
+from datetime import date, timezone
+
+import pytest
+
+from app.services import timezones
+from app.services.timezones import offset_table, resolve_timezone
+
+@pytest.fixture
+def no_tz_database():
+    """Simula Windows sin tzdata: ninguna zona IANA se encuentra"""
+    timezones._table.cache_clear()
+    zoneinfo.ZoneInfo.clear_cache()
+    zoneinfo.reset_tzpath(to=[])
+    try:
+        yield
+    finally:
+        zoneinfo.reset_tzpath()
+        zoneinfo.ZoneInfo.clear_cache()
+        timezones._table.cache_clear()
+
+def test_offset_table_falls_back_to_utc_without_tz_database(no_tz_database, monkeypatch):
+    # tzdata instalado también sirve de fuente: se oculta para el test
+    monkeypatch.setattr(zoneinfo._common, "load_tzdata", _missing_tzdata)
+    tz = resolve_timezone("America/Santiago")
+    assert tz is timezone.utc
+    table = offset_table(tz)
+    assert isinstance(table.today(), date)
+    assert table.offsets.tolist() == [0]
+
+def _missing_tzdata(key):
+    raise zoneinfo.ZoneInfoNotFoundError(f"No time zone found with key {key}")
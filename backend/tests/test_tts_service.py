@@ -0,0 +1,77 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api import reports
+from app.core.config import settings
+from app.main import app
+from app.services.tts_service import TTSService
+
+class _SlowResponse:
+    """Respuesta en streaming larga: registra cuánto se leyó y si se cerró"""
+
+    def __init__(self):
+        self.blocks_read = 0
+        self.closed = threading.Event()
+
+    def iter_bytes(self, chunk_size):
+        for _ in range(1000):
+            self.blocks_read += 1
+            yield b"\x00" * chunk_size
+            time.sleep(0.001)
+
+    def close(self):
+        self.closed.set()
+
+class _SlowSpeech:
+    def __init__(self):
+        self.responses = []
+
+    def create(self, **kwargs):
+        response = _SlowResponse()
+        self.responses.append(response)
+        return response
+
+class _SlowClient:
+    def __init__(self):
+        self.audio = type("Audio", (), {})()
+        self.audio.speech = _SlowSpeech()
+
+def test_disconnect_stops_in_flight_syntheses(tmp_path):
+    service = TTSService(output_folder=str(tmp_path))
+    service.client = _SlowClient()
+
+    stream = service._iter_synthesized(["Primera oración.", "Segunda oración."], None)
+    assert next(stream)
+    # El cliente se desconecta: el generador se cierra con síntesis en curso
+    stream.close()
+
+    responses = service.client.audio.speech.responses
+    assert responses
+    for response in responses:
+        assert response.closed.wait(timeout=2)
+        assert response.blocks_read < 1000
+
+def test_stream_endpoint_serves_repeat_from_audio_cache(loader, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "tts_stub_client", True)
+    monkeypatch.setattr(settings, "tts_cache_enabled", True)
+    service = TTSService(output_folder=str(tmp_path / "output"))
+    monkeypatch.setattr(reports, "tts_service", service)
+    monkeypatch.setattr(reports, "data_loader", loader)
+
+    client = TestClient(app)
+    body = {"text": "La planta generó lo esperado. No hay alertas. El backlog se redujo."}
+
+    first = client.post("/api/report/tts/stream", json=body)
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "audio/mpeg"
+    assert first.headers["X-TTS-Source"] == "tts"
+    assert first.content.startswith(b"\xff\xfb")
+    calls = service.client.audio.speech.calls
+    assert calls == 2  # Primera oración sola, el resto en otro fragmento
+
+    second = client.post("/api/report/tts/stream", json=body)
+    assert second.headers["X-TTS-Source"] == "cache"
+    assert second.content == first.content
+    assert service.client.audio.speech.calls == calls